@@ -23,26 +23,21 @@ if sa_json:
         print('Warning: could not write credentials.json from SERVICE_ACCOUNT_JSON')
 
 app = Flask(__name__)
-from config import DATABASE_PATH
+from config import DATABASE_PATH, ROOT_FOLDERS, DISPLAY_NAMES
 
 # Use the detected database path from config (DATABASE_URL-aware fallback)
 DATABASE = DATABASE_PATH
 
-# === Konfigurasi Root Folder (harus sesuai dengan drive_sync.py) ===
-ROOT_FOLDERS = {
-    "EBOOKS": "12ffd7GqHAiy3J62Vu65LbVt6-ultog5Z",
-    "Pengetahuan": "1Y2SLCbyHoB53BaQTTwRta2T6dv_drRll",
-    "Service_Manual_1": "1CHz8UWZXfJtXlcjp9-FPAo-t_KkfTztW",
-    "Service_Manual_2": "1_SsZ7SkaZxvXUZ6RUAA_o7WR_GAtgEwT"
-}
-
-# === Nama tampilan untuk UI ===
-DISPLAY_NAMES = {
-    "EBOOKS": "📚 EBOOKS",
-    "Pengetahuan": "🧠 Pengetahuan",
-    "Service_Manual_1": "🔧 Service Manual (1)",
-    "Service_Manual_2": "⚙️ Service Manual (2)"
-}
+# Pastikan index katalog terpasang (idempotent). Menulis ke DATABASE di
+# tempat; CATALOG_MIGRATE_ON_START=0 jika migrasi dijalankan saat deploy.
+from catalog_schema import (
+    MIGRATE_ON_START, migrate_path, search_names, load_root_summary, folder_page, page_limit
+)
+if MIGRATE_ON_START:
+    try:
+        migrate_path(DATABASE, ROOT_FOLDERS, DISPLAY_NAMES)
+    except sqlite3.Error as e:
+        print(f'Warning: catalog schema migration failed: {e}')
 
 def get_db_connection():
     conn = sqlite3.connect(DATABASE)
@@ -50,24 +45,41 @@ def get_db_connection():
     return conn
 
 
+# === Daftar root dari tabel root_summary (ditulis oleh sync_drive.py) ===
+# Disimpan di memori proses dan hanya dibaca ulang saat file database berubah.
+_root_cache = {'signature': None, 'roots': []}
+
+
+def get_roots():
+    try:
+        st = os.stat(DATABASE)
+    except OSError:
+        return []
+    signature = (st.st_ino, st.st_size, st.st_mtime_ns)
+    if _root_cache['signature'] != signature:
+        conn = get_db_connection()
+        try:
+            roots = load_root_summary(conn)
+        except sqlite3.OperationalError:
+            roots = []
+        finally:
+            conn.close()
+        _root_cache['roots'] = roots
+        _root_cache['signature'] = signature
+    return _root_cache['roots']
+
+
+def get_root_list():
+    """(nama tampilan, folder_id, jumlah item) untuk sidebar dan halaman utama"""
+    return [(root['name'], root['folder_id'], root['count']) for root in get_roots()]
+
+
 @app.context_processor
 def inject_root_list():
     """Make root_list available in all templates for the sidebar."""
-    conn = get_db_connection()
-    root_list = []
-    try:
-        for key, folder_id in ROOT_FOLDERS.items():
-            count = conn.execute(
-                "SELECT COUNT(*) FROM files WHERE (parent_id = ?) OR (root_folder_name = ?)",
-                (folder_id, key)
-            ).fetchone()[0]
-            name = DISPLAY_NAMES.get(key, key)
-            root_list.append((name, folder_id, count))
-        # ⚠️ TIDAK ADA penambahan item statis di sini!
-        # Link "Workshop Manual" ditangani langsung di base.html
-    finally:
-        conn.close()
-    return dict(root_list=root_list)
+    # ⚠️ TIDAK ADA penambahan item statis di sini!
+    # Link "Workshop Manual" ditangani langsung di base.html
+    return dict(root_list=get_root_list())
 
 def sizeof_fmt(num, suffix="B"):
     if not num or num == "—":
@@ -85,52 +97,61 @@ def sizeof_fmt(num, suffix="B"):
 app.jinja_env.filters['filesizeformat'] = sizeof_fmt
 
 
-# === HALAMAN UTAMA: Tampilkan 4 root folder eksplisit ===
+# === HALAMAN UTAMA: Tampilkan root folder dari root_summary ===
 @app.route('/')
 def index():
-    conn = get_db_connection()
-    root_list = []
-    for key, folder_id in ROOT_FOLDERS.items():
-        count = conn.execute(
-            "SELECT COUNT(*) FROM files WHERE (parent_id = ?) OR (root_folder_name = ?)",
-            (folder_id, key)
-        ).fetchone()[0]
-        name = DISPLAY_NAMES.get(key, key)
-        root_list.append((name, folder_id, count))
-    conn.close()
-    return render_template('index.html', root_list=root_list)
+    return render_template('index.html', root_list=get_root_list())
 
 
 # === TAMPILKAN ISI FOLDER ===
-@app.route('/folder/<folder_id>')
-def view_folder(folder_id):
+def load_folder_page(folder_id):
+    """Nama folder + satu halaman isi (keyset ?after=<token>&limit=<n>)"""
     conn = get_db_connection()
-
-    folder_name = "Folder"
-    for key, fid in ROOT_FOLDERS.items():
-        if fid == folder_id:
-            folder_name = DISPLAY_NAMES.get(key, key)
-            break
-    else:
-        folder_row = conn.execute(
-            "SELECT name FROM files WHERE id = ? AND is_directory = 1", (folder_id,)
-        ).fetchone()
-        if folder_row:
-            folder_name = folder_row['name']
+    try:
+        folder_name = "Folder"
+        for root in get_roots():
+            if root['folder_id'] == folder_id:
+                folder_name = root['name']
+                break
         else:
-            count = conn.execute(
-                "SELECT COUNT(*) FROM files WHERE parent_id = ?", (folder_id,)
-            ).fetchone()[0]
-            if count == 0:
+            folder_row = conn.execute(
+                "SELECT name FROM files WHERE id = ? AND is_directory = 1", (folder_id,)
+            ).fetchone()
+            if folder_row:
+                folder_name = folder_row['name']
+            elif not conn.execute(
+                "SELECT 1 FROM files WHERE parent_id = ? LIMIT 1", (folder_id,)
+            ).fetchone():
                 abort(404)
 
-    items = conn.execute(
-        "SELECT * FROM files WHERE parent_id = ? ORDER BY is_directory DESC, name",
-        (folder_id,)
-    ).fetchall()
-    conn.close()
+        items, next_cursor = folder_page(
+            conn, folder_id,
+            after=request.args.get('after'),
+            limit=page_limit(request.args.get('limit'))
+        )
+    finally:
+        conn.close()
+    return folder_name, items, next_cursor
+
 
-    return render_template('folder.html', folder_id=folder_id, folder_name=folder_name, items=items)
+@app.route('/folder/<folder_id>')
+def view_folder(folder_id):
+    folder_name, items, next_cursor = load_folder_page(folder_id)
+    return render_template('folder.html', folder_id=folder_id, folder_name=folder_name,
+                           items=items, next_cursor=next_cursor,
+                           is_first_page=not request.args.get('after'))
+
+
+@app.route('/api/folder/<folder_id>')
+def api_folder(folder_id):
+    """Varian JSON dari /folder/<id> dengan cursor `after` yang sama"""
+    folder_name, items, next_cursor = load_folder_page(folder_id)
+    return jsonify({
+        "folder_id": folder_id,
+        "folder_name": folder_name,
+        "items": [dict(item) for item in items],
+        "next_cursor": next_cursor
+    })
 
 
 # === HALAMAN STATIS: WORKSHOP MANUAL MITSUBISHI ===
@@ -217,16 +238,13 @@ def search():
         return index()
 
     conn = get_db_connection()
-    results = conn.execute(
-        "SELECT *, (CASE WHEN root_folder_name = 'EBOOKS' THEN '📚 EBOOKS' " +
-        "WHEN root_folder_name = 'Pengetahuan' THEN '🧠 Pengetahuan' " +
-        "WHEN root_folder_name = 'Service_Manual_1' THEN '🔧 Service Manual (1)' " +
-        "WHEN root_folder_name = 'Service_Manual_2' THEN '⚙️ Service Manual (2)' " +
-        "ELSE root_folder_name END) as display_root " +
-        "FROM files WHERE name LIKE ? ORDER BY root_folder_name, name",
-        (f"%{query}%",)
-    ).fetchall()
+    results = search_names(conn, query, limit=50)
     conn.close()
+    display_names = {root['key']: root['name'] for root in get_roots()}
+    results = [
+        dict(r, display_root=display_names.get(r['root_folder_name'], r['root_folder_name']))
+        for r in results
+    ]
     return render_template('search.html', query=query, results=results)
 
 
@@ -239,10 +257,7 @@ def api_search():
         return jsonify({"results": []})
 
     conn = get_db_connection()
-    results = conn.execute(
-        "SELECT name, id FROM files WHERE is_directory = 0 AND name LIKE ? LIMIT 10",
-        (f"%{query}%",)
-    ).fetchall()
+    results = search_names(conn, query, limit=10, select="f.name, f.id", files_only=True)
     conn.close()
 
     return jsonify([
@@ -262,10 +277,9 @@ def api_autocomplete():
         return jsonify([])
 
     conn = get_db_connection()
-    results = conn.execute(
-        "SELECT name, id, is_directory, mime_type FROM files WHERE name LIKE ? LIMIT 8",
-        (f"%{query}%",)
-    ).fetchall()
+    results = search_names(
+        conn, query, limit=8, select="f.name, f.id, f.is_directory, f.mime_type"
+    )
     conn.close()
 
     return jsonify([
@@ -0,0 +1,410 @@
+"""
+Migrasi skema database katalog Dokumen Bengkel (tabel `files`).
+
+Versi skema dicatat di tabel `schema_migrations` di dalam database katalog.
+Setiap migrasi hanya dijalankan sekali dan statement DDL memakai
+IF NOT EXISTS sehingga aman dipanggil berulang kali, baik dari sync_drive.py
+maupun saat aplikasi start.
+
+Migrasi saat start menulis langsung ke database.db yang dipakai aplikasi.
+Jika file itu harus tetap apa adanya (mis. ikut di-deploy dari repo dan
+dimigrasi terpisah saat deploy), set CATALOG_MIGRATE_ON_START=0 lalu jalankan
+`python catalog_schema.py` sebagai langkah deploy.
+
+Jalankan langsung untuk migrasi + cek EXPLAIN QUERY PLAN:
+    python catalog_schema.py [path/ke/database.db]
+"""
+
+import base64
+import json
+import os
+import re
+import sqlite3
+import sys
+import time
+from datetime import datetime
+
+# Dibaca app.py & app/__init__.py (aplikasi utama)
+MIGRATE_ON_START = os.getenv('CATALOG_MIGRATE_ON_START', '1') != '0'
+
+# (versi, deskripsi, daftar statement SQL)
+MIGRATIONS = [
+    (1, "tabel files", [
+        """
+        CREATE TABLE IF NOT EXISTS files (
+            id TEXT PRIMARY KEY,
+            name TEXT,
+            is_directory BOOLEAN DEFAULT 0,
+            size INTEGER DEFAULT 0,
+            modified_time TEXT,
+            parent_id TEXT,
+            root_folder_name TEXT,
+            mime_type TEXT
+        )
+        """,
+    ]),
+    (2, "index listing folder dan root", [
+        # Listing folder: WHERE parent_id = ? ORDER BY is_directory DESC, name
+        # (covering untuk kolom yang dipakai handler)
+        """
+        CREATE INDEX IF NOT EXISTS idx_files_parent_dir_name
+        ON files (parent_id, is_directory DESC, name, id, mime_type, size)
+        """,
+        # Hitung/daftar per root: WHERE root_folder_name = ? ORDER BY name
+        """
+        CREATE INDEX IF NOT EXISTS idx_files_root_name
+        ON files (root_folder_name, name)
+        """,
+    ]),
+    (3, "FTS5 nama dokumen", [
+        # unicode61 memecah "2NR-FE" / "Service_Manual" di tanda baca, tapi
+        # kode part alfanumerik seperti "4D56" / "4M40" tetap satu token.
+        """
+        CREATE VIRTUAL TABLE IF NOT EXISTS files_fts USING fts5(
+            name,
+            content='files',
+            content_rowid='rowid',
+            tokenize="unicode61 remove_diacritics 2",
+            prefix='2 3'
+        )
+        """,
+        # Trigger menjaga files_fts tetap sinkron dengan files. Penulis yang
+        # memakai INSERT OR REPLACE wajib mengaktifkan PRAGMA recursive_triggers
+        # agar trigger delete ikut jalan.
+        """
+        CREATE TRIGGER IF NOT EXISTS files_fts_ai AFTER INSERT ON files BEGIN
+            INSERT INTO files_fts (rowid, name) VALUES (new.rowid, new.name);
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS files_fts_ad AFTER DELETE ON files BEGIN
+            INSERT INTO files_fts (files_fts, rowid, name) VALUES ('delete', old.rowid, old.name);
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS files_fts_au AFTER UPDATE OF name ON files BEGIN
+            INSERT INTO files_fts (files_fts, rowid, name) VALUES ('delete', old.rowid, old.name);
+            INSERT INTO files_fts (rowid, name) VALUES (new.rowid, new.name);
+        END
+        """,
+        "INSERT INTO files_fts (files_fts) VALUES ('rebuild')",
+    ]),
+    (4, "ringkasan per root", [
+        # Diisi ulang oleh sync (refresh_root_summary); dibaca sekali per generasi
+        """
+        CREATE TABLE IF NOT EXISTS root_summary (
+            root_key TEXT PRIMARY KEY,
+            folder_id TEXT NOT NULL,
+            display_name TEXT,
+            position INTEGER DEFAULT 0,
+            file_count INTEGER DEFAULT 0,
+            folder_count INTEGER DEFAULT 0,
+            total_bytes INTEGER DEFAULT 0,
+            last_modified TEXT,
+            updated_at TEXT
+        )
+        """,
+    ]),
+    (5, "status sync (token changes Drive)", [
+        # key/value kecil milik sync_drive.py, mis. drive_start_page_token
+        """
+        CREATE TABLE IF NOT EXISTS sync_state (
+            key TEXT PRIMARY KEY,
+            value TEXT,
+            updated_at TEXT
+        )
+        """,
+    ]),
+]
+
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+# Ukuran halaman listing folder (keyset pagination)
+FOLDER_PAGE_SIZE = 100
+FOLDER_PAGE_MAX = 500
+
+FOLDER_PAGE_COLUMNS = "id, name, is_directory, mime_type, size, modified_time"
+
+# Query panas dari app/documents_handler.py dan app.py yang wajib memakai index.
+# Pencarian nama lewat files_fts (lihat search_names).
+HOT_QUERIES = [
+    ("folder name",
+     "SELECT name FROM files WHERE id = ? AND is_directory = 1",
+     ("x",)),
+    ("folder listing",
+     "SELECT id, name, is_directory, mime_type, size FROM files "
+     "WHERE parent_id = ? ORDER BY is_directory DESC, name",
+     ("x",)),
+    ("folder listing (full row)",
+     "SELECT * FROM files WHERE parent_id = ? ORDER BY is_directory DESC, name",
+     ("x",)),
+    ("folder child count",
+     "SELECT COUNT(*) FROM files WHERE parent_id = ?",
+     ("x",)),
+    ("file info",
+     "SELECT * FROM files WHERE id = ? AND is_directory = 0",
+     ("x",)),
+    ("root files",
+     "SELECT id, name, mime_type, size FROM files "
+     "WHERE parent_id = ? AND is_directory = 0 ORDER BY name",
+     ("x",)),
+    ("folder page",
+     f"SELECT {FOLDER_PAGE_COLUMNS} FROM files WHERE parent_id = ? AND is_directory = ? "
+     "AND (name, id) > (?, ?) ORDER BY name, id LIMIT ?",
+     ("x", 1, "", "", 100)),
+    ("sidebar subfolders",
+     "SELECT id, name FROM files WHERE parent_id = ? AND is_directory = 1 ORDER BY name",
+     ("x",)),
+]
+
+
+def get_schema_version(conn):
+    """Versi skema yang sudah diterapkan (0 jika belum pernah migrasi)"""
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS schema_migrations ("
+        "version INTEGER PRIMARY KEY, description TEXT, applied_at TEXT)"
+    )
+    row = conn.execute("SELECT MAX(version) FROM schema_migrations").fetchone()
+    return row[0] or 0
+
+
+def migrate(conn):
+    """Terapkan migrasi yang belum jalan. Return daftar versi yang diterapkan."""
+    current = get_schema_version(conn)
+    conn.commit()
+    applied = []
+    for version, description, statements in MIGRATIONS:
+        if version <= current:
+            continue
+        try:
+            for statement in statements:
+                conn.execute(statement)
+            conn.execute(
+                "INSERT OR IGNORE INTO schema_migrations (version, description, applied_at) "
+                "VALUES (?, ?, ?)",
+                (version, description, datetime.utcnow().isoformat())
+            )
+            conn.commit()
+        except sqlite3.Error:
+            conn.rollback()
+            raise
+        applied.append(version)
+    return applied
+
+
+def migrate_path(db_path, roots=None, display_names=None):
+    """
+    Migrasi database katalog di path tertentu (tidak membuat file baru).
+    Jika `roots` diberikan, root_summary yang masih kosong ikut diisi.
+    """
+    if not os.path.exists(db_path):
+        return []
+    conn = sqlite3.connect(db_path, timeout=30)
+    try:
+        applied = migrate(conn)
+        if roots:
+            ensure_root_summary(conn, roots, display_names)
+        return applied
+    finally:
+        conn.close()
+
+
+def refresh_root_summary(conn, roots, display_names=None):
+    """
+    Tulis ulang root_summary dari tabel files dengan satu query GROUP BY.
+    `roots` = {root_key: folder_id} (urutan dict = urutan tampil). Tidak commit.
+    """
+    display_names = display_names or {}
+    totals = {
+        row[0]: row[1:]
+        for row in conn.execute(
+            "SELECT root_folder_name, "
+            "SUM(CASE WHEN is_directory = 0 THEN 1 ELSE 0 END), "
+            "SUM(CASE WHEN is_directory = 1 THEN 1 ELSE 0 END), "
+            "COALESCE(SUM(size), 0), MAX(modified_time) "
+            "FROM files GROUP BY root_folder_name"
+        )
+    }
+    now = datetime.utcnow().isoformat()
+    conn.execute("DELETE FROM root_summary")
+    conn.executemany(
+        "INSERT INTO root_summary (root_key, folder_id, display_name, position, file_count, "
+        "folder_count, total_bytes, last_modified, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        [
+            (key, folder_id, display_names.get(key, key), position,
+             *(totals.get(key) or (0, 0, 0, None)), now)
+            for position, (key, folder_id) in enumerate(roots.items())
+        ]
+    )
+
+
+def get_sync_state(conn, key):
+    """Nilai sync_state untuk `key` (None jika belum ada)"""
+    row = conn.execute("SELECT value FROM sync_state WHERE key = ?", (key,)).fetchone()
+    return row[0] if row else None
+
+
+def set_sync_state(conn, key, value):
+    """Simpan nilai sync_state. Tidak commit (ikut transaksi sync)."""
+    conn.execute(
+        "INSERT INTO sync_state (key, value, updated_at) VALUES (?, ?, ?) "
+        "ON CONFLICT (key) DO UPDATE SET value = excluded.value, updated_at = excluded.updated_at",
+        (key, value, datetime.utcnow().isoformat())
+    )
+
+
+def load_root_summary(conn):
+    """Daftar root (dict) dari root_summary, urut sesuai position"""
+    rows = conn.execute(
+        "SELECT root_key, folder_id, display_name, file_count, folder_count, "
+        "total_bytes, last_modified FROM root_summary ORDER BY position, root_key"
+    ).fetchall()
+    return [
+        {
+            'key': row[0],
+            'folder_id': row[1],
+            'name': row[2] or row[0],
+            'file_count': row[3],
+            'folder_count': row[4],
+            'count': row[3] + row[4],
+            'total_bytes': row[5],
+            'last_modified': row[6]
+        }
+        for row in rows
+    ]
+
+
+def ensure_root_summary(conn, roots, display_names=None):
+    """Isi root_summary jika masih kosong (database lama sebelum migrasi 4)"""
+    if conn.execute("SELECT 1 FROM root_summary LIMIT 1").fetchone():
+        return False
+    refresh_root_summary(conn, roots, display_names)
+    conn.commit()
+    return True
+
+
+def encode_cursor(is_directory, name, file_id):
+    """Token `after` opaque untuk posisi (is_directory, name, id) terakhir di halaman"""
+    raw = json.dumps([1 if is_directory else 0, name or '', file_id], ensure_ascii=False)
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(token):
+    """Kebalikan encode_cursor; None jika token kosong/tidak valid"""
+    if not token:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        is_directory, name, file_id = json.loads(raw.decode('utf-8'))
+        return (1 if is_directory else 0, str(name), str(file_id))
+    except (ValueError, TypeError):
+        return None
+
+
+def page_limit(value):
+    """Normalisasi parameter limit dari query string"""
+    try:
+        limit = int(value)
+    except (TypeError, ValueError):
+        return FOLDER_PAGE_SIZE
+    return max(1, min(limit, FOLDER_PAGE_MAX))
+
+
+def folder_page(conn, folder_id, after=None, limit=FOLDER_PAGE_SIZE):
+    """
+    Satu halaman isi folder, urut (is_directory DESC, name, id).
+    Keyset: setiap halaman langsung seek ke index lewat (name, id) > cursor,
+    jadi biayanya konstan di posisi mana pun. Return (rows, next_cursor).
+    `conn` harus memakai row_factory sqlite3.Row.
+    """
+    cursor = decode_cursor(after)
+    rows = []
+    # Folder dulu (is_directory = 1), lalu file (is_directory = 0)
+    for is_directory in (1, 0):
+        if cursor and cursor[0] < is_directory:
+            continue
+        remaining = limit + 1 - len(rows)
+        if remaining <= 0:
+            break
+        if cursor and cursor[0] == is_directory:
+            rows.extend(conn.execute(
+                f"SELECT {FOLDER_PAGE_COLUMNS} FROM files WHERE parent_id = ? AND is_directory = ? "
+                "AND (name, id) > (?, ?) ORDER BY name, id LIMIT ?",
+                (folder_id, is_directory, cursor[1], cursor[2], remaining)
+            ).fetchall())
+        else:
+            rows.extend(conn.execute(
+                f"SELECT {FOLDER_PAGE_COLUMNS} FROM files WHERE parent_id = ? AND is_directory = ? "
+                "ORDER BY name, id LIMIT ?",
+                (folder_id, is_directory, remaining)
+            ).fetchall())
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor(last['is_directory'], last['name'], last['id'])
+    return rows, next_cursor
+
+
+def fts_query(text):
+    """Ubah input user jadi ekspresi MATCH FTS5: tiap token prefix-match, di-AND"""
+    tokens = re.findall(r"[^\W_]+", text or "")
+    return " AND ".join(f'"{token}"*' for token in tokens)
+
+
+def search_names(conn, text, limit=50, select="f.*", files_only=False):
+    """
+    Cari nama dokumen lewat FTS5, diurutkan berdasarkan relevansi bm25.
+    `select` memakai alias `f` untuk tabel files.
+    """
+    match = fts_query(text)
+    if not match:
+        return []
+    where = " AND f.is_directory = 0" if files_only else ""
+    try:
+        return conn.execute(
+            f"SELECT {select} FROM files_fts JOIN files f ON f.rowid = files_fts.rowid "
+            f"WHERE files_fts MATCH ?{where} ORDER BY bm25(files_fts), f.name LIMIT ?",
+            (match, limit)
+        ).fetchall()
+    except sqlite3.OperationalError:
+        # Database belum dimigrasi / SQLite tanpa FTS5: fallback ke LIKE
+        return conn.execute(
+            f"SELECT {select} FROM files f WHERE f.name LIKE ?{where} "
+            f"ORDER BY f.root_folder_name, f.name LIMIT ?",
+            (f"%{text}%", limit)
+        ).fetchall()
+
+
+def find_table_scans(conn, queries=None):
+    """Return [(label, detail)] untuk query yang jatuh ke full table scan"""
+    scans = []
+    for label, sql, params in (queries or HOT_QUERIES):
+        for row in conn.execute("EXPLAIN QUERY PLAN " + sql, params):
+            detail = row[-1]
+            # "SCAN files" = table scan; "SCAN files USING ... INDEX" masih pakai index
+            if detail.startswith("SCAN") and "INDEX" not in detail:
+                scans.append((label, detail))
+    return scans
+
+
+if __name__ == "__main__":
+    from config import DATABASE_PATH, ROOT_FOLDERS, DISPLAY_NAMES
+
+    path = sys.argv[1] if len(sys.argv) > 1 else DATABASE_PATH
+    conn = sqlite3.connect(path)
+    applied = migrate(conn)
+    ensure_root_summary(conn, ROOT_FOLDERS, DISPLAY_NAMES)
+    print(f"Schema version: {get_schema_version(conn)} (baru diterapkan: {applied or '-'})")
+    scans = find_table_scans(conn)
+    for sample in ("4D56", "4M40", "service manual"):
+        start = time.perf_counter()
+        rows = search_names(conn, sample, limit=50)
+        print(f"🔎 '{sample}': {len(rows)} hasil dalam {(time.perf_counter() - start) * 1000:.2f} ms")
+    conn.close()
+    for label, detail in scans:
+        print(f"❌ {label}: {detail}")
+    if scans:
+        sys.exit(1)
+    print(f"✅ {len(HOT_QUERIES)} query memakai index")
@@ -39,3 +39,10 @@ ROOT_FOLDERS = {
     "Service_Manual_2": "1_SsZ7SkaZxvXUZ6RUAA_o7WR_GAtgEwT"
 }
 
+# Nama tampilan root untuk UI (ditulis sync ke tabel root_summary)
+DISPLAY_NAMES = {
+    "EBOOKS": "📚 EBOOKS",
+    "Pengetahuan": "🧠 Pengetahuan",
+    "Service_Manual_1": "🔧 Service Manual (1)",
+    "Service_Manual_2": "⚙️ Service Manual (2)"
+}
@@ -0,0 +1,218 @@
+"""
+Google Drive palsu (in-memory) untuk menguji & membenchmark sync_drive.py
+tanpa kredensial maupun jaringan.
+
+Meniru bagian Drive API v3 yang dipakai sync:
+    service.files().list(q="'<id>' in parents and trashed = false", ...)
+    service.changes().getStartPageToken()
+    service.changes().list(pageToken=..., pageSize=..., includeRemoved=True)
+
+Setiap mutasi (add/update/move/trash/delete) dicatat sebagai entri changes
+feed, jadi token yang diambil sebelum mutasi akan mengembalikan perubahan
+tersebut per halaman. Halaman changes juga bisa diisi manual (canned) lewat
+`canned_changes`. Token yang lebih tua dari `expire_before()` ditolak dengan
+HTTP 410 seperti token Drive yang kedaluwarsa. Jumlah panggilan API dicatat
+di `calls`.
+
+Untuk benchmark traversal paralel: `latency` (detik per panggilan, dengan
+jitter) meniru round-trip ke Google, dan `quota_per_second` menolak
+panggilan di atas kuota dengan 403 rateLimitExceeded / 429 seperti Drive.
+Aman dipanggil dari banyak thread.
+"""
+
+import itertools
+import random
+import re
+import threading
+import time
+from collections import Counter, defaultdict, deque
+
+FOLDER_MIME = 'application/vnd.google-apps.folder'
+
+_PARENT_QUERY = re.compile(r"'([^']+)' in parents")
+
+
+class FakeHttpError(Exception):
+    """Bentuknya seperti googleapiclient.errors.HttpError (punya resp.status)"""
+
+    class _Resp:
+        def __init__(self, status):
+            self.status = status
+
+    def __init__(self, status, reason=''):
+        super().__init__(f"HTTP {status}: {reason}")
+        self.resp = self._Resp(status)
+        self.status_code = status
+
+
+class _Request:
+    def __init__(self, func, kwargs):
+        self._func = func
+        self._kwargs = kwargs
+
+    def execute(self, num_retries=0):
+        return self._func(**self._kwargs)
+
+
+class _Resource:
+    def __init__(self, **methods):
+        self._methods = methods
+
+    def __getattr__(self, name):
+        try:
+            func = self._methods[name]
+        except KeyError:
+            raise AttributeError(name)
+        return lambda **kwargs: _Request(func, kwargs)
+
+
+class FakeDrive:
+    def __init__(self, latency=0.0, quota_per_second=None):
+        self.items = {}
+        self.children = defaultdict(set)  # parent id -> id anak
+        self.log = []  # entri changes feed; token = indeks berikutnya di log
+        self.canned_changes = {}  # token -> response changes().list siap pakai
+        self.expired_before = 0
+        self.latency = latency
+        self.quota_per_second = quota_per_second
+        self.calls = Counter()
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._recent = deque()  # waktu panggilan yang lolos kuota (1 detik terakhir)
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+
+    def _call(self, method):
+        """Catat panggilan, tegakkan kuota, lalu tunggu latency jaringan"""
+        with self._lock:
+            self.calls[method] += 1
+            if self.quota_per_second:
+                now = time.monotonic()
+                while self._recent and self._recent[0] <= now - 1:
+                    self._recent.popleft()
+                if len(self._recent) >= self.quota_per_second:
+                    self.calls['rate_limited'] += 1
+                    if self.calls['rate_limited'] % 2:
+                        raise FakeHttpError(403, 'User Rate Limit Exceeded (userRateLimitExceeded)')
+                    raise FakeHttpError(429, 'Too Many Requests (rateLimitExceeded)')
+                self._recent.append(now)
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            if self.latency:
+                time.sleep(self.latency * random.uniform(0.8, 1.2))
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+    # ===== Service (dipakai sync_drive) =====
+    def files(self):
+        return _Resource(list=self._files_list)
+
+    def changes(self):
+        return _Resource(getStartPageToken=self._get_start_page_token, list=self._changes_list)
+
+    def _files_list(self, q='', fields=None, pageToken=None, pageSize=100, **kwargs):
+        self._call('files.list')
+        match = _PARENT_QUERY.search(q)
+        skip_trashed = 'trashed = false' in q
+        with self._lock:
+            candidates = [self.items[i] for i in self.children[match.group(1)]] if match else list(self.items.values())
+        children = sorted(
+            (item for item in candidates if not (skip_trashed and item['trashed'])),
+            key=lambda item: item['id']
+        )
+        start = int(pageToken or 0)
+        page = children[start:start + pageSize]
+        response = {'files': [dict(item) for item in page]}
+        if start + pageSize < len(children):
+            response['nextPageToken'] = str(start + pageSize)
+        return response
+
+    def _get_start_page_token(self, **kwargs):
+        self._call('changes.getStartPageToken')
+        return {'startPageToken': str(len(self.log))}
+
+    def _changes_list(self, pageToken, pageSize=100, includeRemoved=True, fields=None, **kwargs):
+        self._call('changes.list')
+        if pageToken in self.canned_changes:
+            return self.canned_changes[pageToken]
+        try:
+            start = int(pageToken)
+        except (TypeError, ValueError):
+            raise FakeHttpError(400, 'Invalid pageToken')
+        if start < self.expired_before or start > len(self.log):
+            raise FakeHttpError(410, 'Page token expired')
+        entries = [
+            entry for entry in self.log[start:start + pageSize]
+            if includeRemoved or not entry['removed']
+        ]
+        response = {'changes': [dict(entry) for entry in entries]}
+        if start + pageSize < len(self.log):
+            response['nextPageToken'] = str(start + pageSize)
+        else:
+            response['newStartPageToken'] = str(len(self.log))
+        return response
+
+    # ===== Mutasi (mencatat changes feed) =====
+    def _record(self, file_id, removed=False):
+        entry = {'fileId': file_id, 'removed': removed}
+        if not removed:
+            entry['file'] = dict(self.items[file_id])
+        self.log.append(entry)
+
+    def add(self, name, parent, folder=False, mime_type='application/pdf', file_id=None,
+            modified_time='2024-01-01T00:00:00.000Z'):
+        file_id = file_id or f"f{next(self._ids):06d}"
+        self.items[file_id] = {
+            'id': file_id,
+            'name': name,
+            'mimeType': FOLDER_MIME if folder else mime_type,
+            'modifiedTime': modified_time,
+            'parents': [parent],
+            'trashed': False,
+        }
+        self.children[parent].add(file_id)
+        self._record(file_id)
+        return file_id
+
+    def update(self, file_id, **fields):
+        item = self.items[file_id]
+        if 'parents' in fields:
+            self.children[item['parents'][0]].discard(file_id)
+            self.children[fields['parents'][0]].add(file_id)
+        item.update(fields)
+        self._record(file_id)
+
+    def move(self, file_id, new_parent):
+        self.update(file_id, parents=[new_parent])
+
+    def trash(self, file_id):
+        self.update(file_id, trashed=True)
+
+    def delete(self, file_id):
+        item = self.items.pop(file_id)
+        self.children[item['parents'][0]].discard(file_id)
+        self._record(file_id, removed=True)
+
+    def expire_before(self, token):
+        """Token changes < `token` dianggap kedaluwarsa (HTTP 410)"""
+        self.expired_before = int(token)
+
+
+def build_corpus(drive, roots, folders_per_root, files_per_folder, depth=2):
+    """
+    Isi FakeDrive dengan pohon folder: tiap root berisi `folders_per_root`
+    folder, bersarang sampai `depth` tingkat. Return daftar id folder.
+    """
+    folders = []
+    for root_id in roots:
+        parent = root_id
+        for i in range(folders_per_root):
+            parent = root_id if i % depth == 0 else parent
+            parent = drive.add(f"Folder {len(folders)}", parent, folder=True)
+            folders.append(parent)
+    for folder_id in folders:
+        for i in range(files_per_folder):
+            drive.add(f"Manual {folder_id}-{i} 4D56.pdf", folder_id)
+    return folders
@@ -4,13 +4,29 @@ Versi Final: Sinkronisasi dua arah Google Drive ke database.
 - Menyimpan parent_id, is_directory, mime_type
 - Navigasi folder penuh di web
 - Logging, lock file, SQLite/MySQL
-- Hanya 4 folder target
+- Hanya folder target di config.py (ROOT_FOLDERS)
+- Inkremental (SQLite): startPageToken changes feed disimpan di tabel
+  sync_state; run berikutnya hanya menerapkan item yang ditambah, diubah,
+  dipindah, atau dibuang ke trash. Token kedaluwarsa / belum ada -> rescan
+  penuh.
+
+Pemakaian:
+    python sync_drive.py            # inkremental (rescan penuh jika perlu)
+    python sync_drive.py --full     # paksa rescan penuh
+
+Traversal folder memakai BFS iteratif dengan thread pool (SYNC_CONCURRENCY
+files.list paralel, default 8) dan backoff bersama saat kuota Drive habis
+(403 rateLimitExceeded / 429).
 """
 
 import os
+import random
 import sys
+import threading
 import time
 import tempfile
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from datetime import datetime
 
 # ============ Konfigurasi ============
@@ -30,13 +46,24 @@ MYSQL_CONFIG = {
 SERVICE_ACCOUNT_FILE = "credentials.json"
 SCOPES = ['https://www.googleapis.com/auth/drive.readonly']
 
-# Folder target: {key: folder_id}
-TARGET_FOLDERS = {
-    "EBOOKS": "12ffd7GqHAiy3J62Vu65LbVt6-ultog5Z",
-    "Pengetahuan": "1Y2SLCbyHoB53BaQTTwRta2T6dv_drRll",
-    "Service_Manual_1": "1CHz8UWZXfJtXlcjp9-FPAo-t_KkfTztW",
-    "Service_Manual_2": "1_SsZ7SkaZxvXUZ6RUAA_o7WR_GAtgEwT"
-}
+# Folder target: {key: folder_id} (sumber tunggal di config.py)
+from config import ROOT_FOLDERS as TARGET_FOLDERS, DISPLAY_NAMES
+from catalog_schema import get_sync_state, migrate, refresh_root_summary, set_sync_state
+
+FOLDER_MIME = 'application/vnd.google-apps.folder'
+FILE_FIELDS = "id, name, mimeType, modifiedTime, parents, trashed"
+CHANGES_PAGE_SIZE = 1000
+START_TOKEN_KEY = 'drive_start_page_token'
+# Token changes kedaluwarsa/tidak valid: 410 Gone, 404, atau 400 Invalid Value
+TOKEN_EXPIRED_STATUSES = (400, 404, 410)
+
+# Traversal paralel: jumlah files.list bersamaan & backoff kuota (403/429)
+SYNC_CONCURRENCY = int(os.getenv('SYNC_CONCURRENCY', 8))
+RATE_LIMIT_REASONS = ('rateLimitExceeded', 'userRateLimitExceeded')
+LIST_PAGE_SIZE = 1000
+BACKOFF_BASE = 1.0
+BACKOFF_MAX = 64.0
+MAX_RETRIES = 8
 
 LOCK_FILE = os.path.join(tempfile.gettempdir(), "sync_drive_advanced.lock")
 LOG_FILE = f"sync_log_{datetime.now().strftime('%Y%m%d_%H%M%S')}.txt"
@@ -46,6 +73,8 @@ def log_message(msg):
     timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
     line = f"[{timestamp}] {msg}"
     print(line)
+    if not LOG_FILE:
+        return
     with open(LOG_FILE, "a", encoding="utf-8") as f:
         f.write(line + "\n")
 
@@ -64,14 +93,16 @@ def setup_lock():
 
 # ============ Database Manager ============
 class DatabaseManager:
-    def __init__(self, use_mysql=False):
+    def __init__(self, use_mysql=False, db_path=None):
         self.use_mysql = use_mysql
         if use_mysql:
             import pymysql
             self.conn = pymysql.connect(**MYSQL_CONFIG)
         else:
             import sqlite3
-            self.conn = sqlite3.connect(DB_PATH)
+            self.conn = sqlite3.connect(db_path or DB_PATH)
+            # INSERT OR REPLACE harus memicu trigger delete agar files_fts tetap sinkron
+            self.conn.execute("PRAGMA recursive_triggers = ON")
 
     def execute(self, query, params=()):
         cursor = self.conn.cursor()
@@ -155,6 +186,40 @@ class DatabaseManager:
         q = f"DELETE FROM files WHERE id IN ({placeholders})"
         self.execute(q, list(ids_to_delete))
 
+    # --- Dipakai sync inkremental (SQLite) ---
+    def get_item(self, file_id):
+        """(is_directory, root_folder_name) atau None"""
+        return self.execute(
+            "SELECT is_directory, root_folder_name FROM files WHERE id = ?", (file_id,)
+        ).fetchone()
+
+    def folder_root(self, folder_id):
+        """root_folder_name folder yang sudah ada di DB, None jika bukan folder katalog"""
+        row = self.execute(
+            "SELECT root_folder_name FROM files WHERE id = ? AND is_directory = 1", (folder_id,)
+        ).fetchone()
+        return row[0] if row else None
+
+    def delete_subtree(self, file_id):
+        """Hapus item beserta seluruh isinya (lewat parent_id). Return jumlah baris."""
+        # CTE di dalam subquery: statement diawali WITH membuat rowcount = -1
+        return self.execute(
+            "DELETE FROM files WHERE id IN ("
+            "  WITH RECURSIVE subtree(id) AS ("
+            "    SELECT ? UNION SELECT f.id FROM files f JOIN subtree s ON f.parent_id = s.id"
+            "  ) SELECT id FROM subtree)", (file_id,)
+        ).rowcount
+
+    def set_subtree_root(self, folder_id, root_name):
+        """Folder dipindah ke root lain: root_folder_name seluruh isinya ikut diganti"""
+        return self.execute(
+            "UPDATE files SET root_folder_name = ? WHERE id IN ("
+            "  WITH RECURSIVE subtree(id) AS ("
+            "    SELECT id FROM files WHERE parent_id = ?"
+            "    UNION SELECT f.id FROM files f JOIN subtree s ON f.parent_id = s.id"
+            "  ) SELECT id FROM subtree)", (root_name, folder_id)
+        ).rowcount
+
 # ============ Google Drive ============
 def get_credentials():
     from google.oauth2.service_account import Credentials as SAC
@@ -164,66 +229,312 @@ def get_credentials():
     log_message("✅ Service Account berhasil dimuat.")
     return creds
 
-def list_files_recursive(service, folder_id, root_name, current_parent_id):
-    items = []
-    page_token = None
-    query = f"'{folder_id}' in parents"
-
+def build_service():
+    """
+    Factory service Drive per thread. googleapiclient (httplib2) tidak
+    thread-safe, jadi tiap worker traversal memakai service sendiri;
+    kredensial dimuat sekali.
+    """
+    from googleapiclient.discovery import build
+    creds = get_credentials()
+    local = threading.local()
+
+    def service():
+        if not hasattr(local, 'service'):
+            local.service = build('drive', 'v3', credentials=creds, cache_discovery=False)
+        return local.service
+    return service
+
+def _service(service):
+    """Service untuk thread ini: `service` boleh objek service atau factory build_service()"""
+    return service() if callable(service) else service
+
+def make_entry(item, root_name, default_parent=None):
+    """Baris tabel files dari resource file Drive"""
+    parents = item.get('parents') or [default_parent]
+    is_dir = item['mimeType'] == FOLDER_MIME
+    return {
+        'id': item['id'],
+        'name': item['name'],
+        'modified_time': item['modifiedTime'],
+        'parent_id': parents[0],
+        'root_folder_name': root_name,
+        'is_directory': 1 if is_dir else 0,
+        'mime_type': item.get('mimeType', '')
+    }
+
+# ============ Traversal paralel ============
+def _http_status(error):
+    # googleapiclient.errors.HttpError: error.resp.status
+    resp = getattr(error, 'resp', None)
+    status = getattr(resp, 'status', None) or getattr(error, 'status_code', None)
+    return int(status) if status else None
+
+def _is_rate_limited(error):
+    """429, atau 403 dengan reason kuota (403 lain = izin, tidak di-retry)"""
+    status = _http_status(error)
+    if status == 429:
+        return True
+    if status == 403:
+        detail = f"{error} {getattr(error, 'content', b'')!r}"
+        return any(reason in detail for reason in RATE_LIMIT_REASONS)
+    return False
+
+class QuotaBackoff:
+    """
+    Jeda bersama semua worker: satu respons 403/429 menunda panggilan
+    berikutnya dari seluruh pool (exponential backoff + jitter), bukan hanya
+    thread yang kena, agar kuota per user tidak terus dilanggar.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._resume_at = 0.0
+        self.retries = 0
+
+    def wait(self):
+        delay = self._resume_at - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+
+    def penalize(self, attempt):
+        cap = min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt)
+        delay = cap / 2 + random.uniform(0, cap / 2)
+        with self._lock:
+            self.retries += 1
+            self._resume_at = max(self._resume_at, time.monotonic() + delay)
+
+    def execute(self, request):
+        """request() -> HttpRequest; execute() dengan retry saat kuota habis"""
+        for attempt in range(MAX_RETRIES + 1):
+            self.wait()
+            try:
+                return request().execute()
+            except Exception as e:
+                if attempt == MAX_RETRIES or not _is_rate_limited(e):
+                    raise
+                self.penalize(attempt)
+
+def _list_page(service, backoff, folder_id, page_token):
+    # Item di trash tetap dikembalikan files.list tanpa filter trashed
+    return backoff.execute(lambda: _service(service).files().list(
+        q=f"'{folder_id}' in parents and trashed = false",
+        fields=f"nextPageToken, files({FILE_FIELDS})",
+        pageToken=page_token,
+        pageSize=LIST_PAGE_SIZE
+    ))
+
+def walk_folders(service, folders, concurrency=None, backoff=None):
+    """
+    Traversal BFS iteratif (tanpa rekursi) isi `folders` = [(folder_id,
+    root_name)]. Halaman files.list dari banyak folder diambil paralel oleh
+    thread pool (maks `concurrency`); halaman lanjutan satu folder tetap
+    berurutan karena butuh nextPageToken. Yield list baris per halaman begitu
+    halaman selesai, jadi penulis DB tidak menunggu seluruh pohon.
+    """
+    backoff = backoff or QuotaBackoff()
+    pool = ThreadPoolExecutor(max_workers=concurrency or SYNC_CONCURRENCY, thread_name_prefix='drive-list')
+    try:
+        running = {
+            pool.submit(_list_page, service, backoff, folder_id, None): (folder_id, root_name)
+            for folder_id, root_name in folders
+        }
+        while running:
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                folder_id, root_name = running.pop(future)
+                res = future.result()
+                entries = [make_entry(item, root_name, folder_id) for item in res.get('files', [])]
+                if res.get('nextPageToken'):
+                    running[pool.submit(_list_page, service, backoff, folder_id, res['nextPageToken'])] = (folder_id, root_name)
+                for entry in entries:
+                    if entry['is_directory']:
+                        running[pool.submit(_list_page, service, backoff, entry['id'], None)] = (entry['id'], root_name)
+                yield entries
+    finally:
+        # Error / generator ditutup lebih awal: batalkan halaman yang belum jalan
+        pool.shutdown(wait=True, cancel_futures=True)
+
+# ============ Changes feed (inkremental) ============
+class ChangesTokenExpired(Exception):
+    """startPageToken tersimpan ditolak Drive; perlu rescan penuh"""
+
+def get_start_page_token(service, backoff=None):
+    backoff = backoff or QuotaBackoff()
+    return backoff.execute(lambda: _service(service).changes().getStartPageToken())['startPageToken']
+
+def fetch_changes(service, page_token, backoff=None):
+    """Semua perubahan sejak page_token. Return (changes, newStartPageToken)."""
+    backoff = backoff or QuotaBackoff()
+    changes = []
     while True:
-        res = service.files().list(
-            q=query,
-            fields="nextPageToken, files(id, name, mimeType, modifiedTime, parents)",
-            pageToken=page_token,
-            pageSize=1000
-        ).execute()
-
-        for item in res.get('files', []):
-            parents = item.get('parents', [folder_id])
-            actual_parent = parents[0]
-            is_dir = item['mimeType'] == 'application/vnd.google-apps.folder'
-
-            entry = {
-                'id': item['id'],
-                'name': item['name'],
-                'modified_time': item['modifiedTime'],
-                'parent_id': actual_parent,
-                'root_folder_name': root_name,
-                'is_directory': 1 if is_dir else 0,
-                'mime_type': item.get('mimeType', '')
-            }
-
-            items.append(entry)
-
-            if is_dir:
-                items.extend(list_files_recursive(service, item['id'], root_name, actual_parent))
-
-        page_token = res.get('nextPageToken')
-        if not page_token:
-            break
-
-    return items
-
-def get_drive_files(service):
-    log_message("📥 Memindai 4 folder target di Google Drive...")
-    all_items = []
+        try:
+            res = backoff.execute(lambda: _service(service).changes().list(
+                pageToken=page_token,
+                pageSize=CHANGES_PAGE_SIZE,
+                includeRemoved=True,
+                spaces='drive',
+                fields=f"nextPageToken, newStartPageToken, changes(fileId, removed, file({FILE_FIELDS}))"
+            ))
+        except Exception as e:
+            if _http_status(e) in TOKEN_EXPIRED_STATUSES:
+                raise ChangesTokenExpired(str(e)) from e
+            raise
+        changes.extend(res.get('changes', []))
+        if res.get('newStartPageToken'):
+            return changes, res['newStartPageToken']
+        page_token = res['nextPageToken']
+
+def apply_changes(db, service, changes, roots=None, backoff=None):
+    """
+    Terapkan changes feed ke tabel files. Hanya item di bawah folder target
+    yang disimpan; root item ditentukan dari parent (root target, folder lain
+    di batch ini, atau folder yang sudah ada di DB). Isi folder yang dipindah
+    masuk didaftar lewat files.list; anak yang juga punya entri di batch ini
+    mengikuti entri feed-nya, bukan hasil listing. Return Counter statistik.
+    """
+    root_by_id = {folder_id: key for key, folder_id in (roots or TARGET_FOLDERS).items()}
+    stats = Counter()
+
+    # Satu item bisa muncul berkali-kali di feed; yang berlaku perubahan terakhir
+    latest = {}
+    for change in changes:
+        latest[change['fileId']] = change
+
+    pending = {}
+    for file_id, change in latest.items():
+        if file_id in root_by_id:
+            continue
+        item = change.get('file')
+        if change.get('removed') or not item or item.get('trashed'):
+            stats['deleted'] += db.delete_subtree(file_id)
+        else:
+            pending[file_id] = item
+
+    resolved = {}
+    outside = []
+    progress = True
+    while pending and progress:
+        progress = False
+        for file_id, item in list(pending.items()):
+            parent = (item.get('parents') or [None])[0]
+            if parent in pending:
+                continue  # tunggu parent (folder baru/pindah di batch yang sama)
+            progress = True
+            del pending[file_id]
+            if parent in root_by_id:
+                root = root_by_id[parent]
+            elif parent in resolved:
+                root = resolved[parent]
+            else:
+                root = db.folder_root(parent)
+            if root is None:
+                outside.append(file_id)
+                continue
+
+            previous = db.get_item(file_id)
+            entry = make_entry(item, root)
+            db.insert_or_update(entry)
+            stats['updated'] += 1
+            if not entry['is_directory']:
+                continue
+            resolved[file_id] = root
+            if previous is None:
+                # Folder baru atau dipindah masuk dari luar target: isinya
+                # tidak muncul di feed, jadi didaftar sekali
+                for entries in walk_folders(service, [(file_id, root)], backoff=backoff):
+                    for child in entries:
+                        if child['id'] in latest:
+                            continue  # dihapus/dipindah/diperbarui oleh entri feed-nya sendiri
+                        db.insert_or_update(child)
+                        stats['listed'] += 1
+            elif previous[1] != root:
+                stats['moved'] += db.set_subtree_root(file_id, root)
+
+    # Parent di luar folder target (dipindah keluar) atau siklus parent
+    for file_id in outside + list(pending):
+        stats['deleted'] += db.delete_subtree(file_id)
+    return stats
+
+# ============ Mode sync ============
+def sync_full(db, service):
+    """Rescan penuh semua folder target. Return (startPageToken, statistik)."""
+    backoff = QuotaBackoff()
+    # Token diambil sebelum scan: perubahan selama scan ikut run berikutnya
+    token = get_start_page_token(service, backoff)
+    log_message(f"📥 Memindai {len(TARGET_FOLDERS)} folder target di Google Drive "
+                f"({SYNC_CONCURRENCY} paralel)...")
     drive_ids = set()
+    per_root = Counter()
+
+    # Baris ditulis begitu halamannya tiba (koneksi DB hanya dipakai thread ini)
+    for entries in walk_folders(service, [(folder_id, key) for key, folder_id in TARGET_FOLDERS.items()],
+                                backoff=backoff):
+        for item in entries:
+            if item['id'] in drive_ids:
+                log_message(f"⚠️ Duplikat ID: {item['id']}")
+                continue
+            drive_ids.add(item['id'])
+            per_root[item['root_folder_name']] += 1
+            db.insert_or_update(item)
 
-    for key, folder_id in TARGET_FOLDERS.items():
-        log_message(f"  → Folder: {key}")
-        items = list_files_recursive(service, folder_id, key, folder_id)
-        log_message(f"    ➤ {len(items)} item ditemukan (file + folder)")
-        for it in items:
-            if it['id'] not in drive_ids:
-                drive_ids.add(it['id'])
-                all_items.append(it)
-            else:
-                log_message(f"⚠️ Duplikat ID: {it['id']}")
+    for key in TARGET_FOLDERS:
+        log_message(f"  → Folder: {key} ➤ {per_root[key]} item ditemukan (file + folder)")
+    log_message(f"✅ Total item unik: {len(drive_ids)} ({backoff.retries} retry kuota)")
+
+    db_ids = db.get_all_ids()
+    to_delete = db_ids - drive_ids
+    db.delete_by_ids(to_delete)
+    return token, Counter(updated=len(drive_ids), deleted=len(to_delete))
+
+def sync_incremental(db, service):
+    """Terapkan changes sejak token tersimpan; rescan penuh jika token tidak ada/kedaluwarsa"""
+    token = get_sync_state(db.conn, START_TOKEN_KEY)
+    if token is None:
+        log_message("ℹ️  Belum ada token changes, rescan penuh.")
+        return sync_full(db, service)
+    backoff = QuotaBackoff()
+    try:
+        changes, new_token = fetch_changes(service, token, backoff)
+    except ChangesTokenExpired as e:
+        log_message(f"⚠️ Token changes kedaluwarsa ({e}), rescan penuh.")
+        return sync_full(db, service)
+    log_message(f"🔁 {len(changes)} perubahan sejak token {token}")
+    return new_token, apply_changes(db, service, changes, backoff=backoff)
+
+def sync_all(full=False, service=None, db=None):
+    """
+    Sinkronkan katalog. Inkremental kecuali full=True atau MySQL (token
+    changes disimpan di sync_state katalog SQLite). Return Counter statistik.
+    """
+    own_db = db is None
+    db = db or DatabaseManager(use_mysql=USE_MYSQL)
+    try:
+        db.create_table()
+        if not db.use_mysql:
+            applied = migrate(db.conn)
+            if applied:
+                log_message(f"🗂️  Migrasi skema katalog diterapkan: {applied}")
+
+        service = service or build_service()
+        if full or db.use_mysql:
+            token, stats = sync_full(db, service)
+        else:
+            token, stats = sync_incremental(db, service)
 
-    log_message(f"✅ Total item unik: {len(all_items)}")
-    return all_items, drive_ids
+        if not db.use_mysql:
+            # Token & baris katalog di-commit dalam satu transaksi
+            set_sync_state(db.conn, START_TOKEN_KEY, token)
+            refresh_root_summary(db.conn, TARGET_FOLDERS, DISPLAY_NAMES)
+        db.commit()
+        return stats
+    finally:
+        if own_db:
+            db.close()
 
 # ============ Main ============
-def main():
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
     start_time = time.time()
     log_message("="*50)
     log_message("🚀 Memulai sinkronisasi dua arah Google Drive...")
@@ -231,29 +542,8 @@ def main():
     setup_lock()
 
     try:
-        db = DatabaseManager(use_mysql=USE_MYSQL)
-        db.create_table()
-
-        from googleapiclient.discovery import build
-        creds = get_credentials()
-        service = build('drive', 'v3', credentials=creds)
-
-        drive_items, drive_ids = get_drive_files(service)
-
-        log_message("💾 Menyinkronkan ke database...")
-        for item in drive_items:
-            db.insert_or_update(item)
-
-        db_ids = db.get_all_ids()
-        to_delete = db_ids - drive_ids
-        db.delete_by_ids(to_delete)
-
-        db.commit()
-        db.close()
-
-        updated = len(drive_items)
-        deleted = len(to_delete)
-        log_message(f"📊 Ringkasan: {updated} item disinkron, {deleted} dihapus dari DB.")
+        stats = sync_all(full='--full' in argv)
+        log_message(f"📊 Ringkasan: {stats['updated']} item disinkron, {stats['deleted']} dihapus dari DB.")
         log_message(f"⏱️  Selesai dalam {time.time() - start_time:.1f} detik.")
         log_message("🎉 Sinkronisasi dua arah berhasil!")
 
@@ -262,4 +552,4 @@ def main():
         sys.exit(1)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
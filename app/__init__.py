@@ -7,8 +7,16 @@ from flask_limiter.util import get_remote_address
 
 load_dotenv()
 
-def create_app():
+def create_app(config=None):
+    """
+    Application factory. `config` (dict) menimpa konfigurasi default sebelum
+    path turunan (session, rate limit, epoch akses) dihitung, mis. untuk test.
+    """
     app = Flask(__name__)
+    # Part file upload bukti transfer ditulis streaming (app/upload_pipeline.py);
+    # hook-nya harus terdaftar sebelum CSRFProtect membaca request.form
+    from . import upload_pipeline
+    upload_pipeline.init_app(app)
 
     # Environment detection
     is_development = os.getenv('FLASK_ENV') == 'development' or app.config.get('DEBUG', False)
@@ -39,6 +47,23 @@ def create_app():
     app.config['UPLOAD_FOLDER'] = upload_folder
     app.config['MAX_CONTENT_LENGTH'] = 8 * 1024 * 1024  # 8 MB
 
+    if config:
+        app.config.update(config)
+    instance_dir = os.path.dirname(app.config['UPLOAD_FOLDER'])
+
+    # File penanda revokasi akses dokumen, dibagi antar worker gunicorn
+    app.config.setdefault('ACCESS_EPOCH_FILE', os.path.join(instance_dir, 'access_epoch'))
+
+    # Counter rate limit dibagi antar worker gunicorn lewat SQLite WAL (lihat app/ratelimit_storage.py)
+    ratelimit_db = os.path.join(instance_dir, 'ratelimit.db')
+    app.config.setdefault('RATELIMIT_STORAGE_URI', os.getenv('RATELIMIT_STORAGE_URI', f'sqlite://{ratelimit_db}'))
+
+    # Session server-side (cookie hanya berisi id session bertanda tangan)
+    from .session_store import SQLiteSessionInterface
+    app.config.setdefault('SESSION_STORE_PATH', os.getenv(
+        'SESSION_STORE_PATH', os.path.join(instance_dir, 'sessions.db')))
+    app.session_interface = SQLiteSessionInterface(app.config['SESSION_STORE_PATH'])
+
     # API Keys Configuration (for offline/API access without CSRF)
     api_keys = os.getenv('API_KEYS', 'offline-dev-key-123').split(',')
     app.config['VALID_API_KEYS'] = [key.strip() for key in api_keys]
@@ -46,7 +71,7 @@ def create_app():
 
     # CSRF Protection - can be disabled with WTF_CSRF_ENABLED=False
     csrf_enabled = os.getenv('WTF_CSRF_ENABLED', 'True').lower() != 'false'
-    app.config['WTF_CSRF_ENABLED'] = csrf_enabled
+    csrf_enabled = app.config.setdefault('WTF_CSRF_ENABLED', csrf_enabled)
     
     if csrf_enabled:
         print("✅ CSRF Protection: ENABLED")
@@ -78,7 +103,16 @@ def create_app():
         except Exception as e:
             print(f"Warning: Could not create upload folder: {e}")
 
-        db.create_all()
+        # create_all tidak menambah kolom/index ke tabel yang sudah ada; keduanya
+        # dijalankan di bawah satu lock tulis agar aman untuk worker paralel
+        from .schema import migrate
+        migrate(db.engine, db.metadata)
+
+    # Index katalog Dokumen Bengkel (idempotent, versi dicatat di database katalog).
+    # CATALOG_MIGRATE_ON_START=0: katalog dimigrasi terpisah saat deploy
+    from .documents_handler import catalog_schema, ensure_catalog_schema
+    if catalog_schema.MIGRATE_ON_START:
+        ensure_catalog_schema()
 
     # CSP Configuration based on environment
     @app.after_request
@@ -106,7 +140,19 @@ def create_app():
     from .routes import main
     app.register_blueprint(main)
 
+    # Worker thumbnail bukti transfer (THUMBNAIL_WORKER=off jika dijalankan sebagai proses terpisah).
+    # Dimulai saat request pertama di setiap worker web: CLI (add_admin.py, python -m app.*)
+    # yang juga memanggil create_app tidak pernah melayani request
+    if os.getenv('THUMBNAIL_WORKER', 'thread') == 'thread':
+        from .thumbnails import start_worker_thread
+
+        @app.before_request
+        def ensure_thumbnail_worker():
+            start_worker_thread(app)
+
     # Setup scheduler untuk auto-sync Google Drive
+    if app.testing:
+        return app
     try:
         from .drive_sync import setup_scheduler
         scheduler = setup_scheduler()
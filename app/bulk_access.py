@@ -0,0 +1,67 @@
+"""
+Operasi akses massal untuk grup/batch peserta.
+
+Semua perubahan dijalankan sebagai satu UPDATE berbasis set dalam satu
+transaksi (tanpa memuat objek Peserta satu per satu), mengembalikan jumlah
+baris yang terpengaruh, lalu membatalkan cache akses.
+"""
+
+from datetime import datetime
+
+from .models import db, Peserta, DocumentAccess
+
+
+def set_batch_workshop_access(batch, enabled):
+    """Set flag default grup dan akses_workshop semua anggotanya. Return jumlah peserta."""
+    try:
+        batch.akses_workshop_default = enabled
+        affected = Peserta.query.filter(
+            Peserta.batch_id == batch.id
+        ).update(
+            {Peserta.akses_workshop: enabled},
+            synchronize_session=False
+        )
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    return affected
+
+
+def grant_batch_document_access(batch, grant, tanggal_kadaluarsa=None, catatan='', dibuat_oleh='unknown'):
+    """
+    Upsert akses dokumen grup untuk batch dalam satu transaksi.
+    Return jumlah peserta anggota batch yang terpengaruh.
+    """
+    from .document_access import bump_access_epoch
+
+    try:
+        existing = DocumentAccess.query.filter_by(
+            batch_id=batch.id,
+            tipe_akses='group'
+        ).first()
+
+        if existing:
+            existing.akses_diberikan = grant
+            existing.tanggal_kadaluarsa = tanggal_kadaluarsa
+            existing.catatan = catatan
+            existing.tanggal_diubah = datetime.utcnow()
+        else:
+            db.session.add(DocumentAccess(
+                tipe_akses='group',
+                batch_id=batch.id,
+                akses_diberikan=grant,
+                tanggal_kadaluarsa=tanggal_kadaluarsa,
+                catatan=catatan,
+                dibuat_oleh=dibuat_oleh
+            ))
+
+        affected = Peserta.query.filter(Peserta.batch_id == batch.id).count()
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+    # Akses grup berlaku untuk semua anggota batch: revokasi global
+    bump_access_epoch()
+    return affected
@@ -0,0 +1,386 @@
+"""
+Import massal peserta dari CSV (cohort baru dari spreadsheet).
+
+Alur per potongan IMPORT_CHUNK_SIZE baris:
+  1. validasi streaming baris demi baris (file tidak dimuat utuh ke memori)
+  2. cek duplikat WhatsApp ke index unik dengan satu query IN
+  3. hash password awal paralel di pool bulk layanan hashing
+     (IMPORT_HASH_WORKERS proses, terpisah dari pool login)
+  4. INSERT executemany dalam satu transaksi per potongan
+
+Dari halaman admin import berjalan sebagai job background: file upload
+disimpan di instance/imports, baris ImportJob mencatat status & progres, dan
+thread di worker yang menerima upload menjalankan import. Request upload
+langsung kembali (202) sehingga cohort ribuan baris tidak melewati timeout
+gunicorn; admin mem-polling GET /admin/peserta/import/<id>. Password awal
+yang dibuat tidak pernah disimpan di database: job menulisnya ke file
+sementara (0600) yang hanya bisa diunduh dengan token dari respons upload,
+dan file itu dihapus IMPORT_CREDENTIALS_TTL detik setelah job selesai.
+
+Kolom CSV: nama, whatsapp, email, alamat, nama_bengkel, alamat_bengkel,
+status_pekerjaan, batch, password. Hanya nama & whatsapp yang wajib;
+password kosong diganti password acak yang dikembalikan di `credentials`.
+
+CLI:
+    python -m app.bulk_import peserta.csv [--batch NAMA] [--credentials out.csv]
+    python -m app.bulk_import --generate 5000 contoh.csv
+"""
+
+import csv
+import hashlib
+import json
+import os
+import secrets
+import string
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import update
+
+from .models import db, Peserta, Batch, ImportJob
+from .security import validate_password_strength
+from .password_hashing import get_hasher
+
+IMPORT_CHUNK_SIZE = 1000
+IMPORT_MAX_ERRORS = 500
+IMPORT_JOB_CHUNK_SIZE = 100  # job background melaporkan progres per potongan ini
+# Job "antri"/"proses" tanpa progres selama ini dianggap mati (worker di-restart)
+IMPORT_STALE_SECONDS = 600
+# File password awal hasil job dihapus setelah ini (detik)
+IMPORT_CREDENTIALS_TTL = 1800
+
+IMPORT_COLUMNS = [
+    'nama', 'whatsapp', 'email', 'alamat', 'nama_bengkel', 'alamat_bengkel',
+    'status_pekerjaan', 'batch', 'password',
+]
+
+# Panjang maksimum sesuai kolom model Peserta
+_MAX_LENGTH = {
+    'nama': 100, 'email': 100, 'alamat': 255, 'nama_bengkel': 100,
+    'alamat_bengkel': 255, 'status_pekerjaan': 50, 'batch': 50,
+}
+
+
+def generate_initial_password(length=10):
+    """Password acak yang lolos validate_password_strength"""
+    alphabet = string.ascii_letters + string.digits
+    while True:
+        password = ''.join(secrets.choice(alphabet) for _ in range(length))
+        if validate_password_strength(password)[0]:
+            return password
+
+
+def validate_row(row, default_batch):
+    """Return (values, error). values berisi kolom Peserta + 'password'."""
+    values = {key: (row.get(key) or '').strip() for key in IMPORT_COLUMNS}
+    if not values['nama']:
+        return None, 'nama wajib diisi'
+    wa = values['whatsapp']
+    if len(wa) < 10 or len(wa) > 15 or not wa.isdigit():
+        return None, 'Format nomor WhatsApp tidak valid'
+    for key, max_length in _MAX_LENGTH.items():
+        if len(values[key]) > max_length:
+            return None, f'{key} terlalu panjang (max {max_length} chars)'
+    if values['password']:
+        is_valid, message = validate_password_strength(values['password'])
+        if not is_valid:
+            return None, message
+    values['batch'] = values['batch'] or default_batch
+    return values, None
+
+
+class ImportResult:
+    def __init__(self):
+        self.total = 0
+        self.inserted = 0
+        self.errors = []
+        self.credentials = []
+        self.seconds = 0.0
+
+    def error(self, line, whatsapp, message):
+        if len(self.errors) < IMPORT_MAX_ERRORS:
+            self.errors.append({'baris': line, 'whatsapp': whatsapp, 'error': message})
+
+    def to_dict(self):
+        return {
+            'total': self.total,
+            'inserted': self.inserted,
+            'failed': self.total - self.inserted,
+            'seconds': round(self.seconds, 2),
+            'rows_per_second': round(self.inserted / self.seconds, 1) if self.seconds else 0,
+            'errors': self.errors,
+            'credentials': self.credentials,
+        }
+
+
+def _insert_chunk(chunk, batch_ids, result):
+    """Cek duplikat ke database, hash password paralel, lalu executemany"""
+    from .peserta_search import fts_available, index_rows
+
+    existing = {
+        wa for (wa,) in db.session.query(Peserta.whatsapp)
+        .filter(Peserta.whatsapp.in_([values['whatsapp'] for _, values in chunk]))
+    }
+    pending = []
+    for line, values in chunk:
+        if values['whatsapp'] in existing:
+            result.error(line, values['whatsapp'], 'Nomor WhatsApp sudah terdaftar')
+        else:
+            pending.append(values)
+    if not pending:
+        return
+
+    generated = {}
+    for values in pending:
+        if not values['password']:
+            values['password'] = generated[values['whatsapp']] = generate_initial_password()
+    hashes = get_hasher().hash_many(v['password'] for v in pending)
+
+    rows = []
+    for values, password_hash in zip(pending, hashes):
+        row = {key: values[key] or None for key in IMPORT_COLUMNS if key != 'password'}
+        row['batch'] = values['batch']
+        row['batch_id'] = batch_ids.get(values['batch'])
+        row['password_hash'] = password_hash
+        rows.append(row)
+
+    try:
+        db.session.execute(Peserta.__table__.insert(), rows)
+        # Insert lewat Core tidak memicu event mapper: index pencarian diisi di sini
+        conn = db.session.connection()
+        if fts_available(conn):
+            index_rows(conn, db.session.query(
+                Peserta.id, Peserta.nama, Peserta.whatsapp, Peserta.email, Peserta.nama_bengkel
+            ).filter(Peserta.whatsapp.in_([row['whatsapp'] for row in rows])).all())
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        for values in pending:
+            result.error(None, values['whatsapp'], f'Gagal disimpan: {e}')
+        return
+
+    result.inserted += len(rows)
+    result.credentials.extend({'whatsapp': wa, 'password': pw} for wa, pw in generated.items())
+
+
+def import_peserta(lines, default_batch='Batch Baru', chunk_size=IMPORT_CHUNK_SIZE, progress=None):
+    """
+    Import dari iterable baris teks CSV (file terbuka / stream request).
+    `progress(result)` dipanggil setelah setiap potongan disimpan.
+    Return ImportResult.
+    """
+    from .stats import invalidate_stats
+
+    result = ImportResult()
+    start = time.perf_counter()
+    batch_ids = dict(db.session.query(Batch.nama, Batch.id).all())
+    seen = set()
+    chunk = []
+
+    reader = csv.DictReader(lines)
+    if not reader.fieldnames or not {'nama', 'whatsapp'} <= {f.strip() for f in reader.fieldnames}:
+        result.error(1, None, 'Header CSV wajib memuat kolom nama dan whatsapp')
+        return result
+
+    for row in reader:
+        result.total += 1
+        line = reader.line_num
+        values, error = validate_row({(k or '').strip(): v for k, v in row.items()}, default_batch)
+        if error:
+            result.error(line, (row.get('whatsapp') or '').strip(), error)
+            continue
+        if values['whatsapp'] in seen:
+            result.error(line, values['whatsapp'], 'Nomor WhatsApp duplikat di file')
+            continue
+        seen.add(values['whatsapp'])
+        chunk.append((line, values))
+        if len(chunk) >= chunk_size:
+            _insert_chunk(chunk, batch_ids, result)
+            chunk = []
+            if progress:
+                progress(result)
+    if chunk:
+        _insert_chunk(chunk, batch_ids, result)
+
+    invalidate_stats()
+    result.seconds = time.perf_counter() - start
+    return result
+
+
+# ===== JOB BACKGROUND =====
+def _update_job(job_id, **values):
+    values['diperbarui'] = datetime.utcnow()
+    db.session.execute(update(ImportJob).where(ImportJob.id == job_id).values(**values))
+    db.session.commit()
+
+
+def _imports_folder(app):
+    return os.path.join(os.path.dirname(app.config['UPLOAD_FOLDER']), 'imports')
+
+
+def _credentials_path(folder, job_id, token):
+    # Nama file memuat hash token: tanpa token dari respons upload file tidak bisa ditemukan
+    digest = hashlib.sha256(token.encode()).hexdigest()
+    return os.path.join(folder, f'kredensial-{job_id}-{digest}.csv')
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def _write_credentials(path, credentials):
+    with os.fdopen(os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600), 'w',
+                   newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=['whatsapp', 'password'])
+        writer.writeheader()
+        writer.writerows(credentials)
+    timer = threading.Timer(IMPORT_CREDENTIALS_TTL, _remove, args=(path,))
+    timer.daemon = True
+    timer.start()
+
+
+def sweep_credentials(app):
+    """Hapus file password awal yang melewati TTL (mis. timer hilang karena worker di-restart)"""
+    cutoff = time.time() - IMPORT_CREDENTIALS_TTL
+    try:
+        entries = list(os.scandir(_imports_folder(app)))
+    except FileNotFoundError:
+        return
+    for entry in entries:
+        if entry.name.startswith('kredensial-') and entry.stat().st_mtime < cutoff:
+            _remove(entry.path)
+
+
+def credentials_file(app, job_id, token):
+    """Path file password awal job, atau None jika token salah / sudah kedaluwarsa"""
+    sweep_credentials(app)
+    path = _credentials_path(_imports_folder(app), job_id, token)
+    return path if os.path.isfile(path) else None
+
+
+def _run_job(app, job_id, path, default_batch, token):
+    with app.app_context():
+        try:
+            _update_job(job_id, status='proses')
+            with open(path, newline='', encoding='utf-8-sig') as f:
+                result = import_peserta(
+                    f, default_batch, chunk_size=IMPORT_JOB_CHUNK_SIZE,
+                    progress=lambda r: _update_job(job_id, diproses=r.total, berhasil=r.inserted)
+                ).to_dict()
+            # Password awal hanya ke file sementara; database hanya mencatat jumlahnya
+            credentials = result.pop('credentials')
+            result['generated_passwords'] = len(credentials)
+            if credentials:
+                _write_credentials(_credentials_path(os.path.dirname(path), job_id, token), credentials)
+            _update_job(job_id, status='selesai', diproses=result['total'], berhasil=result['inserted'],
+                        hasil=json.dumps(result))
+            print(f"✅ Import peserta #{job_id}: {result['inserted']}/{result['total']} baris, "
+                  f"{result['rows_per_second']} baris/detik")
+        except Exception as e:
+            db.session.rollback()
+            _update_job(job_id, status='gagal', error=str(e))
+            print(f"❌ Import peserta #{job_id} gagal: {e}")
+        finally:
+            db.session.remove()
+            _remove(path)
+
+
+def start_import_job(app, stream, nama_file, default_batch='Batch Baru'):
+    """
+    Simpan upload CSV ke instance/imports, catat ImportJob, lalu jalankan
+    import di thread background. Return (ImportJob, token unduh password awal).
+    """
+    folder = _imports_folder(app)
+    os.makedirs(folder, exist_ok=True)
+    sweep_credentials(app)
+    fd, path = tempfile.mkstemp(suffix='.csv', dir=folder)
+    lines = 0
+    last = b'\n'
+    with os.fdopen(fd, 'wb') as f:
+        for block in iter(lambda: stream.read(64 * 1024), b''):
+            f.write(block)
+            lines += block.count(b'\n')
+            last = block[-1:]
+    lines += last != b'\n'
+
+    job = ImportJob(nama_file=nama_file, perkiraan_baris=max(0, lines - 1))
+    db.session.add(job)
+    db.session.commit()
+    token = secrets.token_urlsafe(32)
+    threading.Thread(
+        target=_run_job, args=(app, job.id, path, default_batch, token), name=f'import-{job.id}', daemon=True
+    ).start()
+    return job, token
+
+
+def job_status(job):
+    """Status job untuk polling admin (tanpa password awal; lihat credentials_file)"""
+    status, error = job.status, job.error
+    if status in ('antri', 'proses') and job.diperbarui < datetime.utcnow() - timedelta(seconds=IMPORT_STALE_SECONDS):
+        status, error = 'gagal', 'Job berhenti tanpa progres (worker di-restart?)'
+    data = {
+        'id': job.id,
+        'status': status,
+        'nama_file': job.nama_file,
+        'perkiraan_baris': job.perkiraan_baris,
+        'diproses': job.diproses,
+        'berhasil': job.berhasil,
+        'error': error,
+        'hasil': json.loads(job.hasil) if job.hasil else None,
+    }
+    return data
+
+
+def _generate_csv(path, count):
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(['nama', 'whatsapp', 'email', 'nama_bengkel', 'batch'])
+        for i in range(count):
+            writer.writerow([f'Peserta Import {i}', f'0857{i:08d}', f'import{i}@example.com',
+                             f'Bengkel {i % 300}', ''])
+    print(f"✅ {count} baris contoh ditulis ke {path}")
+
+
+def main(argv):
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Import massal peserta dari CSV')
+    parser.add_argument('csv_path')
+    parser.add_argument('--batch', default='Batch Baru', help='Batch default untuk kolom batch kosong')
+    parser.add_argument('--credentials', help='Tulis password awal yang dibuat ke file CSV ini')
+    parser.add_argument('--generate', type=int, metavar='N', help='Buat file CSV contoh berisi N baris lalu keluar')
+    args = parser.parse_args(argv)
+
+    if args.generate:
+        _generate_csv(args.csv_path, args.generate)
+        return 0
+
+    from app import create_app
+    app = create_app()
+    with app.app_context(), open(args.csv_path, newline='', encoding='utf-8-sig') as f:
+        result = import_peserta(f, args.batch).to_dict()
+
+    print(f"✅ {result['inserted']}/{result['total']} peserta diimport dalam {result['seconds']} detik "
+          f"({result['rows_per_second']} baris/detik)")
+    for error in result['errors']:
+        print(f"❌ Baris {error['baris']} ({error['whatsapp']}): {error['error']}")
+    if result['credentials']:
+        if args.credentials:
+            with open(args.credentials, 'w', newline='', encoding='utf-8') as f:
+                writer = csv.DictWriter(f, fieldnames=['whatsapp', 'password'])
+                writer.writeheader()
+                writer.writerows(result['credentials'])
+            print(f"🔑 {len(result['credentials'])} password awal ditulis ke {args.credentials}")
+        else:
+            print(f"⚠️  {len(result['credentials'])} password awal dibuat; pakai --credentials untuk menyimpannya")
+    return 0 if not result['errors'] else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,158 @@
+"""
+Snapshot in-memory katalog Dokumen Bengkel.
+
+Seluruh tabel `files` dimuat sekali ke array paralel yang diurutkan per
+parent (folder dulu, lalu nama), sehingga isi satu folder adalah satu
+rentang offset yang bersebelahan. Listing folder dan lookup file dilayani
+dalam O(jumlah anak) tanpa SQL sampai sync berikutnya mengganti database.
+"""
+
+import sys
+import time
+from array import array
+from bisect import bisect_right
+
+_NO_PARENT = object()
+
+LOAD_SQL = (
+    "SELECT id, name, is_directory, size, mime_type, parent_id, root_folder_name "
+    "FROM files ORDER BY parent_id, is_directory DESC, name, id"
+)
+
+
+class _Interner:
+    """Simpan string berulang (mime type, root, parent id) sekali saja"""
+
+    def __init__(self):
+        self.values = []
+        self.index = {}
+
+    def key(self, value):
+        key = self.index.get(value)
+        if key is None:
+            key = len(self.values)
+            self.index[value] = key
+            self.values.append(value)
+        return key
+
+
+class CatalogSnapshot:
+    """Pohon katalog berbasis array paralel untuk satu generasi sync"""
+
+    def __init__(self, generation=None):
+        self.generation = generation
+        self.ids = []
+        self.names = []
+        self.is_dir = bytearray()
+        self.sizes = array('q')
+        self.mime_keys = array('H')
+        self.root_keys = array('H')
+        self.parent_keys = array('i')    # index ke self.parent_ids
+        self.parent_index = array('i')   # index baris parent, -1 jika parent bukan baris (root)
+        self.child_start = array('i')    # per parent key: offset anak pertama
+        self.child_end = array('i')      # per parent key: offset setelah anak terakhir
+        self.mime_types = []
+        self.roots = []
+        self.parent_ids = []
+        self.id_index = {}
+        self.parent_lookup = {}
+        self.load_seconds = 0.0
+
+    @classmethod
+    def load(cls, conn, generation=None):
+        """Bangun snapshot dari koneksi SQLite katalog"""
+        start = time.perf_counter()
+        snap = cls(generation)
+        mimes, roots, parents = _Interner(), _Interner(), _Interner()
+
+        previous_parent = _NO_PARENT
+        for offset, row in enumerate(conn.execute(LOAD_SQL)):
+            file_id, name, is_directory, size, mime_type, parent_id, root = row
+            if parent_id != previous_parent:
+                if previous_parent is not _NO_PARENT:
+                    snap.child_end.append(offset)
+                snap.child_start.append(offset)
+                previous_parent = parent_id
+            snap.ids.append(file_id)
+            snap.names.append(name or '')
+            snap.is_dir.append(1 if is_directory else 0)
+            snap.sizes.append(size or 0)
+            snap.mime_keys.append(mimes.key(mime_type or ''))
+            snap.root_keys.append(roots.key(root or ''))
+            snap.parent_keys.append(parents.key(parent_id))
+        if previous_parent is not _NO_PARENT:
+            snap.child_end.append(len(snap.ids))
+
+        snap.mime_types = mimes.values
+        snap.roots = roots.values
+        snap.parent_ids = parents.values
+        snap.parent_lookup = parents.index
+        snap.id_index = {file_id: i for i, file_id in enumerate(snap.ids)}
+        parent_rows = [snap.id_index.get(parent_id, -1) for parent_id in snap.parent_ids]
+        snap.parent_index = array('i', (parent_rows[key] for key in snap.parent_keys))
+        snap.load_seconds = time.perf_counter() - start
+        return snap
+
+    def __len__(self):
+        return len(self.ids)
+
+    def children(self, folder_id):
+        """range offset anak langsung dari folder_id"""
+        key = self.parent_lookup.get(folder_id)
+        if key is None:
+            return range(0)
+        return range(self.child_start[key], self.child_end[key])
+
+    def sort_key(self, i):
+        """Kunci urutan listing folder: (folder dulu, nama, id)"""
+        return (-self.is_dir[i], self.names[i], self.ids[i])
+
+    def children_page(self, folder_id, after=None, limit=100):
+        """
+        Satu halaman anak folder setelah cursor `after` = (is_directory, name, id).
+        Posisi awal dicari dengan binary search, jadi biayanya O(log n + limit).
+        Return (range offset, ada_halaman_berikutnya).
+        """
+        children = self.children(folder_id)
+        start = 0
+        if after is not None:
+            is_directory, name, file_id = after
+            start = bisect_right(children, (-is_directory, name, file_id), key=self.sort_key)
+        page = children[start:start + limit]
+        return page, start + limit < len(children)
+
+    def find(self, file_id):
+        """Offset baris untuk id, atau None"""
+        return self.id_index.get(file_id)
+
+    def row(self, i):
+        """Dict baris pada offset i (kolom sama dengan tabel files)"""
+        return {
+            'id': self.ids[i],
+            'name': self.names[i],
+            'is_directory': self.is_dir[i],
+            'size': self.sizes[i],
+            'mime_type': self.mime_types[self.mime_keys[i]],
+            'parent_id': self.parent_ids[self.parent_keys[i]],
+            'root_folder_name': self.roots[self.root_keys[i]]
+        }
+
+    def memory_bytes(self):
+        """Perkiraan memori snapshot (termasuk string dan dict index)"""
+        total = 0
+        for container in (self.ids, self.names, self.mime_types, self.roots, self.parent_ids):
+            total += sys.getsizeof(container) + sum(sys.getsizeof(s) for s in container if s is not None)
+        for buf in (self.is_dir, self.sizes, self.mime_keys, self.root_keys,
+                    self.parent_keys, self.parent_index, self.child_start, self.child_end):
+            total += sys.getsizeof(buf)
+        total += sys.getsizeof(self.id_index) + sys.getsizeof(self.parent_lookup)
+        return total
+
+    def stats(self):
+        return {
+            'generation': self.generation,
+            'rows': len(self.ids),
+            'parents': len(self.parent_ids),
+            'memory_bytes': self.memory_bytes(),
+            'load_ms': round(self.load_seconds * 1000, 2)
+        }
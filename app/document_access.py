@@ -0,0 +1,267 @@
+"""
+Resolver izin akses Dokumen Bengkel.
+
+Menjawab "apakah peserta X boleh membaca dokumen, dan kenapa" dengan satu
+query join (Peserta + DocumentAccess individual + Batch + DocumentAccess
+group). Hasil di-memo per request (flask.g) dan di cache per worker dengan
+TTL pendek; endpoint grant/revoke admin memanggil bump_access_epoch().
+
+Setelah login, izin juga disimpan sebagai klaim bertanda tangan di session
+(alasan, kadaluarsa, epoch revokasi) sehingga browsing katalog bisa
+diverifikasi di proses tanpa query. Epoch per peserta (dan epoch global
+untuk perubahan batch) disimpan di tabel access_epoch; file penanda
+ACCESS_EPOCH_FILE memberi tahu worker lain agar memuat ulang epoch.
+"""
+
+import os
+import threading
+import time
+from collections import namedtuple
+from datetime import datetime
+
+from flask import g, has_app_context, session, current_app
+from itsdangerous import BadSignature, URLSafeSerializer
+from sqlalchemy import and_
+from sqlalchemy.orm import aliased
+
+from .models import db, Peserta, Batch, DocumentAccess, AccessEpoch
+from .identity import current_peserta
+
+ACCESS_CACHE_TTL = int(os.getenv('DOKUMEN_ACCESS_CACHE_TTL', 30))
+
+# Klaim di session berlaku maksimal 12 jam sebelum diverifikasi ulang ke DB
+CLAIM_MAX_AGE = 12 * 60 * 60
+CLAIM_SESSION_KEY = 'doc_claim'
+GLOBAL_EPOCH_ID = 0
+
+# Field nama & akses_dokumen_bengkel ikut disimpan supaya halaman /documents
+# tidak perlu memuat ulang Peserta hanya untuk sapaan.
+AccessDecision = namedtuple(
+    'AccessDecision',
+    ['peserta_id', 'nama', 'akses_dokumen_bengkel', 'allowed', 'reason', 'expires_at']
+)
+
+_cache = {}
+_cache_lock = threading.Lock()
+
+
+def _aktif(diberikan, kadaluarsa, now):
+    """Sama dengan DocumentAccess.is_aktif() untuk kolom hasil join"""
+    if not diberikan:
+        return False
+    if kadaluarsa:
+        return now <= kadaluarsa
+    return True
+
+
+def _query_access(peserta_id):
+    individual = aliased(DocumentAccess)
+    group = aliased(DocumentAccess)
+    row = db.session.query(
+        Peserta.id,
+        Peserta.nama,
+        Peserta.akses_dokumen_bengkel,
+        Batch.nama,
+        individual.akses_diberikan,
+        individual.tanggal_kadaluarsa,
+        group.akses_diberikan,
+        group.tanggal_kadaluarsa,
+    ).outerjoin(
+        individual,
+        and_(individual.peserta_id == Peserta.id, individual.tipe_akses == 'individual')
+    ).outerjoin(
+        Batch, Batch.id == Peserta.batch_id
+    ).outerjoin(
+        group,
+        and_(group.batch_id == Batch.id, group.tipe_akses == 'group')
+    ).filter(
+        Peserta.id == peserta_id
+    ).order_by(individual.id, group.id).first()
+
+    if row is None:
+        return None
+
+    (pid, nama, legacy, batch_nama,
+     ind_diberikan, ind_kadaluarsa, grp_diberikan, grp_kadaluarsa) = row
+    now = datetime.utcnow()
+
+    # Urutan prioritas sama seperti sebelumnya: individual, batch, legacy
+    if _aktif(ind_diberikan, ind_kadaluarsa, now):
+        return AccessDecision(pid, nama, legacy, True, "Individual", ind_kadaluarsa)
+    if batch_nama and _aktif(grp_diberikan, grp_kadaluarsa, now):
+        return AccessDecision(pid, nama, legacy, True, f"Batch: {batch_nama}", grp_kadaluarsa)
+    if legacy:
+        return AccessDecision(pid, nama, legacy, True, "Legacy", None)
+    return AccessDecision(pid, nama, legacy, False, "", None)
+
+
+def _epoch_pair(epochs, peserta_id):
+    return (epochs.get(peserta_id, 0), epochs.get(GLOBAL_EPOCH_ID, 0))
+
+
+def resolve_document_access(peserta_id, epochs=None):
+    """
+    AccessDecision untuk peserta, atau None jika peserta tidak ditemukan.
+    Maksimal satu query per request; request berikutnya dalam TTL tanpa query.
+    Epoch revokasi dibaca sebelum cache, dan entri cache hanya dipakai jika
+    dibuat pada epoch yang sama, jadi revokasi dari worker lain tidak pernah
+    dijawab dengan keputusan "boleh" yang lama.
+    """
+    memo = g.setdefault('_document_access', {}) if has_app_context() else {}
+    if peserta_id in memo:
+        return memo[peserta_id]
+
+    if epochs is None:
+        epochs = _current_epochs()
+    pair = _epoch_pair(epochs, peserta_id)
+    now = time.monotonic()
+    with _cache_lock:
+        cached = _cache.get(peserta_id)
+    if cached and cached[0] > now and cached[2] == pair:
+        decision = cached[1]
+    else:
+        decision = _query_access(peserta_id)
+        expires = now + ACCESS_CACHE_TTL
+        if decision and decision.expires_at:
+            # Jangan cache melewati tanggal kadaluarsa akses
+            remaining = (decision.expires_at - datetime.utcnow()).total_seconds()
+            expires = min(expires, now + max(remaining, 0))
+        with _cache_lock:
+            _cache[peserta_id] = (expires, decision, pair)
+
+    memo[peserta_id] = decision
+    return decision
+
+
+def invalidate_document_access(peserta_id=None):
+    """Hapus cache akses satu peserta, atau semua jika peserta_id None"""
+    with _cache_lock:
+        if peserta_id is None:
+            _cache.clear()
+        else:
+            _cache.pop(peserta_id, None)
+    if has_app_context():
+        memo = g.get('_document_access')
+        if memo is not None:
+            if peserta_id is None:
+                memo.clear()
+            else:
+                memo.pop(peserta_id, None)
+
+
+# ===== EPOCH REVOKASI =====
+_NOT_LOADED = object()
+_epochs = {'signature': _NOT_LOADED, 'values': {}}
+_epochs_lock = threading.Lock()
+
+
+def _epoch_file_signature():
+    try:
+        st = os.stat(current_app.config['ACCESS_EPOCH_FILE'])
+    except OSError:
+        return None
+    return (st.st_ino, st.st_size, st.st_mtime_ns)
+
+
+def _current_epochs():
+    """Map peserta_id -> epoch; dimuat ulang hanya jika file penanda berubah"""
+    signature = _epoch_file_signature()
+    with _epochs_lock:
+        if _epochs['signature'] == signature:
+            return _epochs['values']
+
+    values = dict(db.session.query(AccessEpoch.peserta_id, AccessEpoch.epoch).all())
+    with _epochs_lock:
+        changed = _epochs['values'] != values
+        _epochs['values'] = values
+        _epochs['signature'] = signature
+    if changed:
+        # Worker lain mengubah akses: buang juga cache resolver worker ini
+        invalidate_document_access()
+    return values
+
+
+def bump_access_epoch(peserta_id=None):
+    """
+    Naikkan epoch revokasi (peserta_id None = global, mis. perubahan akses batch)
+    lalu sentuh file penanda supaya semua worker langsung memverifikasi ulang.
+    """
+    key = GLOBAL_EPOCH_ID if peserta_id is None else peserta_id
+    row = AccessEpoch.query.get(key)
+    if row is None:
+        row = AccessEpoch(peserta_id=key, epoch=0)
+        db.session.add(row)
+    row.epoch = (row.epoch or 0) + 1
+    db.session.commit()
+
+    path = current_app.config['ACCESS_EPOCH_FILE']
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w') as f:
+            f.write(f"{key}:{row.epoch}:{time.time()}")
+    except OSError as e:
+        print(f"⚠️  Tidak bisa menulis file epoch akses: {e}")
+
+    invalidate_document_access(peserta_id)
+
+
+# ===== KLAIM AKSES DI SESSION =====
+def _serializer():
+    return URLSafeSerializer(current_app.secret_key, salt='document-access-claim')
+
+
+def issue_access_claim(decision, epochs):
+    """
+    Simpan klaim bertanda tangan untuk decision yang mengizinkan akses.
+    `epochs` harus snapshot yang dibaca sebelum decision di-resolve: jika
+    akses direvokasi di antaranya, klaim langsung tidak sah.
+    """
+    if not decision or not decision.allowed:
+        session.pop(CLAIM_SESSION_KEY, None)
+        return
+    own_epoch, global_epoch = _epoch_pair(epochs, decision.peserta_id)
+    expires = time.time() + CLAIM_MAX_AGE
+    if decision.expires_at:
+        expires = min(expires, (decision.expires_at - datetime(1970, 1, 1)).total_seconds())
+    session[CLAIM_SESSION_KEY] = _serializer().dumps({
+        'p': decision.peserta_id,
+        'r': decision.reason,
+        'l': bool(decision.akses_dokumen_bengkel),
+        'x': int(expires),
+        'e': own_epoch,
+        'g': global_epoch
+    })
+
+
+def verify_access_claim(peserta_id):
+    """AccessDecision dari klaim session jika masih sah, selain itu None"""
+    token = session.get(CLAIM_SESSION_KEY)
+    if not token:
+        return None
+    try:
+        claim = _serializer().loads(token)
+    except BadSignature:
+        return None
+    if claim.get('p') != peserta_id or claim.get('x', 0) < time.time():
+        return None
+    epochs = _current_epochs()
+    if (claim.get('e'), claim.get('g')) != _epoch_pair(epochs, peserta_id):
+        return None
+    # Nama dari cache identitas (tanpa query selama data peserta tidak berubah)
+    peserta = current_peserta()
+    nama = peserta.nama if peserta is not None and peserta.id == peserta_id else None
+    return AccessDecision(peserta_id, nama, claim.get('l'), True, claim.get('r'), None)
+
+
+def check_document_access(peserta_id):
+    """
+    Izin akses untuk route /documents: klaim session dulu (tanpa query),
+    jika tidak ada/kadaluarsa/direvokasi, resolve ke DB lalu terbitkan klaim baru.
+    """
+    decision = verify_access_claim(peserta_id)
+    if decision is not None:
+        return decision
+    epochs = _current_epochs()
+    decision = resolve_document_access(peserta_id, epochs)
+    issue_access_claim(decision, epochs)
+    return decision
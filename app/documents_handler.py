@@ -4,35 +4,50 @@ Mengintegrasikan sinkronisasi Google Drive dengan database lokal
 """
 
 import os
+import sys
 import sqlite3
 import json
+import threading
+from contextlib import contextmanager
 from pathlib import Path
+from urllib.parse import quote
 
-# Konfigurasi Root Folder (sesuai dengan Dokumen Bengkel/app.py)
-ROOT_FOLDERS = {
-    "EBOOKS": "12ffd7GqHAiy3J62Vu65LbVt6-ultog5Z",
-    "Pengetahuan": "1Y2SLCbyHoB53BaQTTwRta2T6dv_drRll",
-    "Service_Manual_1": "1CHz8UWZXfJtXlcjp9-FPAo-t_KkfTztW",
-    "Service_Manual_2": "1_SsZ7SkaZxvXUZ6RUAA_o7WR_GAtgEwT"
-}
+# Modul skema katalog dibagi dengan Dokumen Bengkel/sync_drive.py
+BENGKEL_DIR = Path(__file__).parent.parent / "Dokumen Bengkel"
+if str(BENGKEL_DIR) not in sys.path:
+    sys.path.append(str(BENGKEL_DIR))
 
-DISPLAY_NAMES = {
-    "EBOOKS": "📚 EBOOKS",
-    "Pengetahuan": "🧠 Pengetahuan",
-    "Service_Manual_1": "🔧 Service Manual (1)",
-    "Service_Manual_2": "⚙️ Service Manual (2)"
-}
+import catalog_schema
+from .catalog_snapshot import CatalogSnapshot
+
+# Ukuran pool koneksi read-only per worker dan cache prepared statement per koneksi
+POOL_MAX_SIZE = int(os.getenv('DOKUMEN_POOL_SIZE', 8))
+POOL_STATEMENT_CACHE = 64
 
 
 def get_documents_db_path():
     """Dapatkan path database Dokumen Bengkel"""
-    bengkel_dir = Path(__file__).parent.parent / "Dokumen Bengkel"
-    db_path = bengkel_dir / "database.db"
+    db_path = BENGKEL_DIR / "database.db"
     return str(db_path)
 
 
+def ensure_catalog_schema():
+    """Jalankan migrasi skema/index katalog (idempotent)"""
+    # Root hanya dipakai untuk mengisi root_summary yang masih kosong
+    from config import ROOT_FOLDERS, DISPLAY_NAMES
+
+    try:
+        applied = catalog_schema.migrate_path(get_documents_db_path(), ROOT_FOLDERS, DISPLAY_NAMES)
+        if applied:
+            print(f"✅ Skema katalog Dokumen Bengkel dimigrasi ke versi {applied[-1]}")
+        return applied
+    except sqlite3.Error as e:
+        print(f"⚠️  Migrasi skema katalog gagal: {e}")
+        return []
+
+
 def get_documents_connection():
-    """Koneksi ke database Dokumen Bengkel"""
+    """Koneksi read-only baru ke database Dokumen Bengkel (tanpa pool)"""
     db_path = get_documents_db_path()
     if not os.path.exists(db_path):
         # Log warning and return None so callers can handle missing DB
@@ -40,14 +55,223 @@ def get_documents_connection():
         return None
 
     try:
-        conn = sqlite3.connect(db_path)
-        conn.row_factory = sqlite3.Row
-        return conn
+        return _open_readonly(db_path)
     except sqlite3.Error as e:
         print(f"❌ Gagal membuka database Dokumen Bengkel: {e}")
         return None
 
 
+def _open_readonly(db_path):
+    """Buka koneksi SQLite read-only (URI mode=ro)"""
+    uri = f"file:{quote(db_path)}?mode=ro"
+    conn = sqlite3.connect(
+        uri,
+        uri=True,
+        check_same_thread=False,
+        cached_statements=POOL_STATEMENT_CACHE
+    )
+    conn.row_factory = sqlite3.Row
+    return conn
+
+
+class CatalogConnectionPool:
+    """
+    Pool koneksi read-only per worker untuk database Dokumen Bengkel.
+
+    Koneksi dipakai ulang antar request sehingga statement yang sudah
+    di-prepare (cache statement sqlite3 per koneksi) ikut dipakai ulang.
+    Jika file database diganti/diubah oleh sync, semua koneksi lama
+    dibuang dan dibuka ulang pada request berikutnya.
+    """
+
+    def __init__(self, db_path, max_size=POOL_MAX_SIZE):
+        self.db_path = db_path
+        self.max_size = max_size
+        self._lock = threading.Lock()
+        self._idle = []
+        self._signature = None
+        self._generation = 0
+        self._pid = os.getpid()
+        self.hits = 0
+        self.misses = 0
+        self.reopens = 0
+
+    def _file_signature(self):
+        st = os.stat(self.db_path)
+        return (st.st_dev, st.st_ino, st.st_size, st.st_mtime_ns)
+
+    def _discard_idle(self):
+        for conn, _ in self._idle:
+            try:
+                conn.close()
+            except sqlite3.Error:
+                pass
+        self._idle = []
+
+    def _refresh(self):
+        """Cek identitas file database; return generasi saat ini atau None"""
+        try:
+            signature = self._file_signature()
+        except OSError:
+            print(f"⚠️  Dokumen Bengkel database tidak ditemukan di: {self.db_path}")
+            return None
+
+        with self._lock:
+            if self._pid != os.getpid():
+                # Setelah fork (gunicorn), jangan pakai koneksi milik parent
+                self._idle = []
+                self._pid = os.getpid()
+                self._signature = None
+            if signature != self._signature:
+                if self._signature is not None:
+                    self.reopens += 1
+                self._discard_idle()
+                self._signature = signature
+                self._generation += 1
+            return self._generation
+
+    def current_generation(self):
+        """Generasi file database (naik setiap kali file diganti/diubah sync)"""
+        return self._refresh()
+
+    def _acquire(self):
+        generation = self._refresh()
+        if generation is None:
+            return None, None
+
+        with self._lock:
+            if self._idle and self._idle[-1][1] == generation:
+                self.hits += 1
+                return self._idle.pop()[0], generation
+            self.misses += 1
+
+        try:
+            return _open_readonly(self.db_path), generation
+        except sqlite3.Error as e:
+            print(f"❌ Gagal membuka database Dokumen Bengkel: {e}")
+            return None, None
+
+    def _release(self, conn, generation):
+        with self._lock:
+            if generation == self._generation and len(self._idle) < self.max_size:
+                self._idle.append((conn, generation))
+                return
+        conn.close()
+
+    @contextmanager
+    def connection(self):
+        """Pinjam koneksi dari pool; yield None jika database tidak tersedia"""
+        conn, generation = self._acquire()
+        if conn is None:
+            yield None
+            return
+        broken = False
+        try:
+            yield conn
+        except sqlite3.Error:
+            broken = True
+            raise
+        finally:
+            if broken:
+                # Koneksi bermasalah tidak dikembalikan ke pool
+                conn.close()
+            else:
+                self._release(conn, generation)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'reopens': self.reopens,
+                'idle': len(self._idle),
+                'generation': self._generation,
+                'max_size': self.max_size
+            }
+
+    def close_all(self):
+        with self._lock:
+            self._discard_idle()
+            self._signature = None
+
+
+_pool = CatalogConnectionPool(get_documents_db_path())
+
+
+def catalog_connection():
+    """Context manager koneksi pooled ke database Dokumen Bengkel"""
+    return _pool.connection()
+
+
+def get_pool_stats():
+    """Statistik pool koneksi (hit/miss/reopen) untuk worker ini"""
+    return _pool.stats()
+
+
+_snapshot = None
+_snapshot_lock = threading.Lock()
+
+
+def get_catalog_snapshot():
+    """
+    Snapshot pohon katalog untuk generasi database saat ini.
+    Dimuat sekali per worker dan diganti (swap referensi) saat sync mengubah database.
+    """
+    global _snapshot
+    generation = _pool.current_generation()
+    if generation is None:
+        return None
+
+    snapshot = _snapshot
+    if snapshot is not None and snapshot.generation == generation:
+        return snapshot
+
+    with _snapshot_lock:
+        snapshot = _snapshot
+        if snapshot is None or snapshot.generation != generation:
+            with catalog_connection() as conn:
+                if not conn:
+                    return None
+                snapshot = CatalogSnapshot.load(conn, generation)
+            _snapshot = snapshot
+    return snapshot
+
+
+_roots_cache = (None, [])
+
+
+def get_roots():
+    """
+    Daftar root dari tabel root_summary (ditulis oleh sync).
+    Dibaca sekali per generasi database, selanjutnya dari memori proses.
+    """
+    global _roots_cache
+    generation = _pool.current_generation()
+    if generation is None:
+        return []
+
+    cached_generation, roots = _roots_cache
+    if cached_generation == generation:
+        return roots
+
+    with catalog_connection() as conn:
+        if not conn:
+            return []
+        try:
+            roots = catalog_schema.load_root_summary(conn)
+        except sqlite3.OperationalError as e:
+            print(f"⚠️  root_summary belum tersedia: {e}")
+            roots = []
+    _roots_cache = (generation, roots)
+    return roots
+
+
+def get_snapshot_stats():
+    """Statistik snapshot katalog (baris, memori, waktu muat) untuk worker ini"""
+    snapshot = _snapshot
+    return snapshot.stats() if snapshot else None
+
+
 def safe_get(row, key, default=None):
     """Safely get value from sqlite3.Row"""
     try:
@@ -73,96 +297,93 @@ def sizeof_fmt(num, suffix="B"):
 
 def get_root_list():
     """Ambil daftar root folders dengan jumlah file"""
-    conn = get_documents_connection()
-    if not conn:
-        return []
-    
-    try:
-        root_list = []
-        for key, folder_id in ROOT_FOLDERS.items():
-            count = conn.execute(
-                "SELECT COUNT(*) FROM files WHERE (parent_id = ?) OR (root_folder_name = ?)",
-                (folder_id, key)
-            ).fetchone()[0]
-            name = DISPLAY_NAMES.get(key, key)
-            root_list.append({
-                'name': name,
-                'folder_id': folder_id,
-                'count': count,
-                'key': key
-            })
-        return root_list
-    finally:
-        conn.close()
+    return [
+        {
+            'name': root['name'],
+            'folder_id': root['folder_id'],
+            'count': root['count'],
+            'key': root['key']
+        }
+        for root in get_roots()
+    ]
+
+
+def _folder_display_name(snapshot, folder_id):
+    """Nama tampilan folder (nama root atau nama folder di katalog)"""
+    for root in get_roots():
+        if root['folder_id'] == folder_id:
+            return root['name']
+    i = snapshot.find(folder_id)
+    if i is not None and snapshot.is_dir[i]:
+        return snapshot.names[i]
+    return "Folder"
+
+
+def _snapshot_item(snapshot, i):
+    return {
+        'id': snapshot.ids[i],
+        'name': snapshot.names[i],
+        'is_directory': snapshot.is_dir[i],
+        'mime_type': snapshot.mime_types[snapshot.mime_keys[i]],
+        'size': sizeof_fmt(snapshot.sizes[i]),
+        'file_id': snapshot.ids[i]
+    }
 
 
 def get_folder_contents(folder_id):
-    """Ambil isi folder berdasarkan folder_id"""
-    conn = get_documents_connection()
-    if not conn:
+    """Ambil isi folder berdasarkan folder_id (dari snapshot in-memory)"""
+    snapshot = get_catalog_snapshot()
+    if snapshot is None:
         return None, None
-    
-    try:
-        # Cari nama folder
-        folder_name = "Folder"
-        for key, fid in ROOT_FOLDERS.items():
-            if fid == folder_id:
-                folder_name = DISPLAY_NAMES.get(key, key)
-                break
-        else:
-            folder_row = conn.execute(
-                "SELECT name FROM files WHERE id = ? AND is_directory = 1", (folder_id,)
-            ).fetchone()
-            if folder_row:
-                folder_name = folder_row['name']
-        
-        # Ambil items dalam folder
-        items = conn.execute(
-            "SELECT * FROM files WHERE parent_id = ? ORDER BY is_directory DESC, name",
-            (folder_id,)
-        ).fetchall()
-        
-        # Konversi ke dict untuk template
-        items_list = []
-        for item in items:
-            items_list.append({
-                'id': item['id'],
-                'name': item['name'],
-                'is_directory': item['is_directory'],
-                'mime_type': safe_get(item, 'mime_type', ''),
-                'size': sizeof_fmt(safe_get(item, 'size', 0)),
-                'file_id': item['id']
-            })
-        
-        return folder_name, items_list
-    finally:
-        conn.close()
+
+    # Anak folder sudah terurut (folder dulu, lalu nama) di snapshot
+    items_list = [_snapshot_item(snapshot, i) for i in snapshot.children(folder_id)]
+    return _folder_display_name(snapshot, folder_id), items_list
+
+
+def get_folder_page(folder_id, after=None, limit=catalog_schema.FOLDER_PAGE_SIZE):
+    """
+    Satu halaman isi folder (keyset pagination pada is_directory, name, id).
+    `after` adalah token opaque dari halaman sebelumnya.
+    Return (folder_name, items, next_cursor); folder_name None jika katalog tidak tersedia.
+    """
+    snapshot = get_catalog_snapshot()
+    if snapshot is None:
+        return None, None, None
+
+    page, has_more = snapshot.children_page(
+        folder_id, catalog_schema.decode_cursor(after), catalog_schema.page_limit(limit)
+    )
+    items_list = [_snapshot_item(snapshot, i) for i in page]
+
+    next_cursor = None
+    if has_more and page:
+        last = page[-1]
+        next_cursor = catalog_schema.encode_cursor(
+            snapshot.is_dir[last], snapshot.names[last], snapshot.ids[last]
+        )
+    return _folder_display_name(snapshot, folder_id), items_list, next_cursor
 
 
 def get_file_info(file_id):
-    """Ambil info file untuk preview"""
-    conn = get_documents_connection()
-    if not conn:
+    """Ambil info file untuk preview (dari snapshot in-memory)"""
+    snapshot = get_catalog_snapshot()
+    if snapshot is None:
         return None
-    
-    try:
-        file = conn.execute(
-            "SELECT * FROM files WHERE id = ? AND is_directory = 0", (file_id,)
-        ).fetchone()
-        
-        if not file:
-            return None
-        
-        return {
-            'id': file['id'],
-            'name': file['name'],
-            'mime_type': safe_get(file, 'mime_type', ''),
-            'size': sizeof_fmt(safe_get(file, 'size', 0)),
-            'parent_id': safe_get(file, 'parent_id', ''),
-            'root_folder_name': safe_get(file, 'root_folder_name', '')
-        }
-    finally:
-        conn.close()
+
+    i = snapshot.find(file_id)
+    if i is None or snapshot.is_dir[i]:
+        return None
+
+    file = snapshot.row(i)
+    return {
+        'id': file['id'],
+        'name': file['name'],
+        'mime_type': file['mime_type'],
+        'size': sizeof_fmt(file['size']),
+        'parent_id': file['parent_id'] or '',
+        'root_folder_name': file['root_folder_name']
+    }
 
 
 def search_files(query):
@@ -170,15 +391,12 @@ def search_files(query):
     if not query or len(query.strip()) < 2:
         return []
     
-    conn = get_documents_connection()
-    if not conn:
-        return []
-    
-    try:
-        results = conn.execute(
-            "SELECT * FROM files WHERE name LIKE ? ORDER BY root_folder_name, name LIMIT 50",
-            (f"%{query}%",)
-        ).fetchall()
+    with catalog_connection() as conn:
+        if not conn:
+            return []
+
+        # FTS5 + bm25 (fallback LIKE jika index belum ada)
+        results = catalog_schema.search_names(conn, query, limit=50)
         
         results_list = []
         for r in results:
@@ -192,25 +410,25 @@ def search_files(query):
             })
         
         return results_list
-    finally:
-        conn.close()
 
 
 def get_documents_catalog():
     """Ambil katalog dokumentasi lengkap per kategori"""
-    conn = get_documents_connection()
-    if not conn:
-        return {}
-    
-    try:
+    roots = get_roots()
+    with catalog_connection() as conn:
+        if not conn:
+            return {}
+
         catalog = {}
         
-        for key, folder_id in ROOT_FOLDERS.items():
-            display_name = DISPLAY_NAMES.get(key, key)
+        for root in roots:
+            folder_id = root['folder_id']
+            display_name = root['name']
             
             # Ambil files langsung di folder root
             files = conn.execute(
-                "SELECT * FROM files WHERE parent_id = ? AND is_directory = 0 ORDER BY name",
+                "SELECT id, name, mime_type, size FROM files "
+                "WHERE parent_id = ? AND is_directory = 0 ORDER BY name",
                 (folder_id,)
             ).fetchall()
             
@@ -225,5 +443,3 @@ def get_documents_catalog():
             ]
         
         return catalog
-    finally:
-        conn.close()
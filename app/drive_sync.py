@@ -90,6 +90,10 @@ def sync_google_drive_documents():
                 else:
                     raise Exception(f"Database not found at {bengkel_db}")
             
+            # Pastikan index katalog terpasang setelah sync
+            from app.documents_handler import ensure_catalog_schema
+            ensure_catalog_schema()
+
             # Get stats after sync
             stats_after = get_drive_sync_stats()
             
@@ -0,0 +1,244 @@
+"""
+Export streaming data peserta + akses dokumen (CSV / XLSX).
+
+Baris diambil per potongan keyset (Peserta.id), masing-masing dalam
+transaksi baca singkat, lalu ditulis ke generator response: memori konstan
+berapa pun jumlah peserta dan byte pertama langsung terkirim. users.db
+memakai rollback journal, jadi cursor yang terbuka selama download akan
+menahan SHARED lock dan membuat setiap commit lain gagal "database is
+locked"; di antara potongan session ditutup.
+
+Sel CSV yang diawali = + - @ diberi awalan ' (formula injection) dan
+karakter kontrol yang tidak sah di XML dibuang dari sel XLSX. CSV bisa dikompres gzip on the fly;
+XLSX ditulis sebagai zip streaming (sheet dengan inline string, tanpa
+library tambahan).
+"""
+
+import csv
+import io
+import re
+import zipfile
+import zlib
+from datetime import datetime
+from xml.sax.saxutils import escape
+
+from sqlalchemy import and_
+from sqlalchemy.orm import aliased
+
+from .models import Peserta, Batch, DocumentAccess
+
+EXPORT_CHUNK = 1000
+FLUSH_BYTES = 64 * 1024
+
+# Diinterpretasi Excel/LibreOffice sebagai formula di awal sel CSV
+FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+# Karakter yang tidak boleh ada di dokumen XML 1.0
+_XML_ILLEGAL = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f\ud800-\udfff\ufffe\uffff]')
+
+EXPORT_HEADER = [
+    'id', 'nama', 'whatsapp', 'email', 'nama_bengkel', 'batch', 'batch_aktif',
+    'status_pembayaran', 'tanggal_daftar', 'akses_workshop', 'akses_dokumen_bengkel',
+    'akses_individual', 'individual_kadaluarsa', 'akses_grup', 'grup_kadaluarsa',
+]
+
+
+def export_query(query):
+    """
+    Proyeksikan query Peserta (sudah difilter) ke kolom export, join Batch
+    dan DocumentAccess individual/grup.
+    """
+    individual = aliased(DocumentAccess)
+    group = aliased(DocumentAccess)
+    return query.outerjoin(
+        Batch, Batch.id == Peserta.batch_id
+    ).outerjoin(
+        individual,
+        and_(individual.peserta_id == Peserta.id, individual.tipe_akses == 'individual')
+    ).outerjoin(
+        group,
+        and_(group.batch_id == Batch.id, group.tipe_akses == 'group')
+    ).with_entities(
+        Peserta.id,
+        Peserta.nama,
+        Peserta.whatsapp,
+        Peserta.email,
+        Peserta.nama_bengkel,
+        Peserta.batch,
+        Batch.aktif,
+        Peserta.status_pembayaran,
+        Peserta.tanggal_daftar,
+        Peserta.akses_workshop,
+        Peserta.akses_dokumen_bengkel,
+        individual.akses_diberikan,
+        individual.tanggal_kadaluarsa,
+        group.akses_diberikan,
+        group.tanggal_kadaluarsa,
+    )
+
+
+def export_rows(query, chunk_size=None):
+    """
+    Generator baris export untuk query Peserta (sudah difilter), urut id.
+    Setiap potongan: satu query id keyset + satu query export, lalu session
+    ditutup sebelum baris dikirim sehingga tidak ada lock baca yang tertahan
+    selama klien mengunduh.
+    """
+    chunk_size = chunk_size or EXPORT_CHUNK
+    session = query.session
+    # Urutan relevansi pencarian diganti urutan id (syarat keyset)
+    base = query.order_by(None).with_entities(Peserta.id)
+    last_id = 0
+    while True:
+        ids = base.filter(Peserta.id > last_id).order_by(Peserta.id).limit(chunk_size).subquery()
+        try:
+            rows = export_query(
+                session.query(Peserta).filter(Peserta.id.in_(session.query(ids.c.id))).order_by(Peserta.id)
+            ).all()
+        finally:
+            session.close()
+        yield from rows
+        if not rows or len({row[0] for row in rows}) < chunk_size:
+            return
+        last_id = rows[-1][0]
+
+
+def _cell(value):
+    if value is None:
+        return ''
+    if isinstance(value, bool):
+        return 'Ya' if value else 'Tidak'
+    if isinstance(value, datetime):
+        return value.strftime('%Y-%m-%d %H:%M:%S')
+    return str(value)
+
+
+def _csv_cell(value):
+    text = _cell(value)
+    # Teks dari user yang diawali karakter formula ditampilkan apa adanya
+    if isinstance(value, str) and text.startswith(FORMULA_PREFIXES):
+        return "'" + text
+    return text
+
+
+def csv_stream(rows):
+    """Generator bytes CSV (UTF-8 dengan BOM agar terbaca benar di Excel)"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    buffer.write('\ufeff')
+    writer.writerow(EXPORT_HEADER)
+    for row in rows:
+        writer.writerow([_csv_cell(value) for value in row])
+        if buffer.tell() >= FLUSH_BYTES:
+            yield buffer.getvalue().encode('utf-8')
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue().encode('utf-8')
+
+
+def gzip_stream(chunks, level=6):
+    """Kompres generator bytes menjadi stream gzip"""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+# ===== XLSX STREAMING =====
+class _ChunkWriter(io.RawIOBase):
+    """File-like tak bisa seek: zipfile menulis ke sini, generator mengosongkannya"""
+
+    def __init__(self):
+        self.chunks = []
+        self.pending = 0
+        self.position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        self.pending += len(data)
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def drain(self):
+        data = b''.join(self.chunks)
+        self.chunks = []
+        self.pending = 0
+        return data
+
+
+_XLSX_STATIC = {
+    '[Content_Types].xml': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/xl/workbook.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+        '<Override PartName="/xl/worksheets/sheet1.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+        '</Types>'
+    ),
+    '_rels/.rels': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+        'Target="xl/workbook.xml"/>'
+        '</Relationships>'
+    ),
+    'xl/workbook.xml': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+        'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+        '<sheets><sheet name="Peserta" sheetId="1" r:id="rId1"/></sheets>'
+        '</workbook>'
+    ),
+    'xl/_rels/workbook.xml.rels': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+        'Target="worksheets/sheet1.xml"/>'
+        '</Relationships>'
+    ),
+}
+
+
+def _xlsx_row(values):
+    cells = []
+    for value in values:
+        if isinstance(value, int) and not isinstance(value, bool):
+            cells.append(f'<c><v>{value}</v></c>')
+        else:
+            text = escape(_XML_ILLEGAL.sub('', _cell(value)))
+            cells.append(f'<c t="inlineStr"><is><t>{text}</t></is></c>')
+    return '<row>' + ''.join(cells) + '</row>'
+
+
+def xlsx_stream(rows):
+    """Generator bytes file XLSX satu sheet"""
+    out = _ChunkWriter()
+    with zipfile.ZipFile(out, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+        for name, content in _XLSX_STATIC.items():
+            archive.writestr(name, content)
+        yield out.drain()
+
+        with archive.open('xl/worksheets/sheet1.xml', 'w', force_zip64=True) as sheet:
+            sheet.write(
+                b'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                b'<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>'
+            )
+            sheet.write(_xlsx_row(EXPORT_HEADER).encode('utf-8'))
+            for row in rows:
+                sheet.write(_xlsx_row(row).encode('utf-8'))
+                if out.pending >= FLUSH_BYTES:
+                    yield out.drain()
+            sheet.write(b'</sheetData></worksheet>')
+    yield out.drain()
@@ -0,0 +1,126 @@
+"""
+Peserta yang sedang login, dimuat paling banyak sekali per request.
+
+current_peserta() memo di flask.g, lalu memakai cache LRU per worker yang
+di-key (id, versi). Versi dibaca session store server-side bersamaan dengan
+isi session (app.session_store), sehingga halaman user tidak menjalankan
+query Peserta selama datanya tidak berubah. Setiap commit yang mengubah atau
+menghapus Peserta menaikkan versinya (listener session di bawah), jadi
+perubahan admin (edit_peserta, toggle_akses, verifikasi_status, ...) langsung
+terlihat di semua worker.
+"""
+
+import os
+import threading
+from collections import OrderedDict
+
+from flask import current_app, g, has_app_context, session
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import make_transient_to_detached
+from sqlalchemy.orm.attributes import set_committed_value
+
+from .models import db, Peserta
+
+IDENTITY_CACHE_SIZE = int(os.getenv('IDENTITY_CACHE_SIZE', 1024))
+
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def _snapshot(peserta):
+    return {attr.key: getattr(peserta, attr.key) for attr in inspect(Peserta).column_attrs}
+
+
+def _from_snapshot(values):
+    """Instance Peserta persistent di db.session dari snapshot, tanpa query"""
+    peserta = inspect(Peserta).class_manager.new_instance()
+    for key, value in values.items():
+        set_committed_value(peserta, key, value)
+    make_transient_to_detached(peserta)
+    return db.session.merge(peserta, load=False)
+
+
+def _load(peserta_id, version):
+    if version is not None:
+        with _cache_lock:
+            cached = _cache.get(peserta_id)
+            if cached and cached[0] == version:
+                _cache.move_to_end(peserta_id)
+                return _from_snapshot(cached[1])
+
+    peserta = db.session.get(Peserta, peserta_id)
+    if peserta is not None and version is not None:
+        with _cache_lock:
+            _cache[peserta_id] = (version, _snapshot(peserta))
+            _cache.move_to_end(peserta_id)
+            while len(_cache) > IDENTITY_CACHE_SIZE:
+                _cache.popitem(last=False)
+    return peserta
+
+
+def current_peserta():
+    """Peserta yang login (None jika belum login/terhapus), sekali per request"""
+    if '_current_peserta' not in g:
+        peserta_id = session.get('user_id')
+        g._current_peserta = _load(peserta_id, getattr(session, 'identity_version', None)) if peserta_id else None
+    return g._current_peserta
+
+
+def invalidate_identity(peserta_ids=None):
+    """
+    Buang cache identitas di semua worker. peserta_ids None = semua peserta
+    (untuk UPDATE massal yang tidak melewati flush).
+    """
+    from .session_store import GLOBAL_VERSION_ID
+
+    ids = [GLOBAL_VERSION_ID] if peserta_ids is None else list(peserta_ids)
+    with _cache_lock:
+        if peserta_ids is None:
+            _cache.clear()
+        else:
+            for peserta_id in ids:
+                _cache.pop(peserta_id, None)
+    if has_app_context():
+        g.pop('_current_peserta', None)
+        store = current_app.session_interface
+        if hasattr(store, 'bump_identity_versions'):
+            try:
+                store.bump_identity_versions(ids)
+            except Exception as e:
+                print(f"⚠️  Tidak bisa menaikkan versi identitas: {e}")
+
+
+# ===== INVALIDASI SAAT COMMIT =====
+@event.listens_for(db.session, 'after_flush')
+def _collect_changed_peserta(session, flush_context):
+    changed = session.info.setdefault('identity_changed', set())
+    for obj in session.dirty:
+        if isinstance(obj, Peserta) and session.is_modified(obj):
+            changed.add(obj.id)
+    for obj in session.deleted:
+        if isinstance(obj, Peserta):
+            changed.add(obj.id)
+
+
+@event.listens_for(db.session, 'do_orm_execute')
+def _collect_bulk_peserta(orm_execute_state):
+    # Query.update()/delete() massal tidak melewati flush
+    if orm_execute_state.is_update or orm_execute_state.is_delete:
+        mapper = orm_execute_state.bind_mapper
+        if mapper is not None and mapper.class_ is Peserta:
+            orm_execute_state.session.info['identity_changed_all'] = True
+
+
+@event.listens_for(db.session, 'after_commit')
+def _invalidate_after_commit(session):
+    changed = session.info.pop('identity_changed', None)
+    if session.info.pop('identity_changed_all', False):
+        invalidate_identity()
+    elif changed:
+        invalidate_identity(changed)
+
+
+@event.listens_for(db.session, 'after_rollback')
+def _reset_after_rollback(session):
+    session.info.pop('identity_changed', None)
+    session.info.pop('identity_changed_all', None)
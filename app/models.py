@@ -1,11 +1,22 @@
 from flask_sqlalchemy import SQLAlchemy
-from werkzeug.security import generate_password_hash, check_password_hash
 from datetime import datetime
+from sqlalchemy import event, inspect as sa_inspect, update as sa_update
+from sqlalchemy.orm.attributes import set_committed_value
+from .password_hashing import hash_password, verify_password, needs_rehash
 
 db = SQLAlchemy()
 
 class Peserta(db.Model):
     __tablename__ = 'peserta'
+    __table_args__ = (
+        # Filter & urutan halaman admin (lihat app/schema.py untuk database lama)
+        db.Index('ix_peserta_status_tanggal', 'status_pembayaran', 'tanggal_daftar'),
+        db.Index('ix_peserta_akses_tanggal', 'akses_dokumen_bengkel', 'tanggal_daftar'),
+        db.Index('ix_peserta_tanggal_daftar', 'tanggal_daftar'),
+        # Keyset antrian verifikasi pembayaran
+        db.Index('ix_peserta_status_upload', 'status_pembayaran', 'tanggal_upload_bukti', 'id'),
+        db.Index('ix_peserta_upload', 'tanggal_upload_bukti', 'id'),
+    )
     id = db.Column(db.Integer, primary_key=True)
     nama = db.Column(db.String(100), nullable=False)
     whatsapp = db.Column(db.String(15), unique=True, nullable=False)
@@ -16,6 +27,9 @@ class Peserta(db.Model):
     status_pekerjaan = db.Column(db.String(50), nullable=True)
     alasan = db.Column(db.Text, nullable=True)
     batch = db.Column(db.String(50), default="Batch Baru")
+    # FK ke grup, disinkronkan otomatis dari string batch (lihat listener di bawah)
+    batch_id = db.Column(db.Integer, db.ForeignKey('batch.id'), nullable=True, index=True)
+    grup = db.relationship('Batch', foreign_keys=[batch_id])
     akses_workshop = db.Column(db.Boolean, default=False)
     akses_dokumen_bengkel = db.Column(db.Boolean, default=False)  # Izin akses dokumen bengkel
     status_pembayaran = db.Column(db.String(20), default="Belum")  # "Belum", "Lunas", "Ditolak"
@@ -24,14 +38,20 @@ class Peserta(db.Model):
     tanggal_izin_dokumen = db.Column(db.DateTime, nullable=True)  # Tanggal izin diberikan
     password_hash = db.Column(db.String(128), nullable=True)
     payment_proof = db.Column(db.String(255), nullable=True)
+    tanggal_upload_bukti = db.Column(db.DateTime, nullable=True)  # Masuk antrian verifikasi
     
     def set_password(self, password):
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = hash_password(password)
     
     def check_password(self, password):
+        """Verifikasi di pool hashing; hash dengan parameter lama diganti (caller commit)"""
         if not self.password_hash:
             return False
-        return check_password_hash(self.password_hash, password)
+        if not verify_password(self.password_hash, password):
+            return False
+        if needs_rehash(self.password_hash):
+            self.password_hash = hash_password(password)
+        return True
 
 class Batch(db.Model):
     __tablename__ = 'batch'
@@ -49,14 +69,24 @@ class Admin(db.Model):
     password_hash = db.Column(db.String(128), nullable=False)
     
     def set_password(self, password):
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = hash_password(password)
     
     def check_password(self, password):
-        return check_password_hash(self.password_hash, password)
+        """Verifikasi di pool hashing; hash dengan parameter lama diganti (caller commit)"""
+        if not verify_password(self.password_hash, password):
+            return False
+        if needs_rehash(self.password_hash):
+            self.password_hash = hash_password(password)
+        return True
 
 class DocumentAccess(db.Model):
     """Model untuk manage akses Dokumen Bengkel per group atau per individu"""
     __tablename__ = 'document_access'
+    __table_args__ = (
+        # Lookup akses per halaman admin & resolver akses
+        db.Index('ix_document_access_peserta_tipe', 'peserta_id', 'tipe_akses'),
+        db.Index('ix_document_access_batch_tipe', 'batch_id', 'tipe_akses'),
+    )
     id = db.Column(db.Integer, primary_key=True)
     
     # Tipe akses: "group" atau "individual"
@@ -91,6 +121,53 @@ class DocumentAccess(db.Model):
             return datetime.utcnow() <= self.tanggal_kadaluarsa
         return True
 
+class AccessEpoch(db.Model):
+    """Counter revokasi akses dokumen per peserta (peserta_id 0 = global/batch)"""
+    __tablename__ = 'access_epoch'
+    peserta_id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    epoch = db.Column(db.Integer, nullable=False, default=0)
+    tanggal_diubah = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+class ProofBlob(db.Model):
+    """File bukti transfer di penyimpanan content-addressed (nama = SHA-256 isi file)"""
+    __tablename__ = 'proof_blob'
+    sha256 = db.Column(db.String(64), primary_key=True)
+    ekstensi = db.Column(db.String(8), nullable=False)  # png / jpg / pdf
+    ukuran = db.Column(db.Integer, nullable=False)
+    tanggal_dibuat = db.Column(db.DateTime, default=datetime.utcnow)
+    # Diperbarui setiap upload yang memakai blob ini (GC memberi masa tenggang)
+    terakhir_dipakai = db.Column(db.DateTime, default=datetime.utcnow)
+    # Antrian thumbnail (app/thumbnails.py): "antri", "proses", "siap", "gagal"
+    status_thumbnail = db.Column(db.String(12), default='antri', index=True)
+    thumbnail_diklaim = db.Column(db.DateTime, nullable=True)
+
+class ProofReference(db.Model):
+    """Peserta yang memakai blob bukti transfer; blob tanpa referensi dihapus GC"""
+    __tablename__ = 'proof_reference'
+    __table_args__ = (
+        db.UniqueConstraint('peserta_id', 'sha256', name='uq_proof_reference_peserta_blob'),
+    )
+    id = db.Column(db.Integer, primary_key=True)
+    peserta_id = db.Column(db.Integer, db.ForeignKey('peserta.id'), nullable=False, index=True)
+    sha256 = db.Column(db.String(64), db.ForeignKey('proof_blob.sha256'), nullable=False, index=True)
+    nama_file = db.Column(db.String(255), nullable=True)  # Nama file asli dari user
+    tanggal_upload = db.Column(db.DateTime, default=datetime.utcnow)
+
+class ImportJob(db.Model):
+    """Job import CSV peserta di background (app/bulk_import.py); progres dibaca admin via polling"""
+    __tablename__ = 'import_job'
+    id = db.Column(db.Integer, primary_key=True)
+    nama_file = db.Column(db.String(255), nullable=True)
+    # "antri", "proses", "selesai", "gagal"
+    status = db.Column(db.String(12), default='antri', nullable=False)
+    perkiraan_baris = db.Column(db.Integer, default=0)  # jumlah baris data di file (dihitung saat upload)
+    diproses = db.Column(db.Integer, default=0)
+    berhasil = db.Column(db.Integer, default=0)
+    hasil = db.Column(db.Text, nullable=True)  # JSON ImportResult.to_dict() setelah selesai
+    error = db.Column(db.Text, nullable=True)
+    tanggal_dibuat = db.Column(db.DateTime, default=datetime.utcnow)
+    diperbarui = db.Column(db.DateTime, default=datetime.utcnow)
+
 class DocumentSyncLog(db.Model):
     """Log untuk tracking sinkronisasi Google Drive otomatis"""
     __tablename__ = 'document_sync_log'
@@ -109,4 +186,57 @@ class DocumentSyncLog(db.Model):
     error_message = db.Column(db.Text, nullable=True)
     
     # Durasi sync
-    durasi_detik = db.Column(db.Float, nullable=True)
\ No newline at end of file
+    durasi_detik = db.Column(db.Float, nullable=True)
+
+
+# ===== SINKRON batch_id DENGAN STRING LEGACY =====
+@event.listens_for(db.session, 'before_flush')
+def _sync_peserta_batch_id(session, flush_context, instances):
+    """Peserta baru/berubah batch: isi batch_id dari Batch.nama"""
+    for obj in list(session.new) + list(session.dirty):
+        if not isinstance(obj, Peserta):
+            continue
+        state = sa_inspect(obj)
+        if obj in session.new or state.attrs.batch.history.has_changes():
+            with session.no_autoflush:
+                obj.batch_id = session.query(Batch.id).filter(Batch.nama == obj.batch).scalar() if obj.batch else None
+
+
+@event.listens_for(db.session, 'after_flush')
+def _link_new_batches(session, flush_context):
+    """
+    Grup baru: tautkan peserta yang sudah memakai nama grup tersebut.
+    UPDATE Core tidak melewati flush, jadi peserta yang terkena dicatat untuk
+    invalidasi identitas & statistik saat commit (app/identity.py, app/stats.py)
+    dan objeknya di session ikut diperbarui.
+    """
+    for obj in session.new:
+        if not isinstance(obj, Batch):
+            continue
+        linked = set(session.connection().execute(
+            sa_update(Peserta.__table__)
+            .where(Peserta.__table__.c.batch == obj.nama, Peserta.__table__.c.batch_id.is_(None))
+            .values(batch_id=obj.id)
+            .returning(Peserta.__table__.c.id)
+        ).scalars())
+        if not linked:
+            continue
+        session.info.setdefault('identity_changed', set()).update(linked)
+        session.info['stats_dirty'] = True
+        in_session = [session.identity_map.get(session.identity_key(Peserta, peserta_id)) for peserta_id in linked]
+        in_session += [p for p in session.new if isinstance(p, Peserta) and p.id in linked]
+        for peserta in in_session:
+            if peserta is not None:
+                set_committed_value(peserta, 'batch_id', obj.id)
+                set_committed_value(peserta, 'grup', obj)
+
+
+# Status pembayaran antrian verifikasi
+ANTRIAN_PEMBAYARAN = ('Menunggu', 'Lunas', 'Ditolak')
+
+
+@event.listens_for(Peserta.status_pembayaran, 'set')
+def _masuk_antrian_pembayaran(target, value, oldvalue, initiator):
+    """Peserta yang masuk antrian tanpa upload (mis. diset admin) tetap punya posisi antrian"""
+    if value in ANTRIAN_PEMBAYARAN and target.tanggal_upload_bukti is None:
+        target.tanggal_upload_bukti = datetime.utcnow()
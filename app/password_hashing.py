@@ -0,0 +1,206 @@
+"""
+Layanan hashing password di luar thread request.
+
+Hash & verifikasi (scrypt/pbkdf2 werkzeug) dijalankan di process pool
+berukuran tetap per worker. Jumlah pekerjaan yang menunggu dibatasi
+(PASSWORD_HASH_QUEUE_MAX); jika antrian penuh lebih lama dari
+PASSWORD_HASH_TIMEOUT detik, HashingBusy dilempar supaya request gagal cepat
+alih-alih menumpuk. Metode & cost diatur lewat PASSWORD_HASH_METHOD
+(format werkzeug, mis. "scrypt:32768:8:1" atau "pbkdf2:sha256:600000");
+hash lama dengan parameter berbeda di-rehash saat login berhasil.
+
+Hash massal (import CSV) memakai pool terpisah (IMPORT_HASH_WORKERS
+proses, satu job bulk per worker) sehingga tidak pernah mengantre di depan
+login. Pool yang rusak (proses anak mati / OOM, BrokenProcessPool) dibuang
+dan dibuat ulang. Proses pool dibuat lewat forkserver/spawn, bukan fork dari
+worker gunicorn yang sudah punya thread (scheduler, worker thumbnail).
+
+Setiap worker gunicorn punya pool sendiri, jadi ukuran default dihitung dari
+bagian core per worker (cpu_count / WEB_CONCURRENCY): maksimal 2 proses login
+dan separuhnya untuk import. WEB_CONCURRENCY juga jumlah worker gunicorn di
+Dockerfile; PASSWORD_HASH_WORKERS / IMPORT_HASH_WORKERS mengganti default.
+"""
+
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from werkzeug.security import generate_password_hash, check_password_hash
+
+HASH_METHOD = os.getenv('PASSWORD_HASH_METHOD', 'scrypt:32768:8:1')
+# Core yang menjadi bagian satu worker web (semua worker berbagi mesin yang sama)
+CORES_PER_WORKER = max(1, (os.cpu_count() or 2) // max(1, int(os.getenv('WEB_CONCURRENCY', 1))))
+HASH_WORKERS = int(os.getenv('PASSWORD_HASH_WORKERS', min(2, CORES_PER_WORKER)))
+HASH_QUEUE_MAX = int(os.getenv('PASSWORD_HASH_QUEUE_MAX', 64))
+HASH_TIMEOUT = float(os.getenv('PASSWORD_HASH_TIMEOUT', 10))
+HASH_BULK_WORKERS = int(os.getenv('IMPORT_HASH_WORKERS', max(1, CORES_PER_WORKER // 2)))
+HASH_MP_CONTEXT = os.getenv(
+    'PASSWORD_HASH_MP_CONTEXT',
+    'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+)
+
+
+class HashingBusy(Exception):
+    """Antrian hashing penuh: server sedang sibuk memproses login lain"""
+
+
+def _method_prefix(method):
+    """Bagian parameter hash ('scrypt:32768:8:1') untuk metode yang dikonfigurasi"""
+    return generate_password_hash('', method).split('$', 1)[0]
+
+
+class PasswordHasher:
+    def __init__(self, method=HASH_METHOD, workers=HASH_WORKERS, queue_max=HASH_QUEUE_MAX, timeout=HASH_TIMEOUT,
+                 bulk_workers=HASH_BULK_WORKERS, mp_context=HASH_MP_CONTEXT):
+        self.method = method
+        self.workers = workers
+        self.bulk_workers = bulk_workers
+        self.mp_context = mp_context
+        self.timeout = timeout
+        self.prefix = _method_prefix(method)
+        self._slots = threading.BoundedSemaphore(workers + queue_max)
+        self._bulk_slot = threading.Lock()
+        self._lock = threading.Lock()
+        self._pools = {}  # 'login' / 'bulk' -> (pid, executor)
+        self.depth = 0
+        self.max_depth = 0
+        self.completed = 0
+        self.rejected = 0
+        self.busy_seconds = 0.0
+        self.bulk_completed = 0
+        self.bulk_seconds = 0.0
+        self.restarts = 0
+
+    def _executor(self, kind):
+        # Pool tidak boleh diwarisi lewat fork (gunicorn preload): buat ulang per proses
+        with self._lock:
+            pid, pool = self._pools.get(kind, (None, None))
+            if pool is None or pid != os.getpid():
+                pool = ProcessPoolExecutor(
+                    max_workers=self.workers if kind == 'login' else self.bulk_workers,
+                    mp_context=multiprocessing.get_context(self.mp_context)
+                )
+                self._pools[kind] = (os.getpid(), pool)
+            return pool
+
+    def _discard(self, kind, pool):
+        """Buang pool yang rusak; panggilan berikutnya membuat pool baru"""
+        with self._lock:
+            if self._pools.get(kind, (None, None))[1] is pool:
+                del self._pools[kind]
+                self.restarts += 1
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    def _call(self, kind, call):
+        """call(executor); dicoba sekali lagi di pool baru jika pool rusak"""
+        for attempt in range(2):
+            pool = self._executor(kind)
+            try:
+                return call(pool)
+            except BrokenProcessPool:
+                self._discard(kind, pool)
+                if attempt:
+                    raise
+
+    def _run(self, fn, *args):
+        if not self._slots.acquire(timeout=self.timeout):
+            with self._lock:
+                self.rejected += 1
+            raise HashingBusy()
+        start = time.perf_counter()
+        with self._lock:
+            self.depth += 1
+            self.max_depth = max(self.max_depth, self.depth)
+        try:
+            return self._call('login', lambda pool: pool.submit(fn, *args).result())
+        finally:
+            with self._lock:
+                self.depth -= 1
+                self.completed += 1
+                self.busy_seconds += time.perf_counter() - start
+            self._slots.release()
+
+    def hash(self, password):
+        return self._run(generate_password_hash, password, self.method)
+
+    def hash_many(self, passwords):
+        """
+        Hash banyak password sekaligus (import massal) di pool bulk terpisah.
+        Satu job bulk per worker; job berikutnya menunggu.
+        """
+        passwords = list(passwords)
+        if not passwords:
+            return []
+        chunksize = max(1, len(passwords) // (self.bulk_workers * 4))
+        with self._bulk_slot:
+            start = time.perf_counter()
+            hashes = self._call('bulk', lambda pool: list(pool.map(
+                generate_password_hash, passwords, [self.method] * len(passwords), chunksize=chunksize
+            )))
+            with self._lock:
+                self.bulk_completed += len(passwords)
+                self.bulk_seconds += time.perf_counter() - start
+        return hashes
+
+    def verify(self, pwhash, password):
+        if not pwhash:
+            return False
+        return self._run(check_password_hash, pwhash, password)
+
+    def needs_rehash(self, pwhash):
+        return bool(pwhash) and pwhash.split('$', 1)[0] != self.prefix
+
+    def stats(self):
+        with self._lock:
+            return {
+                'method': self.prefix,
+                'workers': self.workers,
+                'queue_depth': self.depth,
+                'max_queue_depth': self.max_depth,
+                'completed': self.completed,
+                'rejected': self.rejected,
+                'avg_ms': round(self.busy_seconds / self.completed * 1000, 1) if self.completed else 0,
+                'bulk_workers': self.bulk_workers,
+                'bulk_completed': self.bulk_completed,
+                'bulk_avg_ms': round(self.bulk_seconds / self.bulk_completed * 1000, 1) if self.bulk_completed else 0,
+                'pool_restarts': self.restarts,
+            }
+
+    def shutdown(self):
+        with self._lock:
+            pools, self._pools = self._pools, {}
+        for pid, pool in pools.values():
+            if pid == os.getpid():
+                pool.shutdown()
+
+
+_hasher = None
+_hasher_lock = threading.Lock()
+
+
+def get_hasher():
+    global _hasher
+    if _hasher is None:
+        with _hasher_lock:
+            if _hasher is None:
+                _hasher = PasswordHasher()
+    return _hasher
+
+
+def hash_password(password):
+    return get_hasher().hash(password)
+
+
+def verify_password(pwhash, password):
+    return get_hasher().verify(pwhash, password)
+
+
+def needs_rehash(pwhash):
+    return get_hasher().needs_rehash(pwhash)
+
+
+def get_hashing_stats():
+    return get_hasher().stats()
@@ -0,0 +1,104 @@
+"""
+Antrian verifikasi pembayaran dengan keyset pagination.
+
+Halaman diambil urut waktu upload bukti transfer (lalu id) lewat index
+(status_pembayaran, tanggal_upload_bukti, id). Status "menunggu" diurutkan
+dari yang paling lama menunggu (FIFO), status lain dari yang terbaru. Hanya
+kolom yang ditampilkan yang di-SELECT, bukan entity Peserta penuh.
+"""
+
+import base64
+import json
+from datetime import datetime
+
+from sqlalchemy import tuple_
+
+from .models import db, Peserta
+
+QUEUE_PAGE_SIZE = 50
+QUEUE_PAGE_MAX = 200
+
+QUEUE_STATUSES = {
+    'menunggu': ['Menunggu'],
+    'lunas': ['Lunas'],
+    'ditolak': ['Ditolak'],
+    'semua': ['Menunggu', 'Lunas', 'Ditolak'],
+}
+
+QUEUE_COLUMNS = (
+    Peserta.id,
+    Peserta.nama,
+    Peserta.whatsapp,
+    Peserta.batch,
+    Peserta.status_pembayaran,
+    Peserta.payment_proof,
+    Peserta.tanggal_upload_bukti,
+)
+
+
+def encode_cursor(uploaded_at, peserta_id):
+    """Token `after` opaque untuk posisi (tanggal_upload_bukti, id) terakhir di halaman"""
+    raw = json.dumps([uploaded_at.isoformat() if uploaded_at else None, peserta_id])
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(token):
+    """Kebalikan encode_cursor; None jika token kosong/tidak valid"""
+    if not token:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        uploaded_at, peserta_id = json.loads(raw.decode('utf-8'))
+        return (datetime.fromisoformat(uploaded_at), int(peserta_id))
+    except (ValueError, TypeError):
+        return None
+
+
+def page_limit(value):
+    """Normalisasi parameter limit dari query string"""
+    try:
+        limit = int(value)
+    except (TypeError, ValueError):
+        return QUEUE_PAGE_SIZE
+    return max(1, min(limit, QUEUE_PAGE_MAX))
+
+
+def queue_page(status, after=None, limit=QUEUE_PAGE_SIZE):
+    """
+    Satu halaman antrian untuk filter status. Return (rows, next_cursor);
+    rows adalah Row dengan atribut sesuai QUEUE_COLUMNS.
+    """
+    statuses = QUEUE_STATUSES.get(status, QUEUE_STATUSES['menunggu'])
+    oldest_first = status == 'menunggu'
+    key = tuple_(Peserta.tanggal_upload_bukti, Peserta.id)
+
+    query = db.session.query(*QUEUE_COLUMNS).filter(
+        Peserta.status_pembayaran.in_(statuses),
+        Peserta.tanggal_upload_bukti.isnot(None)
+    )
+    cursor = decode_cursor(after)
+    if cursor:
+        query = query.filter(key > cursor if oldest_first else key < cursor)
+    if oldest_first:
+        query = query.order_by(Peserta.tanggal_upload_bukti, Peserta.id)
+    else:
+        query = query.order_by(Peserta.tanggal_upload_bukti.desc(), Peserta.id.desc())
+
+    rows = query.limit(limit + 1).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1].tanggal_upload_bukti, rows[-1].id)
+    return rows, next_cursor
+
+
+def row_to_dict(row):
+    return {
+        'id': row.id,
+        'nama': row.nama,
+        'whatsapp': row.whatsapp,
+        'batch': row.batch,
+        'status_pembayaran': row.status_pembayaran,
+        'payment_proof': row.payment_proof,
+        'tanggal_upload_bukti': row.tanggal_upload_bukti.isoformat() if row.tanggal_upload_bukti else None,
+    }
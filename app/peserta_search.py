@@ -0,0 +1,175 @@
+"""
+Pencarian peserta untuk halaman admin lewat index FTS5 trigram.
+
+Tabel virtual `peserta_fts` (rowid = peserta.id) menyimpan nama, whatsapp,
+email dan nama_bengkel. Tokenizer trigram membuat pencarian substring
+(termasuk potongan akhir nomor WhatsApp) memakai index, bukan full scan
+ILIKE. Index dijaga oleh event mapper SQLAlchemy di bawah; insert massal
+lewat Core harus memanggil rebuild_index() atau index_rows().
+
+Nomor WhatsApp disimpan & dicari dalam bentuk dinormalisasi (hanya digit,
+tanpa awalan 0 / 62), jadi "0812-3456", "+62 8123456" dan "3456" cocok
+dengan nomor yang sama.
+
+Pencarian hanya di kolom yang diberikan pemanggil (mis. nama + whatsapp di
+kelola peserta). Input angka juga dicari di kolom teks (nomor peserta di
+nama, email, nama bengkel), dengan nomor WhatsApp yang cocok di urutan
+pertama. Input teks dipecah per kata; setiap kata harus ada di salah satu
+kolom (tidak harus berurutan seperti ILIKE lama).
+"""
+
+import re
+
+from sqlalchemy import Float, Integer, event, inspect, or_, text
+
+from .models import db, Peserta
+
+MIN_TRIGRAM = 3
+PHONE_CHARS = re.compile(r"^[\d\s+\-().]+$")
+
+CREATE_FTS = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS peserta_fts USING fts5("
+    "nama, whatsapp, email, nama_bengkel, tokenize='trigram')"
+)
+
+_INDEXED_FIELDS = ('nama', 'whatsapp', 'email', 'nama_bengkel')
+_fts_ready = {}
+
+
+def normalize_phone(value):
+    """Digit saja, tanpa awalan 0 atau 62"""
+    digits = re.sub(r"\D", "", value or "")
+    if digits.startswith('62'):
+        return digits[2:]
+    if digits.startswith('0'):
+        return digits[1:]
+    return digits
+
+
+def _fts_values(peserta_id, nama, whatsapp, email, nama_bengkel):
+    return {
+        'id': peserta_id,
+        'nama': nama or '',
+        'whatsapp': normalize_phone(whatsapp),
+        'email': email or '',
+        'nama_bengkel': nama_bengkel or '',
+    }
+
+
+def index_rows(conn, rows):
+    """Tulis ulang entri FTS untuk rows (id, nama, whatsapp, email, nama_bengkel)"""
+    values = [_fts_values(*row) for row in rows]
+    if not values:
+        return
+    conn.execute(text("DELETE FROM peserta_fts WHERE rowid = :id"), values)
+    conn.execute(text(
+        "INSERT INTO peserta_fts (rowid, nama, whatsapp, email, nama_bengkel) "
+        "VALUES (:id, :nama, :whatsapp, :email, :nama_bengkel)"
+    ), values)
+
+
+def rebuild_index(conn):
+    """Buat (jika perlu) dan isi ulang peserta_fts dari tabel peserta"""
+    conn.execute(text(CREATE_FTS))
+    conn.execute(text("DELETE FROM peserta_fts"))
+    rows = conn.execute(text("SELECT id, nama, whatsapp, email, nama_bengkel FROM peserta")).all()
+    index_rows(conn, rows)
+    _fts_ready.clear()
+    return len(rows)
+
+
+def fts_available(conn=None):
+    """True jika tabel peserta_fts ada (dicek sekali per engine)"""
+    bind = conn if conn is not None else db.engine
+    engine = getattr(bind, 'engine', bind)
+    key = str(engine.url)
+    if key not in _fts_ready:
+        _fts_ready[key] = inspect(bind).has_table('peserta_fts')
+    return _fts_ready[key]
+
+
+def _like_filter(query, text_value, columns):
+    pattern = f'%{text_value}%'
+    return query.filter(or_(*(column.ilike(pattern) for column in columns)))
+
+
+def _fts_columns(columns):
+    return [column.key for column in columns if column.key in _INDEXED_FIELDS]
+
+
+def _fts_phrase(value):
+    return '"{}"'.format(value.replace('"', '""'))
+
+
+def apply_search(query, text_value, columns=(Peserta.nama, Peserta.whatsapp)):
+    """
+    Filter + urutkan query Peserta berdasarkan relevansi pencarian di `columns`.
+    Fallback ILIKE untuk input terlalu pendek / database tanpa FTS5.
+    """
+    text_value = (text_value or '').strip()
+    if not text_value:
+        return query
+    fts_columns = _fts_columns(columns)
+
+    if PHONE_CHARS.match(text_value) and any(c.isdigit() for c in text_value):
+        digits = normalize_phone(text_value)
+        raw_digits = re.sub(r"\D", "", text_value)
+        if len(digits) < MIN_TRIGRAM or not fts_available():
+            return query.filter(or_(
+                *(column.ilike(f'%{digits if column.key == "whatsapp" else raw_digits}%') for column in columns)
+            ))
+        # WhatsApp (dinormalisasi) ATAU angka apa adanya di kolom teks
+        terms = []
+        if 'whatsapp' in fts_columns:
+            terms.append(f'whatsapp : {_fts_phrase(digits)}')
+        text_columns = [name for name in fts_columns if name != 'whatsapp']
+        if text_columns:
+            terms.append(f'{{{" ".join(text_columns)}}} : {_fts_phrase(raw_digits)}')
+        # Urutan: akhir nomor WA, bagian nomor WA, lalu kolom lain
+        ranked = text(
+            "SELECT rowid AS id, "
+            "CASE WHEN whatsapp LIKE '%' || :digits THEN 0 "
+            "WHEN whatsapp LIKE '%' || :digits || '%' THEN 1 ELSE 2 END "
+            "+ bm25(peserta_fts) * 1e-6 AS rank "
+            "FROM peserta_fts WHERE peserta_fts MATCH :match"
+        ).bindparams(digits=digits, match=" OR ".join(terms))
+    else:
+        tokens = re.findall(r"[^\W_]+(?:[.@'\-][^\W_]+)*", text_value)
+        long_tokens = [t for t in tokens if len(t) >= MIN_TRIGRAM]
+        if not long_tokens or not fts_available():
+            return _like_filter(query, text_value, columns)
+        match = f'{{{" ".join(fts_columns)}}} : (' + " AND ".join(_fts_phrase(t) for t in long_tokens) + ')'
+        ranked = text(
+            "SELECT rowid AS id, bm25(peserta_fts) AS rank FROM peserta_fts WHERE peserta_fts MATCH :match"
+        ).bindparams(match=match)
+        # Token < 3 karakter tidak ter-index trigram: saring di hasil FTS
+        for token in tokens:
+            if len(token) < MIN_TRIGRAM:
+                query = _like_filter(query, token, columns)
+
+    ranked = ranked.columns(id=Integer, rank=Float).subquery('peserta_rank')
+    return query.join(ranked, ranked.c.id == Peserta.id).order_by(ranked.c.rank)
+
+
+# ===== SINKRON INDEX LEWAT EVENT MAPPER =====
+def _index_target(connection, target):
+    if fts_available(connection):
+        index_rows(connection, [(target.id, target.nama, target.whatsapp, target.email, target.nama_bengkel)])
+
+
+@event.listens_for(Peserta, 'after_insert')
+def _peserta_inserted(mapper, connection, target):
+    _index_target(connection, target)
+
+
+@event.listens_for(Peserta, 'after_update')
+def _peserta_updated(mapper, connection, target):
+    state = inspect(target)
+    if any(state.attrs[field].history.has_changes() for field in _INDEXED_FIELDS):
+        _index_target(connection, target)
+
+
+@event.listens_for(Peserta, 'after_delete')
+def _peserta_deleted(mapper, connection, target):
+    if fts_available(connection):
+        connection.execute(text("DELETE FROM peserta_fts WHERE rowid = :id"), {'id': target.id})
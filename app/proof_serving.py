@@ -0,0 +1,85 @@
+"""
+Pengiriman file bukti transfer ke admin (dan pemiliknya).
+
+Dipakai route /bukti/<key>. Respons melalui send_file werkzeug mode
+conditional: ETag kuat dari SHA-256 blob, Last-Modified dari mtime, dan
+HTTP Range (PDF scan besar bisa dibuka per halaman / dilanjutkan).
+
+Di belakang reverse proxy, worker gunicorn tidak perlu ikut mengirim isi
+file ke klien yang lambat: dengan PROOF_SENDFILE=x-accel (nginx) atau
+x-sendfile (Apache/lighttpd) respons hanya berisi header, proxy yang
+mengirim file. Contoh nginx (PROOF_ACCEL_PREFIX default /_bukti/):
+
+    location /_bukti/ {
+        internal;
+        alias /app/instance/uploads/;
+    }
+"""
+
+import mimetypes
+import os
+
+from flask import Response, current_app, request, send_file
+
+from .proof_store import is_blob_key, proof_path
+
+PROOF_SENDFILE = os.getenv('PROOF_SENDFILE', '').lower()  # '', 'x-accel', 'x-sendfile'
+PROOF_ACCEL_PREFIX = os.getenv('PROOF_ACCEL_PREFIX', '/_bukti/')
+# Blob content-addressed tidak pernah berubah isinya
+PROOF_MAX_AGE = 31536000
+
+
+def _cache_headers(response, immutable):
+    response.cache_control.private = True
+    response.cache_control.public = False
+    if immutable:
+        response.cache_control.max_age = PROOF_MAX_AGE
+        response.cache_control.immutable = True
+    else:
+        response.cache_control.no_cache = True
+    return response
+
+
+def _offload(path, upload_folder, mimetype, etag, st, immutable):
+    """Respons tanpa body: proxy mengirim file (termasuk Range) lewat sendfile"""
+    response = Response(mimetype=mimetype)
+    if etag:
+        response.set_etag(etag)
+    response.last_modified = st.st_mtime
+    response = response.make_conditional(request)
+    if response.status_code == 304:
+        return _cache_headers(response, immutable)
+    if PROOF_SENDFILE == 'x-accel':
+        relative = os.path.relpath(path, upload_folder).replace(os.sep, '/')
+        response.headers['X-Accel-Redirect'] = PROOF_ACCEL_PREFIX.rstrip('/') + '/' + relative
+    else:
+        response.headers['X-Sendfile'] = path
+    return _cache_headers(response, immutable)
+
+
+def send_proof(payment_proof):
+    """
+    Response untuk file bukti transfer (blob key atau nama file lama).
+    None jika file tidak ada.
+    """
+    upload_folder = current_app.config['UPLOAD_FOLDER']
+    path = proof_path(upload_folder, payment_proof)
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+
+    immutable = is_blob_key(payment_proof)
+    etag = payment_proof.split('.', 1)[0] if immutable else None
+    mimetype = mimetypes.guess_type(path)[0] or 'application/octet-stream'
+
+    if PROOF_SENDFILE in ('x-accel', 'x-sendfile'):
+        return _offload(path, upload_folder, mimetype, etag, st, immutable)
+
+    # etag=sha256 (bukan hash mtime/ukuran bawaan werkzeug) agar sama di semua server
+    response = send_file(
+        path, mimetype=mimetype, conditional=True, etag=etag if etag else True,
+        last_modified=st.st_mtime, max_age=PROOF_MAX_AGE if immutable else None,
+        download_name=os.path.basename(path)
+    )
+    return _cache_headers(response, immutable)
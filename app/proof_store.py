@@ -0,0 +1,288 @@
+"""
+Penyimpanan bukti transfer content-addressed.
+
+Blob disimpan sebagai UPLOAD_FOLDER/proofs/<2 hex pertama>/<sha256>.<ext>:
+upload ulang/retry dengan isi sama hanya disimpan sekali, dan 256 direktori
+shard menjaga setiap direktori tetap kecil (±400 file per shard untuk
+100 ribu bukti) sehingga listing & backup inkremental tetap cepat.
+Thumbnail (app/thumbnails.py) disimpan di samping blob dan ikut dihapus GC.
+
+Tabel proof_blob mencatat blob, proof_reference menautkan peserta ke blob.
+Peserta.payment_proof berisi key blob ("<sha256>.<ext>"); nilai lama
+(peserta_<id>_<ts>_<nama>) tetap dibaca dari UPLOAD_FOLDER sampai diimport.
+
+CLI:
+    python -m app.proof_store gc [--dry-run] [--grace DETIK]
+    python -m app.proof_store import-legacy [--hapus-sisa]
+"""
+
+import hashlib
+import os
+import re
+import sys
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import and_
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from .models import db, Peserta, ProofBlob, ProofReference
+from .upload_pipeline import ProofSink, sniff_kind
+
+PROOF_DIR = 'proofs'
+# Blob/file tanpa referensi baru dihapus setelah masa tenggang ini (upload yang sedang berjalan aman)
+PROOF_GC_GRACE = int(os.getenv('PROOF_GC_GRACE', 3600))
+
+_BLOB_KEY = re.compile(r'^([0-9a-f]{64})\.(png|jpg|pdf)$')
+
+
+def blob_key(sha256, ekstensi):
+    return f"{sha256}.{ekstensi}"
+
+
+def is_blob_key(value):
+    return bool(value and _BLOB_KEY.match(value))
+
+
+def blob_path(upload_folder, key):
+    return os.path.join(upload_folder, PROOF_DIR, key[:2], key)
+
+
+def thumbnail_path(upload_folder, sha256, fmt):
+    """Thumbnail disimpan di samping blob: <sha256>.thumb.<webp|jpg>"""
+    return os.path.join(upload_folder, PROOF_DIR, sha256[:2], f"{sha256}.thumb.{fmt}")
+
+
+def proof_path(upload_folder, payment_proof):
+    """Path file untuk nilai Peserta.payment_proof (blob key atau nama file lama)"""
+    if is_blob_key(payment_proof):
+        return blob_path(upload_folder, payment_proof)
+    return os.path.join(upload_folder, os.path.basename(payment_proof))
+
+
+def _place_file(source, target):
+    """Pindahkan file ke path blob; jika blob sudah ada, buang source. Return True jika duplikat."""
+    if os.path.exists(target):
+        # Sentuh mtime supaya GC tidak menghapus blob yang baru dipakai lagi
+        os.utime(target)
+        os.unlink(source)
+        return True
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    os.replace(source, target)
+    return False
+
+
+def _record(peserta_id, sha256, ekstensi, ukuran, nama_file):
+    """Upsert blob & referensi peserta, lepas referensi bukti lama. Return key (caller commit)."""
+    now = datetime.utcnow()
+    db.session.execute(
+        sqlite_insert(ProofBlob.__table__).values(
+            sha256=sha256, ekstensi=ekstensi, ukuran=ukuran, tanggal_dibuat=now, terakhir_dipakai=now
+        ).on_conflict_do_update(index_elements=['sha256'], set_={'terakhir_dipakai': now})
+    )
+    db.session.execute(
+        sqlite_insert(ProofReference.__table__).values(
+            peserta_id=peserta_id, sha256=sha256, nama_file=nama_file, tanggal_upload=now
+        ).on_conflict_do_update(
+            index_elements=['peserta_id', 'sha256'], set_={'nama_file': nama_file, 'tanggal_upload': now}
+        )
+    )
+    db.session.execute(
+        ProofReference.__table__.delete().where(
+            ProofReference.peserta_id == peserta_id, ProofReference.sha256 != sha256
+        )
+    )
+    return blob_key(sha256, ekstensi)
+
+
+def store_proof(stage, sink, peserta, nama_file=None):
+    """
+    Simpan sink upload (app.upload_pipeline) sebagai blob bukti transfer
+    peserta dan set peserta.payment_proof. File object biasa (mis.
+    SpooledTemporaryFile werkzeug) disalin dulu lewat sink baru di stage,
+    jadi batas ukuran & cek magic bytes tetap berlaku.
+    Return (key, duplikat). Caller commit.
+    """
+    if not isinstance(sink, ProofSink):
+        source = sink
+        sink = stage.new_sink()
+        source.seek(0)
+        for block in iter(lambda: source.read(64 * 1024), b''):
+            sink.write(block)
+    sink.finish()
+    key = blob_key(sink.hexdigest, sink.kind)
+    duplicate = _place_file(sink.path, blob_path(stage.upload_folder, key))
+    stage.release(sink)
+    peserta.payment_proof = _record(peserta.id, sink.hexdigest, sink.kind, sink.size, nama_file)
+    return key, duplicate
+
+
+# ===== GARBAGE COLLECTION =====
+def _shards(root):
+    try:
+        return sorted(entry.name for entry in os.scandir(root) if entry.is_dir() and len(entry.name) == 2)
+    except FileNotFoundError:
+        return []
+
+
+def collect_garbage(upload_folder, grace=PROOF_GC_GRACE, dry_run=False):
+    """
+    Hapus referensi ke peserta yang sudah dihapus, blob tanpa referensi,
+    file di store yang tidak tercatat, dan sisa file sementara upload.
+    Return dict jumlah per kategori.
+    """
+    cutoff = datetime.utcnow() - timedelta(seconds=grace)
+    cutoff_ts = time.time() - grace
+    result = {'referensi': 0, 'blob': 0, 'file_liar': 0, 'tmp': 0, 'bytes': 0}
+
+    dangling = ProofReference.query.filter(~ProofReference.peserta_id.in_(db.session.query(Peserta.id)))
+    if dry_run:
+        result['referensi'] = dangling.count()
+    else:
+        result['referensi'] = dangling.delete(synchronize_session=False)
+        db.session.commit()
+
+    unreferenced = db.session.query(ProofBlob.sha256, ProofBlob.ekstensi, ProofBlob.ukuran).filter(
+        ProofBlob.terakhir_dipakai < cutoff,
+        ~ProofBlob.sha256.in_(db.session.query(ProofReference.sha256))
+    ).all()
+    for sha256, ekstensi, ukuran in unreferenced:
+        path = blob_path(upload_folder, blob_key(sha256, ekstensi))
+        if os.path.exists(path) and os.stat(path).st_mtime > cutoff_ts:
+            continue
+        if not dry_run:
+            # Cek ulang di statement DELETE: upload bisa menautkan blob ini sejak query di atas
+            deleted = ProofBlob.query.filter(
+                ProofBlob.sha256 == sha256,
+                ~ProofBlob.sha256.in_(db.session.query(ProofReference.sha256))
+            ).delete(synchronize_session=False)
+            db.session.commit()
+            if not deleted:
+                continue
+            try:
+                # Upload duplikat yang menyentuh file ini setelah pengecekan di atas menang
+                if os.stat(path).st_mtime <= cutoff_ts:
+                    os.unlink(path)
+            except FileNotFoundError:
+                pass
+            for fmt in ('webp', 'jpg'):
+                try:
+                    os.unlink(thumbnail_path(upload_folder, sha256, fmt))
+                except FileNotFoundError:
+                    pass
+        result['blob'] += 1
+        result['bytes'] += ukuran
+
+    # File di store tanpa baris proof_blob (mis. proses mati sebelum commit), per shard
+    root = os.path.join(upload_folder, PROOF_DIR)
+    for shard in _shards(root):
+        known = {
+            sha256 for (sha256,) in db.session.query(ProofBlob.sha256)
+            .filter(and_(ProofBlob.sha256 >= shard, ProofBlob.sha256 < shard + 'g'))
+        }
+        for entry in os.scandir(os.path.join(root, shard)):
+            # Blob & thumbnail-nya sama-sama diawali sha256
+            if entry.name.split('.', 1)[0] in known or entry.stat().st_mtime > cutoff_ts:
+                continue
+            result['file_liar'] += 1
+            result['bytes'] += entry.stat().st_size
+            if not dry_run:
+                os.unlink(entry.path)
+
+    tmp_dir = os.path.join(upload_folder, '.tmp')
+    if os.path.isdir(tmp_dir):
+        for entry in os.scandir(tmp_dir):
+            if entry.is_file() and entry.stat().st_mtime < cutoff_ts:
+                result['tmp'] += 1
+                if not dry_run:
+                    os.unlink(entry.path)
+    return result
+
+
+# ===== IMPORT FILE LAMA =====
+def _file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(64 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _legacy_kind(path):
+    with open(path, 'rb') as f:
+        kind = sniff_kind(f.read(16))
+    if kind is None:
+        ext = path.rsplit('.', 1)[-1].lower()
+        kind = 'jpg' if ext == 'jpeg' else ext
+    return kind if kind in ('png', 'jpg', 'pdf') else None
+
+
+def import_legacy(upload_folder, hapus_sisa=False):
+    """Pindahkan bukti lama (peserta_<id>_<ts>_<nama>) ke store. Return dict jumlah."""
+    from .identity import invalidate_identity
+
+    result = {'diimport': 0, 'duplikat': 0, 'hilang': 0, 'sisa_dihapus': 0}
+    rows = db.session.query(Peserta.id, Peserta.payment_proof).filter(Peserta.payment_proof.isnot(None)).all()
+    referenced = set()
+    for index, (peserta_id, payment_proof) in enumerate(rows, 1):
+        if is_blob_key(payment_proof):
+            continue
+        source = proof_path(upload_folder, payment_proof)
+        referenced.add(os.path.basename(source))
+        kind = _legacy_kind(source) if os.path.isfile(source) else None
+        if kind is None:
+            result['hilang'] += 1
+            continue
+        sha256 = _file_sha256(source)
+        size = os.path.getsize(source)
+        if _place_file(source, blob_path(upload_folder, blob_key(sha256, kind))):
+            result['duplikat'] += 1
+        key = _record(peserta_id, sha256, kind, size, payment_proof)
+        db.session.execute(Peserta.__table__.update().where(Peserta.id == peserta_id).values(payment_proof=key))
+        result['diimport'] += 1
+        if index % 500 == 0:
+            db.session.commit()
+    db.session.commit()
+    # UPDATE Core di atas tidak melewati listener identitas
+    invalidate_identity()
+
+    if hapus_sisa:
+        # Upload ulang/retry lama yang tidak dirujuk peserta mana pun
+        for entry in os.scandir(upload_folder):
+            if entry.is_file() and entry.name.startswith('peserta_') and entry.name not in referenced:
+                os.unlink(entry.path)
+                result['sisa_dihapus'] += 1
+    return result
+
+
+def main(argv):
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Penyimpanan bukti transfer content-addressed')
+    sub = parser.add_subparsers(dest='command', required=True)
+    gc = sub.add_parser('gc', help='Hapus blob & file bukti yang tidak dirujuk')
+    gc.add_argument('--dry-run', action='store_true')
+    gc.add_argument('--grace', type=int, default=PROOF_GC_GRACE, help='Masa tenggang dalam detik')
+    legacy = sub.add_parser('import-legacy', help='Pindahkan bukti lama ke store')
+    legacy.add_argument('--hapus-sisa', action='store_true', help='Hapus file lama yang tidak dirujuk peserta')
+    args = parser.parse_args(argv)
+
+    from app import create_app
+    app = create_app()
+    with app.app_context():
+        upload_folder = app.config['UPLOAD_FOLDER']
+        if args.command == 'gc':
+            result = collect_garbage(upload_folder, grace=args.grace, dry_run=args.dry_run)
+            label = 'akan dihapus' if args.dry_run else 'dihapus'
+            print(f"🧹 GC bukti transfer ({label}): {result['blob']} blob, {result['file_liar']} file liar, "
+                  f"{result['tmp']} file sementara, {result['referensi']} referensi, "
+                  f"{result['bytes'] / 1024 / 1024:.1f} MB")
+        else:
+            result = import_legacy(upload_folder, hapus_sisa=args.hapus_sisa)
+            print(f"✅ {result['diimport']} bukti lama diimport ({result['duplikat']} duplikat), "
+                  f"{result['hilang']} file hilang, {result['sisa_dihapus']} file sisa dihapus")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,110 @@
+"""
+Storage rate limit bersama antar worker gunicorn, tanpa layanan eksternal.
+
+Counter fixed-window Flask-Limiter disimpan di file SQLite (mode WAL) yang
+dibuka oleh setiap worker, sehingga limit "5 per minute" berlaku untuk
+semua worker sekaligus dan tidak hilang saat restart. Setiap increment
+adalah satu statement UPSERT ... RETURNING (atomik di SQLite), dengan
+koneksi autocommit per thread.
+
+Aktif lewat RATELIMIT_STORAGE_URI = "sqlite:///path/ke/ratelimit.db"
+(default di folder instance). "memory://" tetap bisa dipakai.
+"""
+
+import os
+import sqlite3
+import threading
+import time
+
+from limits.storage import Storage
+
+# Hapus counter kadaluarsa setiap N increment
+CLEANUP_EVERY = 1000
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS ratelimit (
+    key TEXT PRIMARY KEY,
+    count INTEGER NOT NULL,
+    expires REAL NOT NULL
+) WITHOUT ROWID
+"""
+
+_INCR = """
+INSERT INTO ratelimit (key, count, expires) VALUES (:key, :amount, :expires)
+ON CONFLICT (key) DO UPDATE SET
+    count = CASE WHEN ratelimit.expires <= :now THEN excluded.count ELSE ratelimit.count + excluded.count END,
+    expires = CASE WHEN ratelimit.expires <= :now THEN excluded.expires ELSE ratelimit.expires END
+RETURNING count
+"""
+
+
+class SQLiteStorage(Storage):
+    """Storage `limits` berbasis SQLite WAL (hanya strategi fixed-window)"""
+
+    STORAGE_SCHEME = ["sqlite"]
+
+    def __init__(self, uri=None, wrap_exceptions=False, **options):
+        super().__init__(uri, wrap_exceptions=wrap_exceptions, **options)
+        self.path = uri[len('sqlite://'):] if uri else ':memory:'
+        self._local = threading.local()
+        self._increments = 0
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    @property
+    def base_exceptions(self):
+        return sqlite3.Error
+
+    def _conn(self):
+        # Satu koneksi per thread per proses (koneksi tidak boleh melewati fork)
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode = WAL")
+            conn.execute("PRAGMA synchronous = NORMAL")
+            conn.execute(_SCHEMA)
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def incr(self, key, expiry, elastic_expiry=False, amount=1):
+        now = time.time()
+        conn = self._conn()
+        count = conn.execute(_INCR, {'key': key, 'amount': amount, 'expires': now + expiry, 'now': now}).fetchone()[0]
+        if elastic_expiry:
+            conn.execute("UPDATE ratelimit SET expires = ? WHERE key = ?", (now + expiry, key))
+        self._increments += 1
+        if self._increments % CLEANUP_EVERY == 0:
+            conn.execute("DELETE FROM ratelimit WHERE expires <= ?", (now,))
+        return count
+
+    def decr(self, key, amount=1):
+        row = self._conn().execute(
+            "UPDATE ratelimit SET count = MAX(count - ?, 0) WHERE key = ? AND expires > ? RETURNING count",
+            (amount, key, time.time())
+        ).fetchone()
+        return row[0] if row else 0
+
+    def get(self, key):
+        row = self._conn().execute(
+            "SELECT count FROM ratelimit WHERE key = ? AND expires > ?", (key, time.time())
+        ).fetchone()
+        return row[0] if row else 0
+
+    def get_expiry(self, key):
+        row = self._conn().execute("SELECT expires FROM ratelimit WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else time.time()
+
+    def check(self):
+        try:
+            self._conn().execute("SELECT 1")
+            return True
+        except sqlite3.Error:
+            return False
+
+    def reset(self):
+        return self._conn().execute("DELETE FROM ratelimit").rowcount
+
+    def clear(self, key):
+        self._conn().execute("DELETE FROM ratelimit WHERE key = ?", (key,))
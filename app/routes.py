@@ -1,7 +1,8 @@
+import io
 import os
 import json
-from flask import Blueprint, render_template, request, redirect, url_for, session, flash, jsonify
-from .models import db, Peserta, Batch, Admin
+from flask import Blueprint, render_template, request, redirect, url_for, session, flash, jsonify, Response, stream_with_context, send_file
+from .models import db, Peserta, Batch, Admin, ImportJob
 from werkzeug.utils import secure_filename
 from flask import current_app
 import time
@@ -9,7 +10,20 @@ import mimetypes
 from datetime import datetime
 from .security import rate_limit_login, validate_password_strength
 from flask_wtf.csrf import generate_csrf
-from . import documents_handler
+from . import documents_handler, export, bulk_import
+from .bulk_access import set_batch_workshop_access, grant_batch_document_access
+from .stats import peserta_stats, access_stats
+from .peserta_search import apply_search
+from .password_hashing import HashingBusy, get_hashing_stats
+from .identity import current_peserta
+from .upload_pipeline import UploadRejected, begin_proof_upload
+from .proof_store import store_proof, is_blob_key
+from .thumbnails import find_thumbnail, notify_worker
+from .proof_serving import send_proof
+from .payment_queue import QUEUE_STATUSES, queue_page, page_limit, row_to_dict
+from .document_access import (
+    check_document_access, bump_access_epoch
+)
 
 # Add helper function
 def validate_input_length(value, field_name, max_length=255):
@@ -62,13 +76,17 @@ def login():
                 flash('Password salah!')
                 return render_template('user/login.html')
             
-            # Login berhasil
+            # Login berhasil (simpan hash baru jika parameter hashing berubah)
+            db.session.commit()
             # Regenerate session after login
             session.clear()  # ✅ Clear old session
             session['user_id'] = peserta.id
-            session['nama'] = peserta.nama
-            session['akses_workshop'] = peserta.akses_workshop
+            # Klaim akses Dokumen Bengkel bertanda tangan untuk browsing katalog
+            check_document_access(peserta.id)
             return redirect('/dashboard')
+        except HashingBusy:
+            flash('Server sedang sibuk, silakan coba login lagi sebentar.')
+            return render_template('user/login.html'), 503
         except Exception as e:
             print(f"❌ Error dalam login: {e}")
             flash('Terjadi kesalahan saat login. Silakan coba lagi.')
@@ -82,7 +100,7 @@ def dashboard():
     if 'user_id' not in session:
         return redirect('/login')
     
-    peserta = Peserta.query.get(session['user_id'])
+    peserta = current_peserta()
     # simple weekly schedule reminder (static for now)
     weekly_schedule = [
         {'day': 'Senin', 'time': '19:00', 'topic': 'Sesi 1'},
@@ -93,23 +111,23 @@ def dashboard():
     return render_template('user/dashboard.html', peserta=peserta, weekly_schedule=weekly_schedule, categories=categories)
 
 
-ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'pdf'}
-
-def allowed_file(filename):
-    return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
-
-
 @main.route('/dashboard/upload-payment', methods=['POST'])
 def upload_payment():
+    stage = None
     try:
         if 'user_id' not in session:
             return redirect('/login')
 
-        peserta = Peserta.query.get(session['user_id'])
+        peserta = current_peserta()
         if not peserta:
             flash('Peserta tidak ditemukan')
             return redirect('/dashboard')
 
+        # ✅ Tolak dari Content-Length sebelum body dibaca; file ditulis streaming
+        # ke file sementara sambil dicek magic bytes & ukurannya
+        upload_folder = current_app.config['UPLOAD_FOLDER']
+        stage = begin_proof_upload(request, upload_folder)
+
         if 'proof' not in request.files:
             flash('File bukti transfer tidak ditemukan')
             return redirect('/dashboard')
@@ -119,51 +137,34 @@ def upload_payment():
             flash('Nama file kosong')
             return redirect('/dashboard')
 
-        # ✅ Validate MIME type
-        if file and allowed_file(file.filename):
-            mime_type = file.content_type
-            allowed_mimes = ['image/png', 'image/jpeg', 'application/pdf']
-            
-            if mime_type not in allowed_mimes:
-                flash(f'File type tidak diizinkan: {mime_type}')
-                return redirect('/dashboard')
-            
-            # ✅ Also check file size (max 5MB)
-            file.seek(0, 2)  # Seek to end
-            file_size = file.tell()
-            file.seek(0)  # Reset to start
-            
-            if file_size > 5 * 1024 * 1024:  # 5MB
-                flash('File terlalu besar (max 5MB)')
-                return redirect('/dashboard')
-            
-            # ✅ Ensure upload folder exists
-            upload_folder = current_app.config['UPLOAD_FOLDER']
-            os.makedirs(upload_folder, exist_ok=True)
-            
-            filename = secure_filename(file.filename)
-            timestamp = int(time.time())
-            saved_name = f"peserta_{peserta.id}_{timestamp}_{filename}"
-            save_path = os.path.join(upload_folder, saved_name)
-            
-            # ✅ Validate path (prevent directory traversal)
-            if not os.path.abspath(save_path).startswith(os.path.abspath(upload_folder)):
-                flash('Path traversal terdeteksi!')
-                return redirect('/dashboard')
-            
-            file.save(save_path)
-            peserta.payment_proof = saved_name
-            peserta.status_pembayaran = 'Menunggu'
-            db.session.commit()
-            flash('Bukti transfer berhasil diunggah. Status: Menunggu verifikasi.')
-            return redirect('/dashboard')
-        else:
-            flash('Format file tidak didukung. Gunakan png/jpg/pdf')
-            return redirect('/dashboard')
+        # Disimpan per SHA-256 isi file (upload ulang yang sama tidak menambah file);
+        # ekstensi dari magic bytes, bukan dari nama/content_type kiriman klien
+        key, duplicate = store_proof(stage, file.stream, peserta, secure_filename(file.filename) or None)
+        peserta.tanggal_upload_bukti = datetime.utcnow()
+        peserta.status_pembayaran = 'Menunggu'
+        db.session.commit()
+        print(f"✅ Bukti transfer peserta {peserta.id}: {key}{' (duplikat)' if duplicate else ''}")
+        if not duplicate:
+            notify_worker()
+        flash('Bukti transfer berhasil diunggah. Status: Menunggu verifikasi.')
+        return redirect('/dashboard')
+    except UploadRejected as e:
+        flash(str(e))
+        return redirect('/dashboard')
     except Exception as e:
         print(f"❌ Error dalam upload payment: {e}")
         flash('Terjadi kesalahan saat upload file. Silakan coba lagi.')
         return redirect('/dashboard')
+    finally:
+        if stage is not None:
+            stage.cleanup()
+
+
+@main.app_errorhandler(UploadRejected)
+def upload_rejected(e):
+    """Upload ditolak sebelum view berjalan (hook stage upload / parsing form saat cek CSRF)"""
+    flash(str(e))
+    return redirect('/dashboard')
 
 
 @main.route('/dashboard/profile', methods=['GET', 'POST'])
@@ -171,7 +172,7 @@ def profile():
     if 'user_id' not in session:
         return redirect('/login')
 
-    peserta = Peserta.query.get(session['user_id'])
+    peserta = current_peserta()
     if request.method == 'POST':
         peserta.nama_bengkel = request.form.get('nama_bengkel', peserta.nama_bengkel)
         peserta.alamat_bengkel = request.form.get('alamat_bengkel', peserta.alamat_bengkel)
@@ -189,7 +190,7 @@ def change_password():
         if 'user_id' not in session:
             return redirect('/login')
 
-        peserta = Peserta.query.get(session['user_id'])
+        peserta = current_peserta()
         if not peserta:
             flash('Peserta tidak ditemukan')
             return redirect('/dashboard')
@@ -232,7 +233,8 @@ def change_password():
 # === DOKUMEN WORKSHOP (HANYA JIKA AKSES = TRUE) ===
 @main.route('/workshop')
 def workshop():
-    if 'user_id' not in session or not session.get('akses_workshop', False):
+    peserta = current_peserta() if 'user_id' in session else None
+    if not peserta or not peserta.akses_workshop:
         flash('Akses workshop manual hanya untuk peserta premium.')
         return redirect('/dashboard')
     
@@ -276,6 +278,7 @@ def admin_do_login():
         admin = Admin.query.filter_by(username=username).first()
         
         if admin and admin.check_password(password):
+            db.session.commit()  # Simpan hash baru jika parameter hashing berubah
             session.clear()  # Clear session lama
             session['admin'] = True
             session['admin_username'] = username
@@ -283,6 +286,9 @@ def admin_do_login():
         else:
             flash('Login admin gagal! Username atau password salah.')
             return redirect('/admin')
+    except HashingBusy:
+        flash('Server sedang sibuk, silakan coba login lagi sebentar.')
+        return redirect('/admin')
     except Exception as e:
         print(f"❌ Error dalam admin login: {e}")
         flash('Terjadi kesalahan saat login. Silakan coba lagi.')
@@ -294,22 +300,16 @@ def admin_dashboard():
     if not session.get('admin'):
         return redirect('/admin')
     
-    total_peserta = Peserta.query.count()
-    belum_bayar = Peserta.query.filter_by(status_pembayaran='Belum').count()
+    stats = peserta_stats()
     batches = Batch.query.all()
     
     return render_template('admin/dashboard.html',
-                          total_peserta=total_peserta,
-                          belum_bayar=belum_bayar,
+                          total_peserta=stats['total'],
+                          belum_bayar=stats['belum_bayar'],
                           batches=batches)
 
 # === ADMIN: KELOLA PESERTA ===
-@main.route('/admin/peserta')
-def kelola_peserta():
-    if not session.get('admin'):
-        return redirect('/admin')
-    
-    status = request.args.get('status', 'semua')
+def _validated_peserta_search():
     search = request.args.get('search', '').strip()
     
     # ✅ Validate search input
@@ -322,11 +322,11 @@ def kelola_peserta():
         if not all(c.isalnum() or c in ' -_' for c in search):
             flash('Search hanya bisa berisi huruf, angka, spasi, dash, underscore')
             search = ''
-    
-    # Add pagination
-    page = request.args.get('page', 1, type=int)
-    per_page = 50
-    
+    return search
+
+
+def _filtered_peserta_query(status, search):
+    """Filter status pembayaran + search yang dipakai kelola_peserta dan export"""
     query = Peserta.query
     
     # Filter by payment status
@@ -339,18 +339,125 @@ def kelola_peserta():
     elif status == 'ditolak':
         query = query.filter_by(status_pembayaran='Ditolak')
     
-    # Search by name or phone
+    # Search by name or phone (index trigram, diurutkan relevansi)
     if search:
-        query = query.filter(
-            (Peserta.nama.ilike(f'%{search}%')) |
-            (Peserta.whatsapp.ilike(f'%{search}%'))
-        )
+        query = apply_search(query, search)
+    return query
+
+
+@main.route('/admin/peserta')
+def kelola_peserta():
+    if not session.get('admin'):
+        return redirect('/admin')
+    
+    status = request.args.get('status', 'semua')
+    search = _validated_peserta_search()
+    
+    # Add pagination
+    page = request.args.get('page', 1, type=int)
+    per_page = 50
     
-    peserta_list = query.paginate(page=page, per_page=per_page)
-    total = Peserta.query.count()
+    query = _filtered_peserta_query(status, search)
+    
+    stats = peserta_stats()
+    if search or status in ('belum', 'menunggu', 'lunas', 'ditolak'):
+        # Filter/search: COUNT sungguhan, statistik agregat hanya cache per worker
+        peserta_list = query.paginate(page=page, per_page=per_page)
+    else:
+        # Tanpa filter: total halaman dari statistik agregat, tanpa COUNT tambahan
+        peserta_list = query.paginate(page=page, per_page=per_page, count=False)
+        peserta_list.total = stats['total']
+    total = stats['total']
     
     return render_template('admin/kelola_peserta.html', peserta=peserta_list.items, pagination=peserta_list, current_page=page, status_filter=status, search=search, total=total, csrf_token=generate_csrf())
 
+@main.route('/admin/peserta/export')
+def export_peserta():
+    """Export streaming peserta + akses dokumen: ?format=csv|xlsx, filter sama dengan kelola_peserta"""
+    if not session.get('admin'):
+        return redirect('/admin')
+    
+    status = request.args.get('status', 'semua')
+    search = _validated_peserta_search()
+    export_format = request.args.get('format', 'csv')
+    
+    rows = export.export_rows(_filtered_peserta_query(status, search))
+    stamp = datetime.now().strftime('%Y%m%d_%H%M')
+    
+    if export_format == 'xlsx':
+        response = Response(
+            stream_with_context(export.xlsx_stream(rows)),
+            mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+        )
+        filename = f'peserta_{stamp}.xlsx'
+    else:
+        chunks = export.csv_stream(rows)
+        response_headers = {}
+        if 'gzip' in request.headers.get('Accept-Encoding', '') and request.args.get('gzip', '1') != '0':
+            chunks = export.gzip_stream(chunks)
+            response_headers['Content-Encoding'] = 'gzip'
+        response = Response(
+            stream_with_context(chunks),
+            mimetype='text/csv; charset=utf-8',
+            headers=response_headers
+        )
+        filename = f'peserta_{stamp}.csv'
+    
+    response.headers['Content-Disposition'] = f'attachment; filename="{filename}"'
+    response.headers['Vary'] = 'Accept-Encoding'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
+@main.route('/admin/peserta/import', methods=['POST'])
+def import_peserta():
+    """Mulai import massal peserta dari file CSV (field `file`) sebagai job background"""
+    if not session.get('admin'):
+        return jsonify({'error': 'Unauthorized'}), 401
+    
+    file = request.files.get('file')
+    if not file or file.filename == '':
+        return jsonify({'error': 'File CSV tidak ditemukan'}), 400
+    if not file.filename.lower().endswith('.csv'):
+        return jsonify({'error': 'Format file harus .csv'}), 400
+    
+    default_batch = request.form.get('batch', '').strip() or 'Batch Baru'
+    job, token = bulk_import.start_import_job(
+        current_app._get_current_object(), file.stream, secure_filename(file.filename), default_batch
+    )
+    print(f"📥 Import peserta #{job.id} dimulai: {job.perkiraan_baris} baris")
+    return jsonify({
+        'job_id': job.id,
+        'perkiraan_baris': job.perkiraan_baris,
+        'status_url': url_for('main.import_peserta_status', job_id=job.id),
+        # Token hanya ada di respons ini; tidak disimpan di database
+        'credentials_url': url_for('main.import_peserta_credentials', job_id=job.id, token=token)
+    }), 202
+
+@main.route('/admin/peserta/import/<int:job_id>')
+def import_peserta_status(job_id):
+    """Progres job import; hasil per baris (dan password awal, sekali) setelah selesai"""
+    if not session.get('admin'):
+        return jsonify({'error': 'Unauthorized'}), 401
+    
+    job = db.session.get(ImportJob, job_id)
+    if job is None:
+        return jsonify({'error': 'Job tidak ditemukan'}), 404
+    return jsonify(bulk_import.job_status(job))
+
+@main.route('/admin/peserta/import/<int:job_id>/kredensial')
+def import_peserta_credentials(job_id):
+    """CSV password awal yang dibuat job import (dengan token dari respons upload, selama TTL)"""
+    if not session.get('admin'):
+        return jsonify({'error': 'Unauthorized'}), 401
+    
+    path = bulk_import.credentials_file(current_app, job_id, request.args.get('token', ''))
+    if path is None:
+        return jsonify({'error': 'File password awal tidak ditemukan atau sudah kedaluwarsa'}), 404
+    response = send_file(path, mimetype='text/csv', as_attachment=True,
+                         download_name=f'password_awal_import_{job_id}.csv', max_age=0)
+    response.headers['Cache-Control'] = 'no-store'
+    return response
+
 @main.route('/admin/peserta/<int:id>')
 def peserta_detail(id):
     if not session.get('admin'):
@@ -380,6 +487,8 @@ def edit_peserta(id):
         peserta.akses_workshop = 'akses_workshop' in request.form
         
         db.session.commit()
+        # Batch bisa berubah, begitu juga akses dokumen via grup
+        bump_access_epoch(peserta.id)
         flash(f'Data peserta {peserta.nama} berhasil diperbarui!')
         return redirect(f'/admin/peserta/{id}')
     
@@ -417,6 +526,7 @@ def toggle_akses_dokumen(id):
             status_msg = 'DICABUT'
 
         db.session.commit()
+        bump_access_epoch(peserta.id)
         flash(f"Akses Dokumen Bengkel {peserta.nama} {status_msg}")
         return redirect(f'/admin/peserta/{id}')
     except Exception as e:
@@ -440,11 +550,7 @@ def dokumen_permission():
     
     # Filter search
     if search:
-        query = query.filter(
-            (Peserta.nama.ilike(f'%{search}%')) |
-            (Peserta.whatsapp.ilike(f'%{search}%')) |
-            (Peserta.email.ilike(f'%{search}%'))
-        )
+        query = apply_search(query, search, (Peserta.nama, Peserta.whatsapp, Peserta.email))
     
     # Filter akses
     if filter_akses == 'memiliki':
@@ -452,16 +558,22 @@ def dokumen_permission():
     elif filter_akses == 'tidak':
         query = query.filter_by(akses_dokumen_bengkel=False)
     
-    # Pagination
-    peserta_list = query.order_by(Peserta.tanggal_daftar.desc()).paginate(page=page, per_page=50)
+    # Pagination (tanpa search & filter, total diambil dari statistik agregat)
+    stats = peserta_stats()
+    query = query.order_by(Peserta.tanggal_daftar.desc())
+    if search or filter_akses in ('memiliki', 'tidak'):
+        peserta_list = query.paginate(page=page, per_page=50)
+    else:
+        peserta_list = query.paginate(page=page, per_page=50, count=False)
+        peserta_list.total = stats['total']
     
     return render_template('admin/dokumen_permission.html',
                          peserta_list=peserta_list,
                          search=search,
                          filter_akses=filter_akses,
-                         total_peserta=Peserta.query.count(),
-                         peserta_dengan_akses=Peserta.query.filter_by(akses_dokumen_bengkel=True).count(),
-                         peserta_tanpa_akses=Peserta.query.filter_by(akses_dokumen_bengkel=False).count())
+                         total_peserta=stats['total'],
+                         peserta_dengan_akses=stats['dengan_akses'],
+                         peserta_tanpa_akses=stats['tanpa_akses'])
 
 @main.route('/admin/peserta/<int:id>/hapus', methods=['POST'])
 def hapus_peserta(id):
@@ -472,6 +584,7 @@ def hapus_peserta(id):
     nama = peserta.nama
     db.session.delete(peserta)
     db.session.commit()
+    bump_access_epoch(id)
     flash(f'Peserta {nama} berhasil dihapus!')
     return redirect('/admin/peserta')
 
@@ -492,14 +605,9 @@ def toggle_akses_grup(id):
             flash('Akses hanya untuk admin!')
             return redirect('/admin')
         grup = Batch.query.get_or_404(id)
-        grup.akses_workshop_default = not grup.akses_workshop_default
-        db.session.commit()
-        # Apply group access setting to all peserta in this grup
-        peserta_list = Peserta.query.filter_by(batch=grup.nama).all()
-        for p in peserta_list:
-            p.akses_workshop = grup.akses_workshop_default
-        db.session.commit()
-        flash(f"Akses workshop untuk grup '{grup.nama}' diubah menjadi {'Aktif' if grup.akses_workshop_default else 'Non-Aktif'} dan diterapkan ke peserta grup.")
+        # Flag grup + semua anggota dalam satu UPDATE massal
+        affected = set_batch_workshop_access(grup, not grup.akses_workshop_default)
+        flash(f"Akses workshop untuk grup '{grup.nama}' diubah menjadi {'Aktif' if grup.akses_workshop_default else 'Non-Aktif'} dan diterapkan ke {affected} peserta grup.")
         return redirect('/admin/dashboard')
     except Exception as e:
         db.session.rollback()
@@ -514,19 +622,74 @@ def verifikasi_pembayaran():
         return redirect('/admin')
     
     status = request.args.get('status', 'menunggu')
+    if status not in QUEUE_STATUSES:
+        status = 'semua'
     
-    query = Peserta.query
-    if status == 'menunggu':
-        query = query.filter_by(status_pembayaran='Menunggu')
-    elif status == 'lunas':
-        query = query.filter_by(status_pembayaran='Lunas')
-    elif status == 'ditolak':
-        query = query.filter_by(status_pembayaran='Ditolak')
-    else:
-        query = query.filter(Peserta.status_pembayaran.in_(['Menunggu', 'Lunas', 'Ditolak']))
+    # Keyset pagination: ?after=<token>&limit=<n>, ?format=json untuk varian JSON
+    after = request.args.get('after')
+    peserta_list, next_cursor = queue_page(status, after=after, limit=page_limit(request.args.get('limit')))
     
-    peserta_list = query.all()
-    return render_template('admin/verifikasi_pembayaran.html', peserta=peserta_list, status_filter=status, csrf_token=generate_csrf())
+    if request.args.get('format') == 'json':
+        return jsonify({
+            'status': status,
+            'items': [row_to_dict(p) for p in peserta_list],
+            'next_cursor': next_cursor
+        })
+    
+    return render_template('admin/verifikasi_pembayaran.html',
+                           peserta=peserta_list,
+                           status_filter=status,
+                           next_cursor=next_cursor,
+                           is_first_page=not after,
+                           csrf_token=generate_csrf())
+
+# Placeholder selama thumbnail belum dibuat worker (tidak di-cache browser)
+THUMBNAIL_PLACEHOLDER = (
+    '<svg xmlns="http://www.w3.org/2000/svg" width="160" height="160" viewBox="0 0 160 160">'
+    '<rect width="160" height="160" fill="#eee"/>'
+    '<text x="80" y="88" font-size="20" text-anchor="middle" fill="#999">{label}</text></svg>'
+)
+
+main.add_app_template_global(is_blob_key, 'is_proof_blob')
+
+
+@main.route('/bukti/<key>')
+def bukti_transfer(key):
+    """File bukti transfer untuk admin atau peserta pemiliknya (Range/ETag, sendfile via proxy)"""
+    if not session.get('admin'):
+        peserta = current_peserta() if 'user_id' in session else None
+        if peserta is None or peserta.payment_proof != key:
+            return redirect('/admin' if peserta is None else '/dashboard')
+    if not is_blob_key(key) and secure_filename(key) != key:
+        return 'Not found', 404
+
+    response = send_proof(key)
+    if response is None:
+        return 'Not found', 404
+    return response
+
+
+@main.route('/admin/pembayaran/thumbnail/<key>')
+def thumbnail_bukti(key):
+    """Thumbnail bukti transfer; immutable karena URL berisi hash isi file"""
+    if not session.get('admin'):
+        return redirect('/admin')
+    if not is_blob_key(key):
+        return 'Not found', 404
+
+    found = find_thumbnail(current_app.config['UPLOAD_FOLDER'], key.split('.', 1)[0])
+    if found is None:
+        label = 'PDF' if key.endswith('.pdf') else '⏳'
+        response = Response(THUMBNAIL_PLACEHOLDER.format(label=label), mimetype='image/svg+xml')
+        response.headers['Cache-Control'] = 'no-cache'
+        return response
+
+    path, mimetype = found
+    response = send_file(path, mimetype=mimetype, conditional=True, etag=True, max_age=31536000)
+    response.cache_control.private = True
+    response.cache_control.public = False
+    response.cache_control.immutable = True
+    return response
 
 @main.route('/admin/peserta/<int:id>/verifikasi', methods=['POST'])
 def verifikasi_status(id):
@@ -633,43 +796,10 @@ def documents():
     if 'user_id' not in session:
         return redirect('/login')
     
-    from .models import DocumentAccess
-    
-    peserta = Peserta.query.get(session['user_id'])
-    
-    # Check permission - cek both legacy akses_dokumen_bengkel dan DocumentAccess
-    has_access = False
-    access_reason = ""
-    
-    # 1. Check individual access dari DocumentAccess
-    individual_access = DocumentAccess.query.filter_by(
-        peserta_id=peserta.id,
-        tipe_akses='individual'
-    ).first()
-    
-    if individual_access and individual_access.is_aktif():
-        has_access = True
-        access_reason = "Individual"
-    
-    # 2. Check group access dari DocumentAccess
-    if not has_access and peserta.batch:
-        batch = Batch.query.filter_by(nama=peserta.batch).first()
-        if batch:
-            group_access = DocumentAccess.query.filter_by(
-                batch_id=batch.id,
-                tipe_akses='group'
-            ).first()
-            
-            if group_access and group_access.is_aktif():
-                has_access = True
-                access_reason = f"Batch: {peserta.batch}"
+    # Klaim session (tanpa query), atau satu query join untuk individual, batch dan legacy
+    access = check_document_access(session['user_id'])
     
-    # 3. Check legacy field (backward compatibility)
-    if not has_access and peserta.akses_dokumen_bengkel:
-        has_access = True
-        access_reason = "Legacy"
-    
-    if not has_access:
+    if not access or not access.allowed:
         flash('Anda tidak memiliki izin akses Dokumen Bengkel. Hubungi admin untuk mendapatkan akses.', 'warning')
         return redirect('/dashboard')
     
@@ -677,12 +807,13 @@ def documents():
     catalog = documents_handler.get_documents_catalog()
     root_list = documents_handler.get_root_list()
     
+    # access membawa nama & akses_dokumen_bengkel untuk sapaan di template
     return render_template('user/documents.html', 
-                         peserta=peserta,
+                         peserta=access,
                          catalog=catalog,
                          root_list=root_list,
                          has_access=True,
-                         access_reason=access_reason)
+                         access_reason=access.reason)
 
 
 @main.route('/documents/folder/<folder_id>')
@@ -691,53 +822,37 @@ def documents_folder(folder_id):
     if 'user_id' not in session:
         return redirect('/login')
     
-    from .models import DocumentAccess
-    
-    peserta = Peserta.query.get(session['user_id'])
-    
-    # Check permission - same as /documents route
-    has_access = False
-    
-    # 1. Check individual access dari DocumentAccess
-    individual_access = DocumentAccess.query.filter_by(
-        peserta_id=peserta.id,
-        tipe_akses='individual'
-    ).first()
-    
-    if individual_access and individual_access.is_aktif():
-        has_access = True
-    
-    # 2. Check group access dari DocumentAccess
-    if not has_access and peserta.batch:
-        batch = Batch.query.filter_by(nama=peserta.batch).first()
-        if batch:
-            group_access = DocumentAccess.query.filter_by(
-                batch_id=batch.id,
-                tipe_akses='group'
-            ).first()
-            
-            if group_access and group_access.is_aktif():
-                has_access = True
-    
-    # 3. Check legacy field
-    if not has_access and peserta.akses_dokumen_bengkel:
-        has_access = True
-    
-    if not has_access:
+    access = check_document_access(session['user_id'])
+    if not access or not access.allowed:
         flash('Anda tidak memiliki izin akses Dokumen Bengkel.', 'warning')
         return redirect('/dashboard')
     
-    folder_name, items = documents_handler.get_folder_contents(folder_id)
+    # Keyset pagination: ?after=<token>&limit=<n>, ?format=json untuk varian JSON
+    after = request.args.get('after')
+    folder_name, items, next_cursor = documents_handler.get_folder_page(
+        folder_id, after=after, limit=request.args.get('limit')
+    )
+    
+    if request.args.get('format') == 'json':
+        if folder_name is None:
+            return jsonify({'error': 'Katalog tidak tersedia'}), 503
+        return jsonify({
+            'folder_id': folder_id,
+            'folder_name': folder_name,
+            'items': items,
+            'next_cursor': next_cursor
+        })
     
     if folder_name is None:
         flash('Folder tidak ditemukan')
         return redirect('/documents')
     
     return render_template('user/documents_folder.html',
-                         peserta=peserta,
                          folder_id=folder_id,
                          folder_name=folder_name,
                          items=items,
+                         next_cursor=next_cursor,
+                         is_first_page=not after,
                          has_access=True)
 
 
@@ -747,39 +862,8 @@ def documents_search():
     if 'user_id' not in session:
         return redirect('/login')
     
-    from .models import DocumentAccess
-    
-    peserta = Peserta.query.get(session['user_id'])
-    
-    # Check permission - same as /documents route
-    has_access = False
-    
-    # 1. Check individual access dari DocumentAccess
-    individual_access = DocumentAccess.query.filter_by(
-        peserta_id=peserta.id,
-        tipe_akses='individual'
-    ).first()
-    
-    if individual_access and individual_access.is_aktif():
-        has_access = True
-    
-    # 2. Check group access dari DocumentAccess
-    if not has_access and peserta.batch:
-        batch = Batch.query.filter_by(nama=peserta.batch).first()
-        if batch:
-            group_access = DocumentAccess.query.filter_by(
-                batch_id=batch.id,
-                tipe_akses='group'
-            ).first()
-            
-            if group_access and group_access.is_aktif():
-                has_access = True
-    
-    # 3. Check legacy field
-    if not has_access and peserta.akses_dokumen_bengkel:
-        has_access = True
-    
-    if not has_access:
+    access = check_document_access(session['user_id'])
+    if not access or not access.allowed:
         flash('Anda tidak memiliki izin akses Dokumen Bengkel.', 'warning')
         return redirect('/dashboard')
     query = request.args.get('q', '').strip()
@@ -789,7 +873,6 @@ def documents_search():
         results = documents_handler.search_files(query)
     
     return render_template('user/documents_search.html',
-                         peserta=peserta,
                          query=query,
                          results=results,
                          has_access=True)
@@ -801,10 +884,8 @@ def documents_file_info(file_id):
     if 'user_id' not in session:
         return redirect('/login')
     
-    peserta = Peserta.query.get(session['user_id'])
-    
-    # Check permission
-    if not peserta.akses_dokumen_bengkel:
+    access = check_document_access(session['user_id'])
+    if not access or not access.allowed:
         flash('Anda tidak memiliki izin akses Dokumen Bengkel.', 'warning')
         return redirect('/dashboard')
     
@@ -829,12 +910,10 @@ def admin_dokumen():
     if 'admin' not in session:
         return redirect(url_for('main.admin_login'))
     
-    from .models import DocumentAccess, DocumentSyncLog, Batch
+    from .models import DocumentSyncLog, Batch
     
-    # Get document access statistics
-    total_akses = DocumentAccess.query.count()
-    akses_group = DocumentAccess.query.filter_by(tipe_akses='group').count()
-    akses_individual = DocumentAccess.query.filter_by(tipe_akses='individual').count()
+    # Get document access statistics (satu query GROUP BY, di cache)
+    stats = access_stats()
     
     # Get latest sync log
     latest_sync = DocumentSyncLog.query.order_by(DocumentSyncLog.tanggal_sync.desc()).first()
@@ -844,9 +923,9 @@ def admin_dokumen():
     
     return render_template(
         'admin/dokumen_management.html',
-        total_akses=total_akses,
-        akses_group=akses_group,
-        akses_individual=akses_individual,
+        total_akses=stats['total'],
+        akses_group=stats['group'],
+        akses_individual=stats['individual'],
         latest_sync=latest_sync,
         batches=batches
     )
@@ -861,7 +940,12 @@ def admin_dokumen_batch():
     from .models import DocumentAccess, Batch
     
     batches = Batch.query.filter_by(aktif=True).all()
-    batch_accesses = DocumentAccess.query.filter_by(tipe_akses='group').all()
+    # Hanya baris akses untuk batch yang tampil (IN terindeks pada batch_id)
+    batch_ids = [b.id for b in batches]
+    batch_accesses = DocumentAccess.query.filter(
+        DocumentAccess.batch_id.in_(batch_ids),
+        DocumentAccess.tipe_akses == 'group'
+    ).all() if batch_ids else []
     
     # Create dict untuk mapping batch -> access
     batch_access_dict = {ba.batch_id: ba for ba in batch_accesses}
@@ -892,33 +976,13 @@ def admin_grant_batch_access():
         if not batch:
             return jsonify({'error': 'Batch tidak ditemukan'}), 404
         
-        # Cek apakah sudah ada
-        existing = DocumentAccess.query.filter_by(
-            batch_id=batch_id,
-            tipe_akses='group'
-        ).first()
-        
-        if existing:
-            # Update existing
-            existing.akses_diberikan = grant
-            existing.tanggal_kadaluarsa = datetime.fromisoformat(tanggal_kadaluarsa) if tanggal_kadaluarsa else None
-            existing.catatan = catatan
-            existing.tanggal_diubah = datetime.utcnow()
-        else:
-            # Create new
-            access = DocumentAccess(
-                tipe_akses='group',
-                batch_id=batch_id,
-                akses_diberikan=grant,
-                tanggal_kadaluarsa=datetime.fromisoformat(tanggal_kadaluarsa) if tanggal_kadaluarsa else None,
-                catatan=catatan,
-                dibuat_oleh=session.get('admin', 'unknown')
-            )
-            db.session.add(access)
-        
-        db.session.commit()
-        
-        peserta_count = Peserta.query.filter_by(batch=batch.nama).count()
+        peserta_count = grant_batch_document_access(
+            batch,
+            grant,
+            tanggal_kadaluarsa=datetime.fromisoformat(tanggal_kadaluarsa) if tanggal_kadaluarsa else None,
+            catatan=catatan,
+            dibuat_oleh=session.get('admin', 'unknown')
+        )
         
         return jsonify({
             'success': True,
@@ -946,15 +1010,16 @@ def admin_dokumen_individual():
     query = Peserta.query
     
     if search:
-        query = query.filter(
-            (Peserta.nama.ilike(f'%{search}%')) |
-            (Peserta.whatsapp.ilike(f'%{search}%'))
-        )
+        query = apply_search(query, search)
     
     peserta = query.paginate(page=page, per_page=50)
     
-    # Get document access untuk semua peserta
-    individual_accesses = DocumentAccess.query.filter_by(tipe_akses='individual').all()
+    # Document access hanya untuk peserta di halaman ini (IN terindeks pada peserta_id)
+    page_ids = [p.id for p in peserta.items]
+    individual_accesses = DocumentAccess.query.filter(
+        DocumentAccess.peserta_id.in_(page_ids),
+        DocumentAccess.tipe_akses == 'individual'
+    ).all() if page_ids else []
     access_dict = {ba.peserta_id: ba for ba in individual_accesses}
     
     return render_template(
@@ -1009,6 +1074,7 @@ def admin_grant_individual_access():
             db.session.add(access)
         
         db.session.commit()
+        bump_access_epoch(peserta.id)
         
         return jsonify({
             'success': True,
@@ -1041,7 +1107,10 @@ def admin_sync_status():
             'file_baru': log.file_baru,
             'durasi': log.durasi_detik,
             'error': log.error_message
-        } for log in logs]
+        } for log in logs],
+        'catalog_pool': documents_handler.get_pool_stats(),
+        'catalog_snapshot': documents_handler.get_snapshot_stats(),
+        'password_hashing': get_hashing_stats()
     })
 
 
@@ -0,0 +1,156 @@
+"""
+Migrasi skema database utama (users.db) di luar db.create_all().
+
+create_all hanya membuat tabel yang belum ada; kolom & index baru pada tabel
+yang sudah berisi data ditambahkan di sini. Versi dicatat di tabel
+`schema_migrations`, dan statement DDL memakai IF NOT EXISTS sehingga aman
+dijalankan ulang setiap kali aplikasi start.
+"""
+
+from datetime import datetime
+
+from sqlalchemy import inspect, text
+
+# Index yang juga dideklarasikan di __table_args__ model (untuk database baru)
+PESERTA_INDEXES = [
+    "CREATE INDEX IF NOT EXISTS ix_peserta_batch_id ON peserta (batch_id)",
+    "CREATE INDEX IF NOT EXISTS ix_peserta_status_tanggal ON peserta (status_pembayaran, tanggal_daftar)",
+    "CREATE INDEX IF NOT EXISTS ix_peserta_akses_tanggal ON peserta (akses_dokumen_bengkel, tanggal_daftar)",
+    "CREATE INDEX IF NOT EXISTS ix_peserta_tanggal_daftar ON peserta (tanggal_daftar)",
+]
+
+UPLOAD_QUEUE_INDEXES = [
+    "CREATE INDEX IF NOT EXISTS ix_peserta_status_upload ON peserta (status_pembayaran, tanggal_upload_bukti, id)",
+    "CREATE INDEX IF NOT EXISTS ix_peserta_upload ON peserta (tanggal_upload_bukti, id)",
+]
+
+DOCUMENT_ACCESS_INDEXES = [
+    "CREATE INDEX IF NOT EXISTS ix_document_access_peserta_tipe ON document_access (peserta_id, tipe_akses)",
+    "CREATE INDEX IF NOT EXISTS ix_document_access_batch_tipe ON document_access (batch_id, tipe_akses)",
+]
+
+# Isi batch_id dari string legacy Peserta.batch
+BACKFILL_BATCH_ID = """
+    UPDATE peserta SET batch_id = (SELECT batch.id FROM batch WHERE batch.nama = peserta.batch)
+    WHERE batch_id IS NULL AND batch IS NOT NULL
+"""
+
+
+def _add_batch_id(conn):
+    columns = {c['name'] for c in inspect(conn).get_columns('peserta')}
+    if 'batch_id' not in columns:
+        conn.execute(text("ALTER TABLE peserta ADD COLUMN batch_id INTEGER REFERENCES batch (id)"))
+    conn.execute(text(BACKFILL_BATCH_ID))
+
+
+def _document_access_indexes(conn):
+    for statement in DOCUMENT_ACCESS_INDEXES:
+        conn.execute(text(statement))
+
+
+def _peserta_indexes(conn):
+    for statement in PESERTA_INDEXES:
+        conn.execute(text(statement))
+
+
+def _peserta_search_index(conn):
+    from .peserta_search import rebuild_index
+    rebuild_index(conn)
+
+
+def _upload_timestamp(conn):
+    columns = {c['name'] for c in inspect(conn).get_columns('peserta')}
+    if 'tanggal_upload_bukti' not in columns:
+        conn.execute(text("ALTER TABLE peserta ADD COLUMN tanggal_upload_bukti DATETIME"))
+    # Nama file bukti berformat peserta_<id>_<unix timestamp>_<nama>
+    rows = conn.execute(text(
+        "SELECT id, payment_proof, tanggal_daftar FROM peserta "
+        "WHERE tanggal_upload_bukti IS NULL AND status_pembayaran IN ('Menunggu', 'Lunas', 'Ditolak')"
+    )).all()
+    values = []
+    for peserta_id, proof, registered in rows:
+        parts = (proof or '').split('_')
+        if len(parts) > 2 and parts[2].isdigit():
+            uploaded = datetime.utcfromtimestamp(int(parts[2]))
+        else:
+            uploaded = registered or datetime.utcnow()
+        values.append({'id': peserta_id, 'uploaded': uploaded})
+    if values:
+        conn.execute(text("UPDATE peserta SET tanggal_upload_bukti = :uploaded WHERE id = :id"), values)
+    for statement in UPLOAD_QUEUE_INDEXES:
+        conn.execute(text(statement))
+
+
+def _proof_thumbnail_queue(conn):
+    if not inspect(conn).has_table('proof_blob'):
+        return  # dibuat create_all lengkap dengan kolom antrian
+    columns = {c['name'] for c in inspect(conn).get_columns('proof_blob')}
+    if 'status_thumbnail' not in columns:
+        conn.execute(text("ALTER TABLE proof_blob ADD COLUMN status_thumbnail VARCHAR(12) DEFAULT 'antri'"))
+        conn.execute(text("UPDATE proof_blob SET status_thumbnail = 'antri'"))
+    if 'thumbnail_diklaim' not in columns:
+        conn.execute(text("ALTER TABLE proof_blob ADD COLUMN thumbnail_diklaim DATETIME"))
+    conn.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_proof_blob_status_thumbnail ON proof_blob (status_thumbnail)"
+    ))
+
+
+# (versi, deskripsi, fungsi migrasi)
+MIGRATIONS = [
+    (1, "index document_access per peserta/batch", _document_access_indexes),
+    (2, "peserta.batch_id (foreign key ke batch)", _add_batch_id),
+    (3, "index filter admin peserta", _peserta_indexes),
+    (4, "index pencarian peserta (FTS5 trigram)", _peserta_search_index),
+    (5, "peserta.tanggal_upload_bukti + index antrian pembayaran", _upload_timestamp),
+    (6, "antrian thumbnail bukti transfer (proof_blob)", _proof_thumbnail_queue),
+]
+
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+# Worker yang start bersamaan menunggu migrasi worker pertama selesai
+MIGRATION_LOCK_TIMEOUT_MS = 120000
+
+
+def get_schema_version(conn):
+    conn.execute(text(
+        "CREATE TABLE IF NOT EXISTS schema_migrations ("
+        "version INTEGER PRIMARY KEY, description TEXT, applied_at TEXT)"
+    ))
+    return conn.execute(text("SELECT COALESCE(MAX(version), 0) FROM schema_migrations")).scalar()
+
+
+def migrate(engine, metadata=None):
+    """
+    Jalankan migrasi yang belum diterapkan. Return versi skema akhir.
+
+    Dipanggil create_app di setiap worker gunicorn yang start bersamaan:
+    create_all (jika `metadata` diberikan), baca versi, dan penerapan migrasi
+    berjalan dalam satu transaksi BEGIN IMMEDIATE. Worker lain menunggu lock
+    tulis (busy_timeout) lalu membaca versi yang sudah dicatat, jadi migrasi
+    tidak pernah diterapkan dua kali.
+    """
+    with engine.connect() as conn:
+        # Transaksi diatur manual; driver tidak boleh BEGIN/COMMIT sendiri
+        conn = conn.execution_options(isolation_level='AUTOCOMMIT')
+        conn.exec_driver_sql(f"PRAGMA busy_timeout = {MIGRATION_LOCK_TIMEOUT_MS}")
+        conn.exec_driver_sql("BEGIN IMMEDIATE")
+        try:
+            if metadata is not None:
+                metadata.create_all(conn)
+            current = get_schema_version(conn)
+            for version, description, apply in MIGRATIONS:
+                if version <= current:
+                    continue
+                apply(conn)
+                conn.execute(
+                    text("INSERT OR IGNORE INTO schema_migrations (version, description, applied_at) "
+                         "VALUES (:v, :d, :t)"),
+                    {'v': version, 'd': description, 't': datetime.utcnow().isoformat()}
+                )
+                print(f"✅ Migrasi database {version}: {description}")
+                current = version
+            conn.exec_driver_sql("COMMIT")
+        except BaseException:
+            conn.exec_driver_sql("ROLLBACK")
+            raise
+    return current
@@ -11,6 +11,7 @@ limiter = Limiter(key_func=get_remote_address)
 
 def init_limiter(app):
     global limiter
+    from . import ratelimit_storage  # noqa: F401 - mendaftarkan skema storage sqlite://
     limiter.init_app(app)
 
 def rate_limit_login(f):
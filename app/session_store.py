@@ -0,0 +1,214 @@
+"""
+Session server-side di SQLite (WAL), dibagi antar worker gunicorn.
+
+Session yang sudah login (user_id/admin): cookie hanya berisi id session
+bertanda tangan; isi session disimpan di tabel `sessions` pada
+SESSION_STORE_PATH (default instance/sessions.db). Baris hanya ditulis ulang
+jika isi session berubah, atau masa berlakunya sudah lewat separuh. Id
+session otomatis diganti saat user/admin login atau logout (mencegah
+session fixation).
+
+Session anonim (mis. hanya token CSRF atau pesan flash dari crawler dan
+pengunjung halaman publik) tidak pernah ditulis ke database: isinya disimpan
+di cookie itu sendiri, ditandatangani dan diberi cap waktu seperti session
+cookie bawaan Flask. Baris session kadaluarsa dihapus paling lama setiap
+CLEANUP_INTERVAL detik per proses.
+
+Tabel `identity_versions` menyimpan versi data peserta (dinaikkan oleh
+app.identity setiap commit yang mengubah Peserta). Versi ikut dibaca dalam
+query yang sama dengan isi session, jadi cache identitas per worker bisa
+divalidasi tanpa query ke database utama.
+"""
+
+import os
+import secrets
+import sqlite3
+import threading
+import time
+
+from flask.json.tag import TaggedJSONSerializer
+from flask.sessions import SessionInterface, SessionMixin
+from itsdangerous import BadSignature, Signer, URLSafeTimedSerializer
+from werkzeug.datastructures import CallbackDict
+
+# Versi global (perubahan massal, mis. akses workshop satu batch)
+GLOBAL_VERSION_ID = 0
+# Hapus session kadaluarsa paling lama setiap N detik (saat ada penulisan)
+CLEANUP_INTERVAL = 3600
+
+# Key yang menandai identitas login; perubahan nilainya memicu id session baru
+_IDENTITY_KEYS = ('user_id', 'admin')
+
+_SCHEMA = (
+    """
+    CREATE TABLE IF NOT EXISTS sessions (
+        sid TEXT PRIMARY KEY,
+        user_id INTEGER,
+        data TEXT NOT NULL,
+        expires REAL NOT NULL
+    ) WITHOUT ROWID
+    """,
+    "CREATE INDEX IF NOT EXISTS ix_sessions_expires ON sessions (expires)",
+    """
+    CREATE TABLE IF NOT EXISTS identity_versions (
+        peserta_id INTEGER PRIMARY KEY,
+        versi INTEGER NOT NULL
+    )
+    """,
+)
+
+_LOAD = """
+SELECT s.data, s.expires, COALESCE(v.versi, 0), COALESCE(gv.versi, 0)
+FROM sessions s
+LEFT JOIN identity_versions v ON v.peserta_id = s.user_id
+LEFT JOIN identity_versions gv ON gv.peserta_id = ?
+WHERE s.sid = ? AND s.expires > ?
+"""
+
+_BUMP = """
+INSERT INTO identity_versions (peserta_id, versi) VALUES (?, 1)
+ON CONFLICT (peserta_id) DO UPDATE SET versi = versi + 1
+"""
+
+
+class ServerSession(CallbackDict, SessionMixin):
+    def __init__(self, initial=None, sid=None, new=False, expires=None, identity_version=None):
+        def on_update(self):
+            self.modified = True
+
+        super().__init__(initial, on_update)
+        self.sid = sid
+        self.new = new
+        self.expires = expires
+        self.modified = False
+        # (versi peserta, versi global) saat session dimuat; None = tidak diketahui
+        self.identity_version = identity_version
+        self.loaded_identity = tuple(self.get(key) for key in _IDENTITY_KEYS)
+
+
+class SQLiteSessionInterface(SessionInterface):
+    serializer = TaggedJSONSerializer()
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        self._next_cleanup = 0
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def _conn(self):
+        # Satu koneksi autocommit per thread per proses (tidak diwarisi lewat fork)
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode = WAL")
+            conn.execute("PRAGMA synchronous = NORMAL")
+            for statement in _SCHEMA:
+                conn.execute(statement)
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def _signer(self, app):
+        return Signer(app.secret_key, salt='server-session')
+
+    def _cookie_serializer(self, app):
+        """Isi session anonim di cookie (bertanda tangan + cap waktu)"""
+        return URLSafeTimedSerializer(app.secret_key, salt='anonymous-session', serializer=self.serializer)
+
+    def open_session(self, app, request):
+        token = request.cookies.get(self.get_cookie_name(app))
+        if token:
+            try:
+                sid = self._signer(app).unsign(token).decode('ascii')
+            except BadSignature:
+                sid = None
+            if sid:
+                row = self._conn().execute(_LOAD, (GLOBAL_VERSION_ID, sid, time.time())).fetchone()
+                if row:
+                    return ServerSession(self.serializer.loads(row[0]), sid=sid, expires=row[1],
+                                         identity_version=(row[2], row[3]))
+            else:
+                try:
+                    data = self._cookie_serializer(app).loads(
+                        token, max_age=app.permanent_session_lifetime.total_seconds())
+                except BadSignature:
+                    data = None
+                if data:
+                    return ServerSession(data, sid=secrets.token_urlsafe(32), new=True)
+        return ServerSession(sid=secrets.token_urlsafe(32), new=True)
+
+    def _set_cookie(self, app, session, response, value):
+        response.set_cookie(
+            self.get_cookie_name(app),
+            value,
+            expires=self.get_expiration_time(app, session),
+            httponly=self.get_cookie_httponly(app),
+            domain=self.get_cookie_domain(app),
+            path=self.get_cookie_path(app),
+            secure=self.get_cookie_secure(app),
+            samesite=self.get_cookie_samesite(app),
+        )
+
+    def save_session(self, app, session, response):
+        name = self.get_cookie_name(app)
+        domain = self.get_cookie_domain(app)
+        path = self.get_cookie_path(app)
+        conn = self._conn()
+
+        if not session:
+            if not session.new:
+                conn.execute("DELETE FROM sessions WHERE sid = ?", (session.sid,))
+            if session.modified:
+                response.delete_cookie(name, domain=domain, path=path,
+                                       secure=self.get_cookie_secure(app),
+                                       httponly=self.get_cookie_httponly(app),
+                                       samesite=self.get_cookie_samesite(app))
+            return
+
+        if not any(session.get(key) for key in _IDENTITY_KEYS):
+            # Belum login: tidak ada baris di database, isi session ikut di cookie
+            if not session.new:
+                conn.execute("DELETE FROM sessions WHERE sid = ?", (session.sid,))
+            elif not self.should_set_cookie(app, session):
+                return
+            self._set_cookie(app, session, response, self._cookie_serializer(app).dumps(dict(session)))
+            return
+
+        now = time.time()
+        lifetime = app.permanent_session_lifetime.total_seconds()
+        identity = tuple(session.get(key) for key in _IDENTITY_KEYS)
+        if identity != session.loaded_identity and not session.new:
+            # Login/logout: buang id lama, pakai id baru
+            conn.execute("DELETE FROM sessions WHERE sid = ?", (session.sid,))
+            session.sid = secrets.token_urlsafe(32)
+            session.new = True
+
+        if session.new or session.modified:
+            user_id = session.get('user_id')
+            conn.execute(
+                "INSERT OR REPLACE INTO sessions (sid, user_id, data, expires) VALUES (?, ?, ?, ?)",
+                (session.sid, user_id if isinstance(user_id, int) else None,
+                 self.serializer.dumps(dict(session)), now + lifetime)
+            )
+            if now >= self._next_cleanup:
+                self._next_cleanup = now + CLEANUP_INTERVAL
+                conn.execute("DELETE FROM sessions WHERE expires <= ?", (now,))
+        elif session.expires - now < lifetime / 2:
+            conn.execute("UPDATE sessions SET expires = ? WHERE sid = ?", (now + lifetime, session.sid))
+        elif not self.should_set_cookie(app, session):
+            return
+
+        self._set_cookie(app, session, response, self._signer(app).sign(session.sid).decode('ascii'))
+
+    def bump_identity_versions(self, peserta_ids):
+        """Naikkan versi identitas peserta (GLOBAL_VERSION_ID = semua peserta)"""
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.executemany(_BUMP, [(peserta_id,) for peserta_id in peserta_ids])
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
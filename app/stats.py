@@ -0,0 +1,116 @@
+"""
+Statistik agregat untuk dashboard admin.
+
+Semua angka per tabel dihitung dengan satu query conditional-SUM / GROUP BY,
+lalu di cache per worker selama STATS_CACHE_TTL detik. Cache dibuang saat
+transaksi yang mengubah Peserta atau DocumentAccess di-commit (listener
+session di bawah), jadi admin langsung melihat angka baru setelah aksinya.
+"""
+
+import os
+import threading
+import time
+
+from sqlalchemy import case, event, func
+
+from .models import db, Peserta, DocumentAccess
+
+STATS_CACHE_TTL = float(os.getenv('ADMIN_STATS_CACHE_TTL', 5))
+
+_TRACKED_MODELS = (Peserta, DocumentAccess)
+
+_cache = {}
+_cache_lock = threading.Lock()
+
+
+def _count_if(condition):
+    return func.coalesce(func.sum(case((condition, 1), else_=0)), 0)
+
+
+def _query_peserta_stats():
+    row = db.session.query(
+        func.count(Peserta.id),
+        _count_if(Peserta.status_pembayaran == 'Belum'),
+        _count_if(Peserta.status_pembayaran == 'Menunggu'),
+        _count_if(Peserta.status_pembayaran == 'Lunas'),
+        _count_if(Peserta.status_pembayaran == 'Ditolak'),
+        _count_if(Peserta.akses_dokumen_bengkel.is_(True)),
+        _count_if(Peserta.akses_dokumen_bengkel.is_(False)),
+    ).one()
+    return {
+        'total': row[0],
+        'belum_bayar': row[1],
+        'menunggu': row[2],
+        'lunas': row[3],
+        'ditolak': row[4],
+        'dengan_akses': row[5],
+        'tanpa_akses': row[6],
+    }
+
+
+def _query_access_stats():
+    per_tipe = dict(
+        db.session.query(DocumentAccess.tipe_akses, func.count(DocumentAccess.id))
+        .group_by(DocumentAccess.tipe_akses).all()
+    )
+    return {
+        'total': sum(per_tipe.values()),
+        'group': per_tipe.get('group', 0),
+        'individual': per_tipe.get('individual', 0),
+    }
+
+
+def _cached(name, compute):
+    now = time.monotonic()
+    with _cache_lock:
+        cached = _cache.get(name)
+    if cached and cached[0] > now:
+        return cached[1]
+    value = compute()
+    with _cache_lock:
+        _cache[name] = (now + STATS_CACHE_TTL, value)
+    return value
+
+
+def peserta_stats():
+    """Jumlah peserta total, per status pembayaran, dan per akses dokumen"""
+    return _cached('peserta', _query_peserta_stats)
+
+
+def access_stats():
+    """Jumlah baris DocumentAccess total dan per tipe_akses"""
+    return _cached('document_access', _query_access_stats)
+
+
+def invalidate_stats():
+    with _cache_lock:
+        _cache.clear()
+
+
+# ===== INVALIDASI SAAT COMMIT =====
+@event.listens_for(db.session, 'after_flush')
+def _mark_stats_dirty(session, flush_context):
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, _TRACKED_MODELS):
+            session.info['stats_dirty'] = True
+            return
+
+
+@event.listens_for(db.session, 'do_orm_execute')
+def _mark_bulk_dirty(orm_execute_state):
+    # Query.update()/delete() massal tidak melewati flush
+    if orm_execute_state.is_update or orm_execute_state.is_delete:
+        mapper = orm_execute_state.bind_mapper
+        if mapper is not None and mapper.class_ in _TRACKED_MODELS:
+            orm_execute_state.session.info['stats_dirty'] = True
+
+
+@event.listens_for(db.session, 'after_commit')
+def _invalidate_after_commit(session):
+    if session.info.pop('stats_dirty', False):
+        invalidate_stats()
+
+
+@event.listens_for(db.session, 'after_rollback')
+def _reset_after_rollback(session):
+    session.info.pop('stats_dirty', None)
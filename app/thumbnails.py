@@ -0,0 +1,226 @@
+"""
+Thumbnail bukti transfer untuk halaman verifikasi pembayaran.
+
+Antrian job adalah kolom proof_blob.status_thumbnail: setiap blob baru masuk
+sebagai "antri". Worker di luar request mengklaim satu job dengan satu
+UPDATE ... RETURNING (aman dijalankan di beberapa worker gunicorn/proses
+sekaligus), membuat thumbnail WebP (JPEG jika Pillow tanpa WebP; halaman
+pertama untuk PDF lewat pdftoppm), lalu menyimpannya di samping blob
+sebagai <sha256>.thumb.<ext>. Job yang macet di "proses" diklaim ulang
+setelah THUMBNAIL_STALE_SECONDS.
+
+Worker berjalan sebagai thread di proses web (THUMBNAIL_WORKER=thread,
+default; dimulai saat request pertama, jadi CLI seperti add_admin.py tidak
+ikut menjalankannya) atau sebagai proses terpisah (THUMBNAIL_WORKER=off di web, lalu
+`python -m app.thumbnails worker`). Pillow & poppler-utils opsional: tanpa
+keduanya halaman tetap jalan dengan placeholder.
+
+CLI:
+    python -m app.thumbnails worker        # proses worker terpisah
+    python -m app.thumbnails backfill      # antrikan ulang blob gagal/lama
+"""
+
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+from datetime import datetime, timedelta
+
+from sqlalchemy import text
+
+from .models import db
+from .proof_store import blob_key, blob_path, thumbnail_path
+
+try:
+    from PIL import Image, ImageOps, features
+    THUMBNAIL_FORMAT = 'webp' if features.check('webp') else 'jpg'
+except ImportError:
+    Image = None
+    THUMBNAIL_FORMAT = 'jpg'
+
+THUMBNAIL_SIZE = int(os.getenv('THUMBNAIL_SIZE', 160))  # px sisi terpanjang (2x ukuran tampil)
+THUMBNAIL_QUALITY = int(os.getenv('THUMBNAIL_QUALITY', 60))
+THUMBNAIL_POLL_SECONDS = float(os.getenv('THUMBNAIL_POLL_SECONDS', 5))
+THUMBNAIL_STALE_SECONDS = 300
+# Foto bukti transfer dari kamera HP ±12 MP (48 MP mode penuh); di atas ini dianggap bukan foto wajar
+THUMBNAIL_MAX_PIXELS = 50_000_000
+PDF_RENDER_TIMEOUT = 30
+
+THUMBNAIL_MIMETYPES = {'webp': 'image/webp', 'jpg': 'image/jpeg'}
+
+_CLAIM = """
+UPDATE proof_blob SET status_thumbnail = 'proses', thumbnail_diklaim = :now
+WHERE sha256 = (
+    SELECT sha256 FROM proof_blob
+    WHERE status_thumbnail = 'antri' OR (status_thumbnail = 'proses' AND thumbnail_diklaim < :stale)
+    ORDER BY tanggal_dibuat
+    LIMIT 1
+)
+RETURNING sha256, ekstensi
+"""
+
+_wake = threading.Event()
+_worker_thread = None
+
+
+class ThumbnailUnsupported(Exception):
+    """Pillow / pdftoppm tidak tersedia untuk tipe file ini"""
+
+
+def notify_worker():
+    """Bangunkan worker di proses ini (dipanggil setelah upload baru di-commit)"""
+    _wake.set()
+
+
+def find_thumbnail(upload_folder, sha256):
+    """Return (path, mimetype) thumbnail yang sudah dibuat, atau None"""
+    for fmt in (THUMBNAIL_FORMAT, 'jpg', 'webp'):
+        path = thumbnail_path(upload_folder, sha256, fmt)
+        if os.path.exists(path):
+            return path, THUMBNAIL_MIMETYPES[fmt]
+    return None
+
+
+# ===== RENDER =====
+def _open_pdf_first_page(source, workdir):
+    pdftoppm = shutil.which('pdftoppm')
+    if not pdftoppm:
+        raise ThumbnailUnsupported('pdftoppm (poppler-utils) tidak terpasang')
+    output = os.path.join(workdir, 'page')
+    subprocess.run(
+        [pdftoppm, '-f', '1', '-l', '1', '-singlefile', '-scale-to', str(THUMBNAIL_SIZE * 2),
+         '-jpeg', source, output],
+        check=True, timeout=PDF_RENDER_TIMEOUT, capture_output=True
+    )
+    return Image.open(output + '.jpg')
+
+
+def render_thumbnail(source, kind, target):
+    """Buat thumbnail file source (png/jpg/pdf) ke path target secara atomik"""
+    if Image is None:
+        raise ThumbnailUnsupported('Pillow tidak terpasang')
+    fmt = target.rsplit('.', 1)[-1]
+    with tempfile.TemporaryDirectory() as workdir:
+        image = _open_pdf_first_page(source, workdir) if kind == 'pdf' else Image.open(source)
+        with image:
+            # Image.open hanya membaca header; tolak sebelum decode. Batas Pillow sendiri
+            # (MAX_IMAGE_PIXELS, global per proses) sengaja tidak diubah dan hanya memberi warning
+            if image.width * image.height > THUMBNAIL_MAX_PIXELS:
+                raise Image.DecompressionBombError(
+                    f'Gambar {image.width}x{image.height} melebihi {THUMBNAIL_MAX_PIXELS} piksel')
+            # JPEG: decoder langsung memperkecil skala (DCT), jauh lebih cepat dari decode penuh
+            image.draft('RGB', (THUMBNAIL_SIZE * 2, THUMBNAIL_SIZE * 2))
+            image = ImageOps.exif_transpose(image)
+            image.thumbnail((THUMBNAIL_SIZE, THUMBNAIL_SIZE))
+            if image.mode not in ('RGB', 'L'):
+                image = image.convert('RGB')
+            tmp = f"{target}.{os.getpid()}.tmp"
+            if fmt == 'webp':
+                image.save(tmp, 'WEBP', quality=THUMBNAIL_QUALITY, method=4)
+            else:
+                image.save(tmp, 'JPEG', quality=THUMBNAIL_QUALITY, optimize=True)
+    os.replace(tmp, target)
+    return os.path.getsize(target)
+
+
+# ===== WORKER =====
+def claim_job():
+    """Klaim satu blob yang menunggu thumbnail. Return (sha256, ekstensi) atau None."""
+    now = datetime.utcnow()
+    row = db.session.execute(text(_CLAIM), {
+        'now': now, 'stale': now - timedelta(seconds=THUMBNAIL_STALE_SECONDS)
+    }).first()
+    db.session.commit()
+    return tuple(row) if row else None
+
+
+def process_job(upload_folder, sha256, ekstensi):
+    source = blob_path(upload_folder, blob_key(sha256, ekstensi))
+    try:
+        render_thumbnail(source, ekstensi, thumbnail_path(upload_folder, sha256, THUMBNAIL_FORMAT))
+        status = 'siap'
+    except FileNotFoundError:
+        status = 'gagal'
+    except ThumbnailUnsupported as e:
+        print(f"⚠️  Thumbnail {sha256[:12]} dilewati: {e}")
+        status = 'gagal'
+    except Exception as e:
+        print(f"❌ Gagal membuat thumbnail {sha256[:12]}: {e}")
+        status = 'gagal'
+    db.session.execute(
+        text("UPDATE proof_blob SET status_thumbnail = :status, thumbnail_diklaim = NULL WHERE sha256 = :sha"),
+        {'status': status, 'sha': sha256}
+    )
+    db.session.commit()
+    return status
+
+
+def run_worker(app, stop_event=None, once=False):
+    """Loop worker: proses semua job yang ada, lalu tunggu notify/poll. once=True berhenti saat antrian kosong."""
+    stop_event = stop_event or threading.Event()
+    processed = 0
+    with app.app_context():
+        upload_folder = app.config['UPLOAD_FOLDER']
+        while not stop_event.is_set():
+            try:
+                job = claim_job()
+                if job is not None:
+                    process_job(upload_folder, *job)
+                    processed += 1
+                    continue
+            except Exception as e:
+                db.session.rollback()
+                print(f"❌ Worker thumbnail error: {e}")
+            finally:
+                db.session.remove()
+            if once:
+                break
+            _wake.wait(THUMBNAIL_POLL_SECONDS)
+            _wake.clear()
+    return processed
+
+
+def start_worker_thread(app):
+    """Jalankan worker sebagai daemon thread di proses ini (sekali per proses)"""
+    global _worker_thread
+    if _worker_thread is not None and _worker_thread.is_alive():
+        return _worker_thread
+    _worker_thread = threading.Thread(target=run_worker, args=(app,), name='thumbnail-worker', daemon=True)
+    _worker_thread.start()
+    return _worker_thread
+
+
+def main(argv):
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Thumbnail bukti transfer')
+    sub = parser.add_subparsers(dest='command', required=True)
+    sub.add_parser('worker', help='Jalankan worker thumbnail (proses terpisah)')
+    sub.add_parser('backfill', help='Antrikan ulang blob yang gagal atau belum punya thumbnail')
+    args = parser.parse_args(argv)
+
+    os.environ['THUMBNAIL_WORKER'] = 'off'
+    from app import create_app
+    app = create_app()
+    if args.command == 'backfill':
+        with app.app_context():
+            queued = db.session.execute(text(
+                "UPDATE proof_blob SET status_thumbnail = 'antri' "
+                "WHERE status_thumbnail IS NULL OR status_thumbnail = 'gagal'"
+            )).rowcount
+            db.session.commit()
+        print(f"✅ {queued} blob diantrikan untuk thumbnail")
+        return 0
+
+    print(f"🖼️  Worker thumbnail berjalan ({THUMBNAIL_FORMAT}, {THUMBNAIL_SIZE}px)")
+    try:
+        run_worker(app)
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
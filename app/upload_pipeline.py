@@ -0,0 +1,185 @@
+"""
+Pipeline upload bukti transfer secara streaming.
+
+1. Content-Length dicek sebelum body dibaca; upload yang pasti terlalu
+   besar ditolak tanpa membaca satu byte pun.
+2. Part file multipart langsung ditulis parser werkzeug ke file sementara di
+   UPLOAD_FOLDER/.tmp (ProofSink), per potongan, tanpa SpooledTemporaryFile
+   perantara. Memori per upload hanya sebesar buffer parser.
+3. Tipe file ditentukan dari magic bytes potongan pertama (PNG/JPEG/PDF),
+   bukan dari content_type kiriman klien. Selain itu upload dihentikan.
+4. SHA-256 dihitung sambil menulis; setelah selesai file di-rename atomik
+   ke UPLOAD_FOLDER.
+
+Stage dipasang oleh hook before_request (init_app) untuk endpoint di
+PROOF_UPLOAD_ENDPOINTS, sebelum CSRFProtect membaca request.form: part file
+yang sudah diparse tanpa stage akan jatuh ke SpooledTemporaryFile werkzeug.
+"""
+
+import hashlib
+import os
+import tempfile
+
+from flask import Request, request
+
+PROOF_MAX_BYTES = 5 * 1024 * 1024
+# Header & boundary multipart + field form lain (csrf_token, dll.)
+MULTIPART_OVERHEAD = 16 * 1024
+
+# Magic bytes -> ekstensi yang disimpan
+PROOF_SIGNATURES = (
+    (b'\x89PNG\r\n\x1a\n', 'png'),
+    (b'\xff\xd8\xff', 'jpg'),
+    (b'%PDF-', 'pdf'),
+)
+_SNIFF_BYTES = max(len(magic) for magic, _ in PROOF_SIGNATURES)
+
+_STAGE_KEY = 'app.upload_stage'
+
+# Endpoint POST yang part file-nya ditulis lewat UploadStage
+PROOF_UPLOAD_ENDPOINTS = {'main.upload_payment'}
+
+
+class UploadRejected(Exception):
+    """Upload ditolak; pesan ditampilkan ke user"""
+
+
+def sniff_kind(head):
+    for magic, kind in PROOF_SIGNATURES:
+        if head.startswith(magic):
+            return kind
+    return None
+
+
+class ProofSink:
+    """File tujuan parser multipart: batasi ukuran, cek magic bytes, hash"""
+
+    def __init__(self, directory, max_bytes):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.kind = None
+        self.sha256 = hashlib.sha256()
+        self._head = b''
+        self._file = tempfile.NamedTemporaryFile(dir=directory, prefix='upload-', delete=False)
+        self.path = self._file.name
+
+    def write(self, data):
+        self.size += len(data)
+        if self.size > self.max_bytes:
+            raise UploadRejected(f'File terlalu besar (max {self.max_bytes // (1024 * 1024)}MB)')
+        if self.kind is None:
+            self._head += data[:_SNIFF_BYTES]
+            if len(self._head) >= _SNIFF_BYTES:
+                self.kind = sniff_kind(self._head)
+                if self.kind is None:
+                    raise UploadRejected('Format file tidak didukung. Gunakan png/jpg/pdf')
+        self.sha256.update(data)
+        return self._file.write(data)
+
+    def finish(self):
+        """Dipanggil setelah parsing selesai: file pendek (< magic bytes) dicek di sini"""
+        if self._file.closed:
+            return
+        if self.kind is None:
+            self.kind = sniff_kind(self._head)
+            if self.kind is None:
+                raise UploadRejected('Format file tidak didukung. Gunakan png/jpg/pdf')
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._file.close()
+
+    def discard(self):
+        self._file.close()
+        try:
+            os.unlink(self.path)
+        except OSError:
+            pass
+
+    @property
+    def hexdigest(self):
+        return self.sha256.hexdigest()
+
+    # Parser & FileStorage juga memanggil seek/read/tell
+    def __getattr__(self, name):
+        return getattr(self._file, name)
+
+
+class UploadStage:
+    """Status upload satu request: sink yang dibuat parser & pembersihannya"""
+
+    def __init__(self, upload_folder, max_bytes=PROOF_MAX_BYTES):
+        self.upload_folder = upload_folder
+        self.tmp_dir = os.path.join(upload_folder, '.tmp')
+        self.max_bytes = max_bytes
+        self.sinks = []
+
+    def new_sink(self):
+        os.makedirs(self.tmp_dir, exist_ok=True)
+        sink = ProofSink(self.tmp_dir, self.max_bytes)
+        self.sinks.append(sink)
+        return sink
+
+    def commit(self, sink, saved_name):
+        """Selesaikan sink lalu rename atomik ke UPLOAD_FOLDER; return path tujuan"""
+        sink.finish()
+        target = os.path.join(self.upload_folder, saved_name)
+        if os.path.dirname(os.path.abspath(target)) != os.path.abspath(self.upload_folder):
+            raise UploadRejected('Path traversal terdeteksi!')
+        os.replace(sink.path, target)
+        self.sinks.remove(sink)
+        return target
+
+    def release(self, sink):
+        """Sink sudah dipindahkan/dibuang pemanggil; jangan dihapus saat cleanup"""
+        self.sinks.remove(sink)
+
+    def cleanup(self):
+        for sink in self.sinks:
+            sink.discard()
+        self.sinks = []
+
+
+class UploadRequest(Request):
+    """Request yang mengarahkan part file ke UploadStage jika route memulainya"""
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        stage = self.environ.get(_STAGE_KEY)
+        if stage is not None:
+            return stage.new_sink()
+        return super()._get_file_stream(total_content_length, content_type, filename, content_length)
+
+
+def begin_proof_upload(request, upload_folder, max_bytes=PROOF_MAX_BYTES):
+    """
+    Mulai stage upload untuk request ini, sebelum request.files diakses
+    (stage yang sudah dipasang hook init_app dikembalikan apa adanya).
+    UploadRejected jika Content-Length sudah melebihi batas.
+    """
+    if _STAGE_KEY in request.environ:
+        return request.environ[_STAGE_KEY]
+    length = request.content_length
+    if length is not None and length > max_bytes + MULTIPART_OVERHEAD:
+        raise UploadRejected(f'File terlalu besar (max {max_bytes // (1024 * 1024)}MB)')
+    stage = UploadStage(upload_folder, max_bytes)
+    request.environ[_STAGE_KEY] = stage
+    return stage
+
+
+def init_app(app, endpoints=PROOF_UPLOAD_ENDPOINTS):
+    """
+    Pasang UploadRequest dan hook stage upload. Dipanggil sebelum
+    CSRFProtect(app) supaya hook ini berjalan lebih dulu dari validasi CSRF.
+    UploadRejected dari hook/parsing form ditangani errorhandler aplikasi.
+    """
+    app.request_class = UploadRequest
+
+    @app.before_request
+    def begin_upload_stage():
+        if request.method == 'POST' and request.endpoint in endpoints:
+            begin_proof_upload(request, app.config['UPLOAD_FOLDER'])
+
+    @app.teardown_request
+    def cleanup_upload_stage(exc=None):
+        stage = request.environ.get(_STAGE_KEY)
+        if stage is not None:
+            stage.cleanup()
@@ -0,0 +1,10 @@
+"""
+Benchmark performa (di luar kode aplikasi).
+
+Setiap modul membangun data sintetis di folder sementara, jadi tidak
+menyentuh users.db maupun katalog Dokumen Bengkel. Jalankan dari root repo:
+
+    python -m benchmarks.<nama_modul> [argumen...]
+
+Contoh: python -m benchmarks.schema 100000
+"""
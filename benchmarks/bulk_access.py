@@ -0,0 +1,42 @@
+"""ORM loop vs UPDATE massal untuk akses workshop satu grup"""
+
+import sys
+import time
+
+from app.bulk_access import set_batch_workshop_access
+from app.models import db, Batch, Peserta
+
+from .synthetic import synthetic_db
+
+
+def run(members):
+    with synthetic_db():
+        db.create_all()
+        batch = Batch(nama='Bench', whatsapp_link='-')
+        db.session.add(batch)
+        db.session.flush()
+        db.session.execute(
+            Peserta.__table__.insert(),
+            [{'nama': f'Peserta {i}', 'whatsapp': f'08{i:010d}', 'batch': 'Bench',
+              'batch_id': batch.id, 'akses_workshop': False} for i in range(members)]
+        )
+        db.session.commit()
+
+        start = time.perf_counter()
+        for p in Peserta.query.filter_by(batch_id=batch.id).all():
+            p.akses_workshop = True
+        db.session.commit()
+        orm_seconds = time.perf_counter() - start
+        db.session.expunge_all()
+
+        batch = Batch.query.filter_by(nama='Bench').first()
+        start = time.perf_counter()
+        affected = set_batch_workshop_access(batch, False)
+        bulk_seconds = time.perf_counter() - start
+
+    print(f"{members} anggota: ORM loop {orm_seconds * 1000:.0f} ms, "
+          f"UPDATE massal {bulk_seconds * 1000:.0f} ms ({affected} baris)")
+
+
+if __name__ == '__main__':
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 10000)
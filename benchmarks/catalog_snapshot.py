@@ -0,0 +1,57 @@
+"""Memori & waktu muat snapshot katalog Dokumen Bengkel (katalog saat ini + sintetis)"""
+
+import sqlite3
+import sys
+
+from app.catalog_snapshot import CatalogSnapshot
+
+
+def _synthetic_catalog(rows, fanout=200):
+    """Database in-memory dengan `rows` baris, folder berisi `fanout` anak"""
+    conn = sqlite3.connect(':memory:')
+    conn.execute(
+        "CREATE TABLE files (id TEXT PRIMARY KEY, name TEXT, is_directory BOOLEAN, size INTEGER, "
+        "modified_time TEXT, parent_id TEXT, root_folder_name TEXT, mime_type TEXT)"
+    )
+    conn.execute("CREATE INDEX idx_files_parent_dir_name ON files (parent_id, is_directory DESC, name)")
+
+    def generate():
+        folders = ['root']
+        for i in range(rows):
+            parent = folders[i // fanout] if i // fanout < len(folders) else folders[-1]
+            is_dir = 1 if i % 20 == 0 else 0
+            file_id = f"id{i:08d}"
+            if is_dir:
+                folders.append(file_id)
+            yield (file_id, f"Manual {i % 997} 4D{i % 100:02d} part {i}.pdf", is_dir,
+                   0 if is_dir else 1024 * (i % 5000), parent, 'Service_Manual_2',
+                   'application/vnd.google-apps.folder' if is_dir else 'application/pdf')
+
+    conn.executemany(
+        "INSERT INTO files (id, name, is_directory, size, parent_id, root_folder_name, mime_type) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?)", generate()
+    )
+    return conn
+
+
+def _report(label, snap):
+    stats = snap.stats()
+    print(f"{label}: {stats['rows']} baris, {stats['parents']} parent, "
+          f"{stats['memory_bytes'] / 1024 / 1024:.1f} MB, muat {stats['load_ms']} ms")
+
+
+def run(rows):
+    from app.documents_handler import get_documents_connection
+
+    conn = get_documents_connection()
+    if conn:
+        _report("Katalog saat ini", CatalogSnapshot.load(conn))
+        conn.close()
+
+    conn = _synthetic_catalog(rows)
+    _report("Katalog sintetis", CatalogSnapshot.load(conn))
+    conn.close()
+
+
+if __name__ == '__main__':
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 500000)
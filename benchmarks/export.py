@@ -0,0 +1,49 @@
+"""Memori & waktu byte pertama export CSV / CSV.gz / XLSX"""
+
+import sys
+import time
+from datetime import datetime, timedelta
+
+from app.export import csv_stream, export_rows, gzip_stream, xlsx_stream
+from app.models import db, Batch, Peserta
+
+from .synthetic import measure, synthetic_db
+
+
+def run(count):
+    print(f"Export {count} peserta:")
+    with synthetic_db():
+        db.create_all()
+        db.session.execute(Batch.__table__.insert(), [
+            {'nama': f'Grup {i}', 'whatsapp_link': '-', 'aktif': True} for i in range(20)
+        ])
+        base = datetime(2024, 1, 1)
+        for start in range(0, count, 50000):
+            db.session.execute(Peserta.__table__.insert(), [
+                {'nama': f'Peserta {i}', 'whatsapp': f'08{i:010d}', 'email': f'user{i}@gmail.com',
+                 'batch': f'Grup {i % 20}', 'batch_id': i % 20 + 1, 'status_pembayaran': 'Lunas',
+                 'tanggal_daftar': base + timedelta(minutes=i)}
+                for i in range(start, min(start + 50000, count))
+            ])
+        db.session.commit()
+
+        for label, stream in (('csv', csv_stream), ('csv.gz', lambda rows: gzip_stream(csv_stream(rows))),
+                              ('xlsx', xlsx_stream)):
+            start = time.perf_counter()
+            first_byte = None
+            size = 0
+
+            def consume():
+                nonlocal first_byte, size
+                for chunk in stream(export_rows(Peserta.query)):
+                    if first_byte is None and chunk:
+                        first_byte = time.perf_counter() - start
+                    size += len(chunk)
+
+            total, peak, _ = measure(consume)
+            print(f"  {label:7s} {size / 1024 / 1024:7.1f} MB, byte pertama {first_byte * 1000:6.1f} ms, "
+                  f"total {total / 1000:5.1f} s, puncak memori {peak:5.1f} MB")
+
+
+if __name__ == '__main__':
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 500000)
@@ -0,0 +1,39 @@
+"""Throughput login paralel: hash di thread request vs process pool"""
+
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from werkzeug.security import check_password_hash, generate_password_hash
+
+from app.password_hashing import HASH_METHOD, PasswordHasher
+
+
+def run(threads, logins, method):
+    pwhash = generate_password_hash('Rahasia123', method)
+    hasher = PasswordHasher(method=method)
+
+    def throughput(verify):
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=threads) as clients:
+            results = list(clients.map(lambda _: verify(pwhash, 'Rahasia123'), range(logins)))
+        assert all(results)
+        return logins / (time.perf_counter() - start)
+
+    inline = throughput(check_password_hash)
+    pooled = throughput(hasher.verify)
+    stats = hasher.stats()
+    hasher.shutdown()
+    print(f"{logins} login, {threads} thread klien, {method}, {os.cpu_count()} CPU:")
+    print(f"  inline di thread request  {inline:7.1f} login/detik")
+    print(f"  process pool ({stats['workers']} proses) {pooled:7.1f} login/detik, "
+          f"antrian maks {stats['max_queue_depth']}, latensi rata-rata {stats['avg_ms']} ms")
+
+
+if __name__ == '__main__':
+    run(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 16,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 64,
+        sys.argv[3] if len(sys.argv) > 3 else HASH_METHOD
+    )
@@ -0,0 +1,46 @@
+"""Antrian verifikasi: .all() lama vs halaman keyset"""
+
+import sys
+from datetime import datetime, timedelta
+
+from app.models import db, Peserta
+from app.payment_queue import QUEUE_STATUSES, queue_page
+
+from .synthetic import measure, synthetic_db
+
+
+def run(count):
+    with synthetic_db():
+        db.create_all()
+        statuses = ['Belum', 'Menunggu', 'Lunas', 'Ditolak']
+        base = datetime(2024, 1, 1)
+        db.session.execute(Peserta.__table__.insert(), [
+            {'nama': f'Peserta {i}', 'whatsapp': f'08{i:010d}', 'batch': 'Batch Baru',
+             'status_pembayaran': statuses[i % 4],
+             'payment_proof': f'peserta_{i}_bukti.jpg' if i % 4 else None,
+             'tanggal_upload_bukti': base + timedelta(seconds=i) if i % 4 else None}
+            for i in range(count)
+        ])
+        db.session.commit()
+
+        def timed(fn):
+            result = measure(fn)
+            db.session.expunge_all()
+            return result
+
+        old = timed(lambda: Peserta.query.filter(
+            Peserta.status_pembayaran.in_(QUEUE_STATUSES['semua'])).all())
+        first = timed(lambda: queue_page('semua'))
+        cursor = first[2][1]
+        for _ in range(100):
+            cursor = queue_page('semua', after=cursor)[1]
+        deep = timed(lambda: queue_page('semua', after=cursor))
+
+    print(f"{count} peserta, filter 'semua':")
+    print(f"  .all() entity penuh      {old[0]:8.1f} ms, puncak {old[1]:6.1f} MB ({len(old[2])} baris)")
+    print(f"  keyset halaman pertama   {first[0]:8.1f} ms, puncak {first[1]:6.1f} MB")
+    print(f"  keyset halaman ke-102    {deep[0]:8.1f} ms, puncak {deep[1]:6.1f} MB")
+
+
+if __name__ == '__main__':
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 100000)
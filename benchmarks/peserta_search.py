@@ -0,0 +1,49 @@
+"""Pencarian peserta: ILIKE vs FTS5 trigram (halaman pertama + COUNT)"""
+
+import sys
+import time
+
+from app.models import db, Peserta
+from app.peserta_search import _like_filter, apply_search, rebuild_index
+
+from .synthetic import synthetic_db
+
+SEARCHES = ['Budi Santoso 4711', 'user4711', 'Jaya 97', '7890', '0812 0000 3400', 'gmail']
+
+
+def run(count):
+    columns = (Peserta.nama, Peserta.whatsapp, Peserta.email, Peserta.nama_bengkel)
+    first_names = ['Budi', 'Agus', 'Siti', 'Dewi', 'Joko', 'Rina', 'Andi', 'Putri']
+    last_names = ['Santoso', 'Wijaya', 'Saputra', 'Lestari', 'Pratama', 'Hidayat']
+    bengkel = ['Motor Jaya', 'Sinar Diesel', 'Karya Mandiri', 'Auto Prima', 'Maju Teknik']
+
+    with synthetic_db():
+        db.create_all()
+        db.session.execute(Peserta.__table__.insert(), [
+            {'nama': f'{first_names[i % 8]} {last_names[i % 6]} {i}',
+             'whatsapp': f'0812{i:08d}', 'email': f'user{i}@{"gmail" if i % 3 else "yahoo"}.com',
+             'nama_bengkel': f'{bengkel[i % 5]} {i % 977}'}
+            for i in range(count)
+        ])
+        db.session.commit()
+        rebuild_index(db.session.connection())
+        db.session.commit()
+
+        print(f"{count} peserta, halaman pertama + COUNT (paginate 50), rata-rata 5 putaran:")
+        for search in SEARCHES:
+            timings = []
+            for use_fts in (False, True):
+                start = time.perf_counter()
+                for _ in range(5):
+                    if use_fts:
+                        query = apply_search(Peserta.query, search, columns)
+                    else:
+                        query = _like_filter(Peserta.query, search, columns)
+                    page = query.paginate(page=1, per_page=50, error_out=False)
+                    db.session.expunge_all()
+                timings.append((time.perf_counter() - start) / 5 * 1000)
+            print(f"  {search!r:18s} ILIKE {timings[0]:7.1f} ms -> FTS {timings[1]:6.1f} ms ({page.total} hasil)")
+
+
+if __name__ == '__main__':
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 100000)
@@ -0,0 +1,61 @@
+"""Lama worker tertahan oleh klien lambat: send_file vs X-Accel-Redirect"""
+
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+from flask import Flask
+
+from app import proof_serving
+from app.proof_store import proof_path
+
+
+def run(size_mb, kbps):
+    work = tempfile.mkdtemp()
+    sha = 'ab' * 32
+    path = proof_path(work, f'{sha}.pdf')
+    os.makedirs(os.path.dirname(path))
+    with open(path, 'wb') as f:
+        f.write(b'%PDF-' + os.urandom(int(size_mb * 1024 * 1024)))
+
+    app = Flask(__name__)
+    app.config['UPLOAD_FOLDER'] = work
+    app.add_url_rule('/bukti/<key>', 'bukti', lambda key: proof_serving.send_proof(key))
+    client = app.test_client()
+    rate = kbps * 1000 / 8
+    original = proof_serving.PROOF_SENDFILE
+
+    print(f"PDF {size_mb} MB, klien {kbps} kbps:")
+    try:
+        for mode in ('', 'x-accel'):
+            proof_serving.PROOF_SENDFILE = mode
+            start = time.perf_counter()
+            response = client.get(f'/bukti/{sha}.pdf', buffered=False)
+            sent = 0
+            for chunk in response.response:
+                sent += len(chunk)
+                # Tunggu seolah socket ke klien lambat penuh
+                time.sleep(len(chunk) / rate)
+            response.close()
+            pinned = time.perf_counter() - start
+            label = 'send_file (worker kirim)' if not mode else 'X-Accel-Redirect'
+            print(f"  {label:25s} worker tertahan {pinned:7.2f} s, body dari worker {sent / 1024:8.0f} KB")
+
+        proof_serving.PROOF_SENDFILE = ''
+        range_response = client.get(f'/bukti/{sha}.pdf', headers={'Range': 'bytes=0-65535'})
+        etag = client.get(f'/bukti/{sha}.pdf').headers['ETag']
+        conditional = client.get(f'/bukti/{sha}.pdf', headers={'If-None-Match': etag})
+        print(f"  Range 64 KB: {range_response.status_code}, {len(range_response.data)} bytes; "
+              f"If-None-Match: {conditional.status_code}")
+    finally:
+        proof_serving.PROOF_SENDFILE = original
+        shutil.rmtree(work)
+
+
+if __name__ == '__main__':
+    run(
+        float(sys.argv[1]) if len(sys.argv) > 1 else 5,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 4000
+    )
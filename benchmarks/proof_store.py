@@ -0,0 +1,45 @@
+"""Listing & lookup bukti transfer: direktori datar vs 256 shard"""
+
+import hashlib
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+from app.proof_store import PROOF_DIR, blob_key
+
+
+def run(count):
+    work = tempfile.mkdtemp()
+    flat = os.path.join(work, 'flat')
+    sharded = os.path.join(work, PROOF_DIR)
+    os.makedirs(flat)
+    keys = [blob_key(hashlib.sha256(str(i).encode()).hexdigest(), 'jpg') for i in range(count)]
+    for key in keys:
+        open(os.path.join(flat, key), 'wb').close()
+        shard = os.path.join(sharded, key[:2])
+        os.makedirs(shard, exist_ok=True)
+        open(os.path.join(shard, key), 'wb').close()
+
+    def timed(fn):
+        start = time.perf_counter()
+        fn()
+        return (time.perf_counter() - start) * 1000
+
+    sample = random.sample(keys, min(1000, count))
+    print(f"{count} file bukti:")
+    print(f"  listing direktori datar           {timed(lambda: os.listdir(flat)):9.1f} ms")
+    print(f"  listing satu shard                {timed(lambda: os.listdir(os.path.join(sharded, keys[0][:2]))):9.1f} ms"
+          f" ({len(os.listdir(os.path.join(sharded, keys[0][:2])))} file)")
+    print(f"  walk semua shard (backup)         {timed(lambda: sum(len(f) for _, _, f in os.walk(sharded))):9.1f} ms")
+    print(f"  1000 lookup datar                 "
+          f"{timed(lambda: [os.path.exists(os.path.join(flat, k)) for k in sample]):9.1f} ms")
+    print(f"  1000 lookup shard                 "
+          f"{timed(lambda: [os.path.exists(os.path.join(sharded, k[:2], k)) for k in sample]):9.1f} ms")
+    shutil.rmtree(work)
+
+
+if __name__ == '__main__':
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 100000)
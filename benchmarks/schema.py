@@ -0,0 +1,87 @@
+"""Filter halaman admin sebelum/sesudah migrasi index users.db"""
+
+import sys
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import text
+
+from app.models import db, Batch, Peserta
+from app.schema import BACKFILL_BATCH_ID, migrate
+
+from .synthetic import synthetic_db
+
+QUERIES = [
+    ("kelola_peserta status=belum", lambda: Peserta.query.filter_by(status_pembayaran='Belum')
+        .order_by(Peserta.tanggal_daftar.desc()).limit(50).all()),
+    ("verifikasi_pembayaran menunggu", lambda: Peserta.query.filter_by(status_pembayaran='Menunggu').all()),
+    ("dokumen_permission akses", lambda: Peserta.query.filter_by(akses_dokumen_bengkel=True)
+        .order_by(Peserta.tanggal_daftar.desc()).limit(50).all()),
+    ("count akses dokumen", lambda: Peserta.query.filter_by(akses_dokumen_bengkel=True).count()),
+    ("anggota grup (string)", lambda: Peserta.query.filter(Peserta.batch == 'Grup 7').count()),
+    ("anggota grup (batch_id)", lambda: Peserta.query.filter(Peserta.batch_id == 8).count()),
+]
+
+
+def _time_queries(rounds=5):
+    results = {}
+    for label, query in QUERIES:
+        start = time.perf_counter()
+        for _ in range(rounds):
+            query()
+            db.session.expunge_all()
+        results[label] = (time.perf_counter() - start) / rounds * 1000
+    return results
+
+
+def run(count):
+    with synthetic_db():
+        # Skema lama: tanpa batch_id & tanpa index
+        db.session.execute(text(
+            "CREATE TABLE batch (id INTEGER PRIMARY KEY, nama VARCHAR(100) UNIQUE NOT NULL, "
+            "whatsapp_link VARCHAR(255) NOT NULL, akses_workshop_default BOOLEAN, aktif BOOLEAN, "
+            "tanggal_dibuat DATETIME)"
+        ))
+        peserta_columns = [c for c in Peserta.__table__.columns if c.name != 'batch_id']
+        db.session.execute(text(
+            "CREATE TABLE peserta (id INTEGER PRIMARY KEY, "
+            + ", ".join(f"{c.name} {c.type.compile(db.engine.dialect)}" for c in peserta_columns if c.name != 'id')
+            + ")"
+        ))
+        db.session.execute(text(
+            "CREATE TABLE document_access (id INTEGER PRIMARY KEY, tipe_akses VARCHAR(20), "
+            "batch_id INTEGER, peserta_id INTEGER)"
+        ))
+        db.session.execute(Batch.__table__.insert(), [
+            {'nama': f'Grup {i}', 'whatsapp_link': '-', 'aktif': True} for i in range(20)
+        ])
+        statuses = ['Belum', 'Menunggu', 'Lunas', 'Ditolak']
+        base = datetime(2024, 1, 1)
+        db.session.execute(text(
+            "INSERT INTO peserta (nama, whatsapp, batch, status_pembayaran, akses_dokumen_bengkel, tanggal_daftar) "
+            "VALUES (:nama, :whatsapp, :batch, :status, :akses, :tanggal)"
+        ), [
+            {'nama': f'Peserta {i}', 'whatsapp': f'08{i:010d}', 'batch': f'Grup {i % 20}',
+             'status': statuses[i % 4] if i % 10 else 'Menunggu', 'akses': i % 25 == 0,
+             'tanggal': base + timedelta(minutes=i)}
+            for i in range(count)
+        ])
+        db.session.commit()
+
+        db.session.execute(text("ALTER TABLE peserta ADD COLUMN batch_id INTEGER"))
+        db.session.execute(text(BACKFILL_BATCH_ID))
+        db.session.commit()
+        before = _time_queries()
+
+        migrate(db.engine)
+        db.session.execute(text("ANALYZE"))
+        db.session.commit()
+        after = _time_queries()
+
+    print(f"{count} peserta (rata-rata 5 putaran):")
+    for label, _ in QUERIES:
+        print(f"  {label:32s} {before[label]:8.1f} ms -> {after[label]:6.1f} ms")
+
+
+if __name__ == '__main__':
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 100000)
@@ -0,0 +1,155 @@
+"""
+Sync Dokumen Bengkel terhadap FakeDrive.
+
+    python -m benchmarks.sync_drive [file_per_folder] [jumlah_perubahan]   # full vs inkremental
+    python -m benchmarks.sync_drive walk [latency_ms] [kuota_per_detik]    # traversal paralel
+"""
+
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+# Append, bukan insert: Dokumen Bengkel/app.py tidak boleh menutupi paket app
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'Dokumen Bengkel'))
+
+import sync_drive  # noqa: E402
+from fake_drive import FakeDrive, build_corpus  # noqa: E402
+from sync_drive import FOLDER_MIME, TARGET_FOLDERS, DatabaseManager, QuotaBackoff, sync_all, walk_folders  # noqa: E402
+
+
+def _catalog_rows(db):
+    return db.execute(
+        "SELECT id, name, is_directory, parent_id, root_folder_name FROM files ORDER BY id"
+    ).fetchall()
+
+
+def run(files_per_folder=225, change_count=50):
+    """Full vs inkremental (4 root x 14 folder, seperti katalog produksi)"""
+    sync_drive.LOG_FILE = None
+    work = tempfile.mkdtemp()
+    rng = random.Random(24)
+    drive = FakeDrive()
+    roots = list(TARGET_FOLDERS.values())
+    folders = build_corpus(drive, roots, 14, files_per_folder)
+    # Folder di luar target yang nanti dipindah masuk (isinya harus ikut terdaftar)
+    outside = drive.add("Arsip luar", "bukan-target", folder=True)
+    for i in range(20):
+        drive.add(f"Arsip {i}.pdf", outside)
+
+    db = DatabaseManager(db_path=os.path.join(work, 'catalog.db'))
+
+    def timed_sync(full):
+        drive.calls.clear()
+        start = time.perf_counter()
+        stats = sync_all(full=full, service=drive, db=db)
+        return time.perf_counter() - start, sum(drive.calls.values()), stats
+
+    elapsed, calls, stats = timed_sync(full=True)
+    total = len(_catalog_rows(db))
+    print(f"\nKatalog {total} item ({len(folders)} folder):")
+    print(f"  full        {elapsed * 1000:8.1f} ms, {calls:5d} panggilan API")
+
+    files = [item_id for item_id, item in drive.items.items()
+             if item['mimeType'] != FOLDER_MIME and item['parents'][0] in folders]
+    for i in range(change_count):
+        action = i % 5
+        if action == 0:
+            drive.add(f"Baru {i}.pdf", rng.choice(folders))
+        elif action == 1:
+            drive.update(rng.choice(files), name=f"Revisi {i}.pdf", modifiedTime='2025-01-01T00:00:00.000Z')
+        elif action == 2:
+            drive.move(rng.choice(files), rng.choice(folders))
+        elif action == 3:
+            drive.trash(files.pop(rng.randrange(len(files))))
+        else:
+            drive.delete(files.pop(rng.randrange(len(files))))
+    drive.move(folders[1], roots[2])  # subfolder pindah antar root
+    drive.move(outside, folders[3])   # folder luar masuk target
+    drive.trash(folders[-1])          # folder beserta isinya dibuang
+
+    elapsed, calls, stats = timed_sync(full=False)
+    incremental_rows = _catalog_rows(db)
+    print(f"  incremental {elapsed * 1000:8.1f} ms, {calls:5d} panggilan API "
+          f"({change_count + 3} perubahan: {dict(stats)})")
+
+    reference = DatabaseManager(db_path=os.path.join(work, 'reference.db'))
+    sync_all(full=True, service=drive, db=reference)
+    same = _catalog_rows(reference) == incremental_rows
+    reference.close()
+    print(f"  {'✅' if same else '❌'} hasil inkremental {'sama dengan' if same else 'BERBEDA dari'} rescan penuh")
+
+    drive.add("Setelah token kedaluwarsa.pdf", folders[0])
+    drive.expire_before(len(drive.log))
+    elapsed, calls, stats = timed_sync(full=False)
+    print(f"  token 410   {elapsed * 1000:8.1f} ms, {calls:5d} panggilan API (fallback rescan penuh)")
+
+    db.close()
+    shutil.rmtree(work)
+    return same
+
+
+def run_walk(latency_ms=80, quota=40):
+    """Traversal paralel vs berurutan dengan latency & kuota per detik"""
+    sync_drive.LOG_FILE = None
+    # 225 file/folder dengan halaman 100 -> 3 halaman per folder (168 halaman)
+    sync_drive.LIST_PAGE_SIZE = 100
+    sync_drive.BACKOFF_BASE = 0.25
+    drive = FakeDrive(latency=latency_ms / 1000)
+    roots = list(TARGET_FOLDERS.values())
+    build_corpus(drive, roots, 14, 225)
+    folders = [(folder_id, key) for key, folder_id in TARGET_FOLDERS.items()]
+
+    def walk(concurrency):
+        drive.calls.clear()
+        drive.max_in_flight = 0
+        backoff = QuotaBackoff()
+        start = time.perf_counter()
+        count = sum(len(entries) for entries in walk_folders(drive, folders, concurrency, backoff))
+        return time.perf_counter() - start, count, backoff.retries
+
+    print(f"\nTraversal {len(drive.items)} item, latency {latency_ms} ms/panggilan, "
+          f"halaman {sync_drive.LIST_PAGE_SIZE}:")
+    baseline = None
+    for concurrency in (1, 4, 8, 16):
+        elapsed, count, _ = walk(concurrency)
+        baseline = baseline or elapsed
+        print(f"  {concurrency:2d} paralel {elapsed:6.2f} s, {drive.calls['files.list']:4d} files.list, "
+              f"{count} item, puncak {drive.max_in_flight} bersamaan ({baseline / elapsed:4.1f}x)")
+
+    drive.quota_per_second = quota
+    elapsed, count, retries = walk(16)
+    print(f"  16 paralel, kuota {quota}/detik: {elapsed:6.2f} s, {count} item, "
+          f"{drive.calls['rate_limited']} ditolak 403/429, {retries} retry dengan backoff")
+    drive.quota_per_second = None
+
+    # Sync penuh: baris ditulis ke SQLite sambil halaman berikutnya diambil
+    work = tempfile.mkdtemp()
+    for concurrency in (1, sync_drive.SYNC_CONCURRENCY):
+        sync_drive.SYNC_CONCURRENCY = concurrency
+        db = DatabaseManager(db_path=os.path.join(work, f'catalog_{concurrency}.db'))
+        start = time.perf_counter()
+        stats = sync_all(full=True, service=drive, db=db)
+        print(f"  sync penuh {concurrency:2d} paralel: {time.perf_counter() - start:6.2f} s, "
+              f"{stats['updated']} baris ditulis")
+        db.close()
+    shutil.rmtree(work)
+
+    # Pohon sangat dalam: versi rekursif lama kena RecursionError (~1000 tingkat)
+    deep = FakeDrive()
+    parent = roots[0]
+    for level in range(3 * sys.getrecursionlimit()):
+        parent = deep.add(f"Level {level}", parent, folder=True)
+    start = time.perf_counter()
+    count = sum(len(entries) for entries in walk_folders(deep, [(roots[0], 'EBOOKS')]))
+    print(f"  pohon {count} tingkat: {time.perf_counter() - start:.2f} s tanpa rekursi")
+
+
+if __name__ == '__main__':
+    args = sys.argv[1:]
+    if args and args[0] == 'walk':
+        run_walk(*(int(arg) for arg in args[1:3]))
+    elif not run(*(int(arg) for arg in args[:2])):
+        sys.exit(1)
@@ -0,0 +1,39 @@
+"""Helper bersama: database users.db sintetis & pengukuran waktu/memori"""
+
+import os
+import tempfile
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+from flask import Flask
+
+from app.models import db
+
+
+@contextmanager
+def synthetic_db():
+    """App context Flask minimal dengan database SQLite sementara (tanpa create_all)"""
+    app = Flask(__name__)
+    tmp = tempfile.NamedTemporaryFile(suffix='.db', delete=False)
+    tmp.close()
+    app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{tmp.name}'
+    db.init_app(app)
+    try:
+        with app.app_context():
+            yield app
+            db.session.remove()
+            db.engine.dispose()
+    finally:
+        os.unlink(tmp.name)
+
+
+def measure(run):
+    """Return (ms, puncak memori MB, hasil run())"""
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = run()
+    elapsed = (time.perf_counter() - start) * 1000
+    peak = tracemalloc.get_traced_memory()[1] / 1024 / 1024
+    tracemalloc.stop()
+    return elapsed, peak, result
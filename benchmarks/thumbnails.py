@@ -0,0 +1,54 @@
+"""Ukuran & kecepatan thumbnail bukti transfer (foto struk 3000x4000)"""
+
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+from app.thumbnails import THUMBNAIL_FORMAT, THUMBNAIL_SIZE, Image, render_thumbnail
+
+
+def _sample_proof(path, index):
+    """Foto bukti transfer sintetis 3000x4000 (layar struk + noise kamera)"""
+    from PIL import ImageDraw
+
+    image = Image.effect_noise((750, 1000), 24).convert('RGB').resize((3000, 4000))
+    draw = ImageDraw.Draw(image)
+    draw.rectangle((300, 400, 2700, 3600), fill=(245, 245, 245))
+    for line in range(40):
+        y = 500 + line * 75
+        draw.rectangle((400, y, 400 + (index * 37 + line * 91) % 2000, y + 30), fill=(40, 40, 40))
+    image.save(path, 'JPEG', quality=90)
+
+
+def run(count):
+    if Image is None:
+        print("Pillow tidak terpasang")
+        return
+    work = tempfile.mkdtemp()
+    sources = []
+    for i in range(count):
+        path = os.path.join(work, f'bukti_{i}.jpg')
+        _sample_proof(path, i)
+        sources.append(path)
+
+    start = time.perf_counter()
+    thumb_bytes = 0
+    for i, path in enumerate(sources):
+        thumb_bytes += render_thumbnail(path, 'jpg', os.path.join(work, f'bukti_{i}.thumb.{THUMBNAIL_FORMAT}'))
+    elapsed = time.perf_counter() - start
+    full_bytes = sum(os.path.getsize(path) for path in sources)
+    shutil.rmtree(work)
+
+    print(f"{count} bukti transfer 3000x4000 JPEG, thumbnail {THUMBNAIL_SIZE}px {THUMBNAIL_FORMAT}:")
+    print(f"  worker: {count / elapsed:.1f} thumbnail/detik ({elapsed / count * 1000:.0f} ms per bukti)")
+    print(f"  file penuh {full_bytes / 1024:9.0f} KB, thumbnail {thumb_bytes / 1024:6.0f} KB "
+          f"(rata-rata {thumb_bytes / count / 1024:.1f} KB)")
+    for label, kbps in (('Slow 3G 400 kbps', 400), ('Fast 3G 1.6 Mbps', 1600)):
+        rate = kbps * 1000 / 8
+        print(f"  {label}: halaman {count} baris penuh {full_bytes / rate:7.1f} s, thumbnail {thumb_bytes / rate:5.2f} s")
+
+
+if __name__ == '__main__':
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 50)
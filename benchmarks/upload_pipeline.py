@@ -0,0 +1,90 @@
+"""Upload bukti paralel: werkzeug default vs pipeline streaming (puncak memori & throughput)"""
+
+import os
+import shutil
+import sys
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from flask import Request
+from werkzeug.test import EnvironBuilder
+
+from app.upload_pipeline import PROOF_SIGNATURES, UploadRequest, begin_proof_upload
+
+from .synthetic import measure
+
+
+def _multipart_body(path, size):
+    boundary = 'benchmarkboundary'
+    with open(path, 'wb') as f:
+        f.write(f'--{boundary}\r\nContent-Disposition: form-data; name="proof"; filename="bukti.png"\r\n'
+                f'Content-Type: image/png\r\n\r\n'.encode())
+        f.write(PROOF_SIGNATURES[0][0])
+        remaining = size - len(PROOF_SIGNATURES[0][0])
+        block = os.urandom(64 * 1024)
+        while remaining > 0:
+            f.write(block[:remaining])
+            remaining -= len(block)
+        f.write(f'\r\n--{boundary}--\r\n'.encode())
+    return boundary
+
+
+def run(concurrency, size_mb):
+    work = tempfile.mkdtemp()
+    body_path = os.path.join(work, 'body')
+    boundary = _multipart_body(body_path, int(size_mb * 1024 * 1024))
+    length = os.path.getsize(body_path)
+    upload_folder = os.path.join(work, 'uploads')
+    os.makedirs(upload_folder)
+    counter = iter(range(10 ** 9))
+    counter_lock = threading.Lock()
+
+    def environ(body):
+        env = EnvironBuilder(method='POST', path='/dashboard/upload-payment').get_environ()
+        env.update({
+            'CONTENT_TYPE': f'multipart/form-data; boundary={boundary}',
+            'CONTENT_LENGTH': str(length),
+            'wsgi.input': body,
+        })
+        return env
+
+    def default_upload(_):
+        # Alur lama: werkzeug default (SpooledTemporaryFile) lalu file.save
+        with open(body_path, 'rb') as body:
+            request = Request(environ(body))
+            with counter_lock:
+                n = next(counter)
+            request.files['proof'].save(os.path.join(upload_folder, f'default_{n}.png'))
+            request.close()
+
+    def pipeline_upload(_):
+        with open(body_path, 'rb') as body:
+            request = UploadRequest(environ(body))
+            stage = begin_proof_upload(request, upload_folder, max_bytes=length)
+            try:
+                with counter_lock:
+                    n = next(counter)
+                stage.commit(request.files['proof'].stream, f'pipeline_{n}.png')
+            finally:
+                stage.cleanup()
+                request.close()
+
+    def parallel(upload):
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            list(pool.map(upload, range(concurrency * 4)))
+
+    print(f"{concurrency} upload paralel x {size_mb} MB:")
+    for label, upload in (('werkzeug default', default_upload), ('pipeline', pipeline_upload)):
+        elapsed, peak, _ = measure(lambda: parallel(upload))
+        print(f"  {label:17s} {concurrency * 4 * size_mb / (elapsed / 1000):7.1f} MB/detik, "
+              f"puncak memori {peak:6.2f} MB ({peak / concurrency:5.2f} MB per upload)")
+
+    shutil.rmtree(work)
+
+
+if __name__ == '__main__':
+    run(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 8,
+        float(sys.argv[2]) if len(sys.argv) > 2 else 4.5
+    )
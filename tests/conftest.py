@@ -0,0 +1,85 @@
+import os
+import sys
+
+# Sebelum app diimport: hashing murah, tanpa worker thumbnail
+os.environ.setdefault('SECRET_KEY', 'test-secret-key')
+os.environ['PASSWORD_HASH_METHOD'] = 'pbkdf2:sha256:1000'
+os.environ['PASSWORD_HASH_WORKERS'] = '1'
+os.environ['IMPORT_HASH_WORKERS'] = '1'
+os.environ['THUMBNAIL_WORKER'] = 'off'
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+import pytest
+
+from app import create_app
+from app import document_access, documents_handler, identity
+from app.models import db, Peserta, Admin
+
+
+@pytest.fixture
+def make_app(tmp_path, monkeypatch):
+    """Factory app dengan database, upload, session & rate limit di tmp_path"""
+    # Katalog Dokumen Bengkel milik repo tidak ikut dimigrasi oleh test
+    monkeypatch.setattr(documents_handler, 'get_documents_db_path', lambda: str(tmp_path / 'catalog.db'))
+    apps = []
+
+    def factory(**config):
+        settings = {
+            'TESTING': True,
+            'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'users.db'}",
+            'UPLOAD_FOLDER': str(tmp_path / 'instance' / 'uploads'),
+            'WTF_CSRF_ENABLED': False,
+            'RATELIMIT_ENABLED': False,
+        }
+        settings.update(config)
+        app = create_app(settings)
+        apps.append(app)
+        return app
+
+    yield factory
+
+    for app in apps:
+        with app.app_context():
+            db.session.remove()
+            db.engine.dispose()
+    identity._cache.clear()
+    document_access._cache.clear()
+    document_access._epochs.update({'signature': document_access._NOT_LOADED, 'values': {}})
+
+
+@pytest.fixture
+def app(make_app):
+    return make_app()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+def add_peserta(nama='Budi Santoso', whatsapp='081234567890', password='Rahasia123', **fields):
+    peserta = Peserta(nama=nama, whatsapp=whatsapp, **fields)
+    peserta.set_password(password)
+    db.session.add(peserta)
+    db.session.commit()
+    return peserta
+
+
+def add_admin(username='admin', password='AdminRahasia1'):
+    admin = Admin(username=username)
+    admin.set_password(password)
+    db.session.add(admin)
+    db.session.commit()
+    return admin
+
+
+def login_as(client, peserta_id=None, admin=None):
+    with client.session_transaction() as sess:
+        if peserta_id is not None:
+            sess['user_id'] = peserta_id
+        if admin:
+            sess['admin'] = True
+            sess['admin_username'] = admin
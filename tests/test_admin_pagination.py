@@ -0,0 +1,50 @@
+import sqlite3
+
+from conftest import login_as
+
+from app import routes, stats
+from app.models import db
+
+
+def _insert_from_other_worker(app, start, count, status='Lunas', akses=True):
+    """Tulis langsung ke users.db seperti worker lain: cache statistik worker ini tidak tahu"""
+    with app.app_context():
+        path = db.engine.url.database
+    with sqlite3.connect(path) as conn:
+        conn.executemany(
+            "INSERT INTO peserta (nama, whatsapp, status_pembayaran, akses_dokumen_bengkel, tanggal_daftar) "
+            "VALUES (?, ?, ?, ?, '2024-01-01 00:00:00')",
+            [(f'Peserta {i}', f'0812{i:08d}', status, akses) for i in range(start, start + count)]
+        )
+
+
+def test_filtered_pages_count_rows_instead_of_cached_stats(app, client):
+    _insert_from_other_worker(app, 0, 10)
+    with app.app_context():
+        stats.invalidate_stats()
+        assert stats.peserta_stats()['lunas'] == 10
+    _insert_from_other_worker(app, 10, 50)
+    login_as(client, admin='admin')
+
+    page = client.get('/admin/peserta?status=lunas').get_data(as_text=True)
+    assert 'Page 1 of 2' in page
+
+
+def test_dokumen_permission_filter_counts_rows(app, client, monkeypatch):
+    # Template halaman ini meng-extend admin/base.html yang tidak ada; cukup periksa konteksnya
+    rendered = {}
+    monkeypatch.setattr(routes, 'render_template', lambda name, **context: rendered.update(context) or '')
+    _insert_from_other_worker(app, 0, 10)
+    _insert_from_other_worker(app, 10, 10, status='Belum', akses=False)
+    with app.app_context():
+        stats.invalidate_stats()
+        assert stats.peserta_stats()['dengan_akses'] == 10
+    _insert_from_other_worker(app, 20, 50)
+    login_as(client, admin='admin')
+
+    client.get('/admin/dokumen-permission?filter=memiliki')
+    assert rendered['peserta_list'].total == 60
+    assert rendered['peserta_list'].pages == 2
+
+    client.get('/admin/dokumen-permission?filter=tidak')
+    assert rendered['peserta_list'].total == 10
@@ -0,0 +1,106 @@
+import csv
+import io
+import time
+
+from conftest import add_peserta, login_as
+
+from app import bulk_import
+from app.models import db, ImportJob, Peserta
+
+CSV = (
+    "nama,whatsapp,batch,password\n"
+    "Andi,081200000001,,Rahasia123\n"
+    "Budi,081200000002,Batch 7,\n"
+    "Cici,0812,,\n"
+    "Dodi,081234567890,,\n"
+    "Eka,081200000003,,"
+)
+
+
+def _wait(client, url, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = client.get(url).get_json()
+        if job['status'] not in ('antri', 'proses'):
+            return job
+        time.sleep(0.05)
+    raise AssertionError(f'job import belum selesai: {job}')
+
+
+def _upload(client, body, name='cohort.csv'):
+    return client.post('/admin/peserta/import', data={
+        'file': (io.BytesIO(body if isinstance(body, bytes) else body.encode()), name), 'batch': 'Batch 8'
+    }, content_type='multipart/form-data')
+
+
+def test_import_runs_as_background_job(app, client, monkeypatch, tmp_path):
+    monkeypatch.setattr(bulk_import, 'IMPORT_JOB_CHUNK_SIZE', 1)
+    with app.app_context():
+        add_peserta(whatsapp='081234567890')
+    login_as(client, admin='admin')
+
+    response = _upload(client, CSV)
+    assert response.status_code == 202
+    started = response.get_json()
+    assert started['perkiraan_baris'] == 5
+
+    job = _wait(client, started['status_url'])
+    assert job['status'] == 'selesai'
+    assert (job['diproses'], job['berhasil']) == (5, 3)
+    hasil = job['hasil']
+    assert {e['whatsapp']: e['error'] for e in hasil['errors']} == {
+        '0812': 'Format nomor WhatsApp tidak valid',
+        '081234567890': 'Nomor WhatsApp sudah terdaftar',
+    }
+    assert hasil['generated_passwords'] == 2
+    assert 'credentials' not in hasil
+
+    # Hanya file password awal yang tersisa; password tidak pernah masuk database
+    imports = tmp_path / 'instance' / 'imports'
+    assert [p.name.split('-')[0] for p in imports.iterdir()] == ['kredensial']
+    for _ in range(2):  # bisa diunduh ulang selama TTL (respons yang hilang tidak fatal)
+        download = client.get(started['credentials_url'])
+        assert download.status_code == 200
+        assert download.headers['Cache-Control'] == 'no-store'
+    credentials = list(csv.DictReader(io.StringIO(download.get_data(as_text=True))))
+    assert sorted(c['whatsapp'] for c in credentials) == ['081200000002', '081200000003']
+    assert client.get(started['credentials_url'].replace('token=', 'token=x')).status_code == 404
+    with app.app_context():
+        stored = db.session.get(ImportJob, started['job_id']).hasil
+        assert not any(c['password'] in stored for c in credentials)
+
+    with app.app_context():
+        imported = {p.whatsapp: p for p in Peserta.query.filter(Peserta.whatsapp.like('0812000000%'))}
+        assert imported['081200000001'].check_password('Rahasia123')
+        assert imported['081200000001'].batch == 'Batch 8'
+        assert imported['081200000002'].batch == 'Batch 7'
+        budi = next(c for c in credentials if c['whatsapp'] == '081200000002')
+        assert imported['081200000002'].check_password(budi['password'])
+
+    # Kedaluwarsa: file dihapus, unduhan ditolak
+    monkeypatch.setattr(bulk_import, 'IMPORT_CREDENTIALS_TTL', -1)
+    assert client.get(started['credentials_url']).status_code == 404
+    assert list(imports.iterdir()) == []
+
+
+def test_import_job_reports_failure(app, client):
+    login_as(client, admin='admin')
+    response = _upload(client, 'nama,whatsapp\nAndi,081200000001\n'.encode() + b'\xff\xfe,0812\n')
+    job = _wait(client, response.get_json()['status_url'])
+    assert job['status'] == 'gagal'
+    assert 'utf-8' in job['error']
+
+
+def test_stale_job_is_reported_failed(app, client):
+    login_as(client, admin='admin')
+    with app.app_context():
+        job = ImportJob(nama_file='cohort.csv', status='proses')
+        db.session.add(job)
+        db.session.commit()
+        db.session.execute(db.text("UPDATE import_job SET diperbarui = '2020-01-01 00:00:00'"))
+        db.session.commit()
+        job_id = job.id
+
+    job = client.get(f'/admin/peserta/import/{job_id}').get_json()
+    assert job['status'] == 'gagal'
+    assert client.get('/admin/peserta/import/999').status_code == 404
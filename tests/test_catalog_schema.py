@@ -0,0 +1,42 @@
+import hashlib
+import shutil
+import sqlite3
+
+import pytest
+
+from app.documents_handler import BENGKEL_DIR, catalog_schema
+
+CATALOG = BENGKEL_DIR / 'database.db'
+
+
+def _digest(path):
+    return hashlib.sha256(path.read_bytes()).hexdigest()
+
+
+@pytest.fixture
+def migrated_catalog(tmp_path):
+    """Salinan katalog repo yang sudah dimigrasi; database.db asli tidak disentuh"""
+    before = _digest(CATALOG)
+    path = tmp_path / 'database.db'
+    shutil.copyfile(CATALOG, path)
+    assert catalog_schema.migrate_path(str(path)) == [version for version, _, _ in catalog_schema.MIGRATIONS]
+    conn = sqlite3.connect(path)
+    yield conn
+    conn.close()
+    assert _digest(CATALOG) == before
+
+
+def test_hot_queries_use_indexes(migrated_catalog):
+    assert catalog_schema.find_table_scans(migrated_catalog) == []
+
+
+def test_find_table_scans_reports_unindexed_query(migrated_catalog):
+    scans = catalog_schema.find_table_scans(
+        migrated_catalog, [("by modified_time", "SELECT * FROM files WHERE modified_time > ?", ("",))]
+    )
+    assert [label for label, _ in scans] == ["by modified_time"]
+
+
+def test_migration_is_idempotent(migrated_catalog, tmp_path):
+    assert catalog_schema.migrate_path(str(tmp_path / 'database.db')) == []
+    assert catalog_schema.get_schema_version(migrated_catalog) == catalog_schema.MIGRATIONS[-1][0]
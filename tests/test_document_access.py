@@ -0,0 +1,84 @@
+import os
+import time
+
+from sqlalchemy import event
+
+from conftest import add_peserta
+
+from app import document_access
+from app.document_access import (
+    CLAIM_SESSION_KEY, check_document_access, resolve_document_access, verify_access_claim,
+)
+from app.models import db, AccessEpoch, Peserta
+
+
+def _revoke_from_other_worker(app, peserta_id):
+    """Revokasi seperti dari worker gunicorn lain: DB + file penanda, tanpa invalidasi lokal"""
+    db.session.query(Peserta).filter_by(id=peserta_id).update({'akses_dokumen_bengkel': False})
+    db.session.merge(AccessEpoch(peserta_id=peserta_id, epoch=1))
+    db.session.commit()
+    path = app.config['ACCESS_EPOCH_FILE']
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w') as f:
+        f.write(f"{peserta_id}:1:{time.time()}")
+
+
+def test_resolve_uses_one_query_then_cache(app):
+    with app.app_context():
+        peserta_id = add_peserta(akses_dokumen_bengkel=True).id
+        # Map epoch dimuat sekali per worker (sampai file penanda berubah), bukan per resolve
+        with app.test_request_context():
+            document_access._current_epochs()
+        statements = []
+
+        def count(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        event.listen(db.engine, 'before_cursor_execute', count)
+        try:
+            with app.test_request_context():
+                decision = resolve_document_access(peserta_id)
+            assert len(statements) == 1
+            assert decision.allowed and decision.reason == 'Legacy'
+            assert peserta_id in document_access._cache
+
+            # App context baru = flask.g baru: yang diuji cache worker, bukan memo per request
+            with app.app_context(), app.test_request_context():
+                cached = resolve_document_access(peserta_id)
+            assert len(statements) == 1
+            assert cached.allowed and cached.reason == 'Legacy'
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', count)
+
+
+def test_cached_decision_not_reused_after_revocation(app):
+    with app.app_context():
+        peserta = add_peserta(akses_dokumen_bengkel=True)
+        with app.test_request_context():
+            assert resolve_document_access(peserta.id).allowed
+
+        _revoke_from_other_worker(app, peserta.id)
+
+        # Tanpa klaim di session: harus query ulang, bukan memakai cache "boleh"
+        with app.test_request_context():
+            decision = check_document_access(peserta.id)
+            assert not decision.allowed
+            from flask import session
+            assert CLAIM_SESSION_KEY not in session
+
+
+def test_claim_rejected_after_revocation(app):
+    with app.app_context():
+        peserta = add_peserta(akses_dokumen_bengkel=True)
+        with app.test_request_context():
+            from flask import session
+            assert check_document_access(peserta.id).allowed
+            claim = session[CLAIM_SESSION_KEY]
+
+        _revoke_from_other_worker(app, peserta.id)
+
+        with app.test_request_context():
+            from flask import session
+            session[CLAIM_SESSION_KEY] = claim
+            assert verify_access_claim(peserta.id) is None
+            assert not check_document_access(peserta.id).allowed
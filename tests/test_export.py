@@ -0,0 +1,66 @@
+import csv
+import io
+import sqlite3
+import zipfile
+from xml.etree import ElementTree
+
+from conftest import add_peserta, login_as
+
+from app import export
+from app.models import db, Peserta
+
+
+def _db_file(app):
+    return app.config['SQLALCHEMY_DATABASE_URI'][len('sqlite:///'):]
+
+
+def test_export_does_not_hold_read_lock_while_streaming(app, client, monkeypatch):
+    monkeypatch.setattr(export, 'EXPORT_CHUNK', 2)
+    monkeypatch.setattr(export, 'FLUSH_BYTES', 1)
+    with app.app_context():
+        for i in range(7):
+            add_peserta(nama=f'Peserta {i}', whatsapp=f'0812000000{i:02d}')
+    login_as(client, admin='admin')
+
+    response = client.get('/admin/peserta/export?format=csv&gzip=0', buffered=False)
+    chunks = iter(response.response)
+    first = next(chunks)
+    assert first
+
+    # Klien belum selesai mengunduh: commit dari request lain harus tetap bisa
+    writer = sqlite3.connect(_db_file(app), timeout=0.2)
+    writer.execute("UPDATE peserta SET alamat = 'baru' WHERE id = 1")
+    writer.commit()
+    writer.close()
+
+    body = first + b''.join(chunks)
+    response.close()
+    rows = list(csv.reader(io.StringIO(body.decode('utf-8-sig'))))
+    assert rows[0] == export.EXPORT_HEADER
+    assert [row[1] for row in rows[1:]] == [f'Peserta {i}' for i in range(7)]
+
+
+def test_export_rows_keyset_covers_search_results(app):
+    with app.app_context():
+        for i in range(5):
+            add_peserta(nama=f'Budi {i}', whatsapp=f'0812000000{i:02d}')
+        add_peserta(nama='Siti', whatsapp='081299999999')
+        from app.peserta_search import apply_search
+        rows = list(export.export_rows(apply_search(Peserta.query, 'Budi'), chunk_size=2))
+        assert [row[1] for row in rows] == [f'Budi {i}' for i in range(5)]
+
+
+def test_csv_cells_neutralize_formulas():
+    row = (1, '=HYPERLINK("http://x")', '+6281234', 'user@x.com', '-1+1', '@SUM(A1)', 'Biasa') + (None,) * 8
+    body = b''.join(export.csv_stream([row])).decode('utf-8-sig')
+    cells = list(csv.reader(io.StringIO(body)))[1]
+    assert cells[:7] == ['1', '\'=HYPERLINK("http://x")', "'+6281234", 'user@x.com', "'-1+1", "'@SUM(A1)", 'Biasa']
+
+
+def test_xlsx_strips_xml_illegal_characters():
+    row = (1, 'Nama\x00 dengan\x1b kontrol\x0b', '0812', None) + (None,) * 11
+    data = b''.join(export.xlsx_stream([row]))
+    with zipfile.ZipFile(io.BytesIO(data)) as archive:
+        sheet = ElementTree.fromstring(archive.read('xl/worksheets/sheet1.xml'))
+    texts = [node.text for node in sheet.iter('{http://schemas.openxmlformats.org/spreadsheetml/2006/main}t')]
+    assert 'Nama dengan kontrol' in texts
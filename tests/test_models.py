@@ -0,0 +1,41 @@
+from conftest import add_peserta
+
+from app import stats
+from app.models import db, Batch, Peserta
+
+
+def test_new_batch_links_existing_members(app, monkeypatch):
+    bumped = []
+    monkeypatch.setattr(app.session_interface, 'bump_identity_versions', bumped.extend)
+
+    with app.app_context():
+        peserta = add_peserta(batch='Grup Baru')
+        lain = add_peserta(nama='Siti', whatsapp='081200000009', batch='Grup Lain')
+        assert peserta.batch_id is None and peserta.grup is None
+        stats.peserta_stats()
+        bumped.clear()
+
+        batch = Batch(nama='Grup Baru', whatsapp_link='-')
+        db.session.add(batch)
+        db.session.flush()
+        # Objek yang sudah dimuat di session langsung melihat batch_id baru
+        assert peserta.batch_id == batch.id and peserta.grup is batch
+        assert lain.batch_id is None
+
+        db.session.commit()
+        assert bumped == [peserta.id]
+        assert 'peserta' not in stats._cache
+        assert db.session.get(Peserta, peserta.id).batch_id == batch.id
+
+
+def test_new_batch_links_member_added_in_same_flush(app):
+    with app.app_context():
+        peserta = Peserta(nama='Budi', whatsapp='081200000001', batch='Grup Baru')
+        peserta.set_password('Rahasia123')
+        batch = Batch(nama='Grup Baru', whatsapp_link='-')
+        db.session.add_all([peserta, batch])
+        db.session.flush()
+        assert peserta.batch_id == batch.id
+        db.session.commit()
+        db.session.expire_all()
+        assert peserta.batch_id == batch.id
@@ -0,0 +1,75 @@
+import importlib.util
+import os
+import threading
+import time
+
+import pytest
+from werkzeug.security import check_password_hash, generate_password_hash
+
+from app import password_hashing
+from app.password_hashing import PasswordHasher
+
+
+@pytest.mark.parametrize('cpus, web_workers, login, bulk', [
+    (16, '4', 2, 2),
+    (16, '8', 2, 1),
+    (4, '4', 1, 1),
+    (2, None, 2, 1),
+])
+def test_default_pool_sizes_share_cores_between_web_workers(monkeypatch, cpus, web_workers, login, bulk):
+    monkeypatch.setattr(os, 'cpu_count', lambda: cpus)
+    monkeypatch.delenv('PASSWORD_HASH_WORKERS', raising=False)
+    monkeypatch.delenv('IMPORT_HASH_WORKERS', raising=False)
+    if web_workers is None:
+        monkeypatch.delenv('WEB_CONCURRENCY', raising=False)
+    else:
+        monkeypatch.setenv('WEB_CONCURRENCY', web_workers)
+    spec = importlib.util.spec_from_file_location('_password_hashing_defaults', password_hashing.__file__)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    assert (module.HASH_WORKERS, module.HASH_BULK_WORKERS) == (login, bulk)
+
+
+def test_pool_uses_non_fork_context():
+    hasher = PasswordHasher(method='pbkdf2:sha256:1000', workers=1, bulk_workers=1)
+    try:
+        hasher.hash('x')
+        pool = hasher._pools['login'][1]
+        assert pool._mp_context.get_start_method() in ('forkserver', 'spawn')
+    finally:
+        hasher.shutdown()
+
+
+def test_broken_pool_is_rebuilt():
+    hasher = PasswordHasher(method='pbkdf2:sha256:1000', workers=1, bulk_workers=1)
+    try:
+        hasher.hash('x')
+        broken = hasher._pools['login'][1]
+        for process in list(broken._processes.values()):
+            process.kill()
+            process.join()
+        pwhash = hasher.hash('Rahasia123')
+        assert check_password_hash(pwhash, 'Rahasia123')
+        assert hasher._pools['login'][1] is not broken
+        assert hasher.stats()['pool_restarts'] == 1
+    finally:
+        hasher.shutdown()
+
+
+def test_bulk_hashing_does_not_block_login():
+    hasher = PasswordHasher(method='pbkdf2:sha256:200000', workers=1, bulk_workers=1)
+    pwhash = generate_password_hash('Rahasia123', 'pbkdf2:sha256:1000')
+    try:
+        hasher.verify(pwhash, 'Rahasia123')  # panaskan pool login
+        bulk = threading.Thread(target=hasher.hash_many, args=([f'pw{i}' for i in range(40)],))
+        bulk.start()
+        while 'bulk' not in hasher._pools:
+            time.sleep(0.01)
+        assert hasher.verify(pwhash, 'Rahasia123')
+        assert bulk.is_alive()
+        bulk.join()
+        stats = hasher.stats()
+        assert stats['bulk_completed'] == 40
+        assert stats['completed'] == 2
+    finally:
+        hasher.shutdown()
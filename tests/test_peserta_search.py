@@ -0,0 +1,46 @@
+from conftest import add_peserta
+
+from app.models import Peserta
+from app.peserta_search import apply_search
+
+WITH_EMAIL = (Peserta.nama, Peserta.whatsapp, Peserta.email)
+
+
+def _names(search, columns=None):
+    query = apply_search(Peserta.query, search, columns) if columns else apply_search(Peserta.query, search)
+    return [p.nama for p in query.all()]
+
+
+def _seed():
+    add_peserta(nama='Andi Peserta 4711', whatsapp='081200000001')
+    add_peserta(nama='Budi Santoso', whatsapp='081200004711')
+    add_peserta(nama='Citra', whatsapp='081200000002', email='citra4711@bengkel.com')
+
+
+def test_numeric_search_matches_phone_first_then_name(app):
+    with app.app_context():
+        _seed()
+        assert _names('4711') == ['Budi Santoso', 'Andi Peserta 4711']
+        assert _names('0812-0000-4711') == ['Budi Santoso']
+
+
+def test_numeric_search_respects_columns(app):
+    with app.app_context():
+        _seed()
+        assert 'Citra' not in _names('4711')
+        assert _names('4711', WITH_EMAIL)[:1] == ['Budi Santoso']
+        assert 'Citra' in _names('4711', WITH_EMAIL)
+
+
+def test_text_search_only_in_given_columns(app):
+    with app.app_context():
+        _seed()
+        assert _names('bengkel') == []
+        assert _names('bengkel', WITH_EMAIL) == ['Citra']
+        assert _names('santoso budi') == ['Budi Santoso']
+
+
+def test_short_numeric_search_falls_back_to_like(app):
+    with app.app_context():
+        _seed()
+        assert sorted(_names('47')) == ['Andi Peserta 4711', 'Budi Santoso']
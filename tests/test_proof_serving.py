@@ -0,0 +1,81 @@
+import io
+
+from conftest import add_peserta, login_as
+
+from app import proof_serving
+from app.models import db
+from app.proof_store import store_proof
+from app.upload_pipeline import UploadStage
+
+PDF = b'%PDF-1.4\n' + bytes(range(256)) * 40
+
+
+def _peserta_with_proof(app, whatsapp='081234567890'):
+    peserta = add_peserta(whatsapp=whatsapp)
+    stage = UploadStage(app.config['UPLOAD_FOLDER'])
+    key, _ = store_proof(stage, io.BytesIO(PDF), peserta)
+    db.session.commit()
+    stage.cleanup()
+    return peserta.id, key
+
+
+def test_admin_gets_cacheable_proof_with_etag(app, client):
+    with app.app_context():
+        _, key = _peserta_with_proof(app)
+    login_as(client, admin='admin')
+
+    response = client.get(f'/bukti/{key}')
+    assert response.status_code == 200
+    assert response.data == PDF
+    assert response.mimetype == 'application/pdf'
+    assert response.headers['ETag'] == f'"{key.split(".")[0]}"'
+    assert 'immutable' in response.headers['Cache-Control']
+    assert 'private' in response.headers['Cache-Control']
+
+    cached = client.get(f'/bukti/{key}', headers={'If-None-Match': response.headers['ETag']})
+    assert cached.status_code == 304
+    assert cached.data == b''
+
+
+def test_range_request_returns_partial_content(app, client):
+    with app.app_context():
+        _, key = _peserta_with_proof(app)
+    login_as(client, admin='admin')
+
+    response = client.get(f'/bukti/{key}', headers={'Range': 'bytes=100-199'})
+    assert response.status_code == 206
+    assert response.data == PDF[100:200]
+    assert response.headers['Content-Range'] == f'bytes 100-199/{len(PDF)}'
+
+
+def test_only_owner_or_admin_can_read_proof(app):
+    with app.app_context():
+        owner_id, key = _peserta_with_proof(app)
+        other_id = add_peserta(nama='Sari', whatsapp='081234567891').id
+
+    anonymous = app.test_client()
+    assert anonymous.get(f'/bukti/{key}').headers['Location'].endswith('/admin')
+
+    other = app.test_client()
+    login_as(other, peserta_id=other_id)
+    assert other.get(f'/bukti/{key}').headers['Location'].endswith('/dashboard')
+
+    owner = app.test_client()
+    login_as(owner, peserta_id=owner_id)
+    assert owner.get(f'/bukti/{key}').data == PDF
+
+    admin = app.test_client()
+    login_as(admin, admin='admin')
+    assert admin.get('/bukti/' + 'f' * 64 + '.pdf').status_code == 404
+
+
+def test_x_accel_offload_sends_headers_only(app, client, monkeypatch):
+    monkeypatch.setattr(proof_serving, 'PROOF_SENDFILE', 'x-accel')
+    with app.app_context():
+        _, key = _peserta_with_proof(app)
+    login_as(client, admin='admin')
+
+    response = client.get(f'/bukti/{key}')
+    assert response.status_code == 200
+    assert response.data == b''
+    assert response.headers['X-Accel-Redirect'] == f'/_bukti/proofs/{key[:2]}/{key}'
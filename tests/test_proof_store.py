@@ -0,0 +1,66 @@
+import io
+import os
+import time
+
+import pytest
+from conftest import add_peserta
+
+from app.models import db, ProofBlob, ProofReference
+from app.proof_store import blob_path, collect_garbage, store_proof
+from app.upload_pipeline import UploadRejected, UploadStage
+
+PNG = b'\x89PNG\r\n\x1a\n' + b'\x01' * 1024
+PDF = b'%PDF-1.4\n' + b'\x02' * 1024
+
+
+def _store(app, peserta, data, **stage_kwargs):
+    stage = UploadStage(app.config['UPLOAD_FOLDER'], **stage_kwargs)
+    try:
+        result = store_proof(stage, io.BytesIO(data), peserta, 'bukti')
+        db.session.commit()
+        return result
+    finally:
+        stage.cleanup()
+
+
+def test_plain_file_is_hashed_and_deduplicated(app):
+    with app.app_context():
+        budi = add_peserta()
+        sari = add_peserta(nama='Sari', whatsapp='081234567891')
+        key, duplicate = _store(app, budi, PNG)
+        assert key.endswith('.png') and not duplicate
+        assert _store(app, sari, PNG) == (key, True)
+
+        with open(blob_path(app.config['UPLOAD_FOLDER'], key), 'rb') as f:
+            assert f.read() == PNG
+        assert ProofBlob.query.count() == 1
+        assert ProofReference.query.count() == 2
+        assert os.listdir(os.path.join(app.config['UPLOAD_FOLDER'], '.tmp')) == []
+
+
+def test_plain_file_keeps_size_and_type_checks(app):
+    with app.app_context():
+        peserta = add_peserta()
+        with pytest.raises(UploadRejected):
+            _store(app, peserta, b'MZ' + b'\x00' * 100)
+        with pytest.raises(UploadRejected):
+            _store(app, peserta, PNG, max_bytes=100)
+        assert peserta.payment_proof is None
+        assert os.listdir(os.path.join(app.config['UPLOAD_FOLDER'], '.tmp')) == []
+
+
+def test_gc_removes_replaced_blob_only(app):
+    with app.app_context():
+        peserta = add_peserta()
+        old_key, _ = _store(app, peserta, PNG)
+        new_key, _ = _store(app, peserta, PDF)
+        assert [r.sha256 for r in ProofReference.query] == [new_key.split('.')[0]]
+
+        upload_folder = app.config['UPLOAD_FOLDER']
+        assert collect_garbage(upload_folder)['blob'] == 0  # masih dalam masa tenggang
+        time.sleep(0.01)
+        result = collect_garbage(upload_folder, grace=0)
+        assert result['blob'] == 1 and result['bytes'] == len(PNG)
+        assert not os.path.exists(blob_path(upload_folder, old_key))
+        assert os.path.exists(blob_path(upload_folder, new_key))
+        assert [b.sha256 for b in ProofBlob.query] == [new_key.split('.')[0]]
@@ -0,0 +1,50 @@
+import multiprocessing
+
+from sqlalchemy import create_engine, inspect, text
+
+from app.models import db
+from app.schema import SCHEMA_VERSION, migrate
+
+
+def _boot_worker(url, barrier, results):
+    # Seperti create_app di satu worker gunicorn
+    engine = create_engine(url)
+    barrier.wait()
+    try:
+        results.put(migrate(engine, db.metadata))
+    except Exception as e:  # pragma: no cover - dilaporkan ke test
+        results.put(repr(e))
+    finally:
+        engine.dispose()
+
+
+def test_concurrent_workers_migrate_once(tmp_path):
+    url = f"sqlite:///{tmp_path / 'users.db'}"
+    ctx = multiprocessing.get_context('fork')
+    workers = 4
+    barrier = ctx.Barrier(workers)
+    results = ctx.Queue()
+    processes = [ctx.Process(target=_boot_worker, args=(url, barrier, results)) for _ in range(workers)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join(60)
+
+    outcomes = [results.get(timeout=5) for _ in processes]
+    assert outcomes == [SCHEMA_VERSION] * workers
+
+    engine = create_engine(url)
+    with engine.connect() as conn:
+        versions = [row[0] for row in conn.execute(text("SELECT version FROM schema_migrations ORDER BY version"))]
+        assert versions == list(range(1, SCHEMA_VERSION + 1))
+        assert 'batch_id' in {c['name'] for c in inspect(conn).get_columns('peserta')}
+    engine.dispose()
+
+
+def test_migrate_is_noop_when_current(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'users.db'}")
+    assert migrate(engine, db.metadata) == SCHEMA_VERSION
+    assert migrate(engine, db.metadata) == SCHEMA_VERSION
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT COUNT(*) FROM schema_migrations")).scalar() == SCHEMA_VERSION
+    engine.dispose()
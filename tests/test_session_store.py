@@ -0,0 +1,90 @@
+import sqlite3
+import time
+
+from flask import session
+
+from app import session_store
+
+
+def _session_app(make_app):
+    app = make_app()
+
+    @app.route('/_session/set/<value>')
+    def set_value(value):
+        session['pesan'] = value
+        return ''
+
+    @app.route('/_session/get')
+    def get_value():
+        return session.get('pesan', '-')
+
+    @app.route('/_session/login/<int:user_id>')
+    def login(user_id):
+        session['user_id'] = user_id
+        return ''
+
+    @app.route('/_session/logout')
+    def logout():
+        session.pop('user_id', None)
+        return ''
+
+    return app
+
+
+def _rows(app):
+    with sqlite3.connect(app.config['SESSION_STORE_PATH']) as conn:
+        return conn.execute("SELECT sid, user_id FROM sessions").fetchall()
+
+
+def test_anonymous_session_lives_in_cookie(make_app):
+    app = _session_app(make_app)
+    client = app.test_client()
+
+    for i in range(5):
+        client.get(f'/_session/set/halo{i}')
+    assert client.get('/_session/get').get_data(as_text=True) == 'halo4'
+    assert _rows(app) == []
+
+    # Crawler tanpa cookie tidak menambah baris
+    for _ in range(20):
+        app.test_client().get('/_session/set/bot')
+    assert _rows(app) == []
+
+
+def test_tampered_anonymous_cookie_is_ignored(make_app):
+    app = _session_app(make_app)
+    client = app.test_client()
+    client.get('/_session/set/asli')
+    cookie = client.get_cookie('session')
+    client.set_cookie('session', cookie.value[:-2] + 'xx')
+    assert client.get('/_session/get').get_data(as_text=True) == '-'
+
+
+def test_login_moves_session_to_server_and_logout_removes_row(make_app):
+    app = _session_app(make_app)
+    client = app.test_client()
+    client.get('/_session/set/sebelum')
+    anonymous = client.get_cookie('session').value
+
+    client.get('/_session/login/7')
+    rows = _rows(app)
+    assert [user_id for _, user_id in rows] == [7]
+    server = client.get_cookie('session').value
+    assert server != anonymous and rows[0][0] in server
+    assert client.get('/_session/get').get_data(as_text=True) == 'sebelum'
+
+    client.get('/_session/logout')
+    assert _rows(app) == []
+    assert client.get('/_session/get').get_data(as_text=True) == 'sebelum'
+
+
+def test_expired_rows_are_purged(make_app, monkeypatch):
+    app = _session_app(make_app)
+    client = app.test_client()
+    client.get('/_session/login/1')
+    with sqlite3.connect(app.config['SESSION_STORE_PATH']) as conn:
+        conn.execute("UPDATE sessions SET expires = ?", (time.time() - 1,))
+
+    monkeypatch.setattr(app.session_interface, '_next_cleanup', 0)
+    app.test_client().get('/_session/login/2')
+    assert [user_id for _, user_id in _rows(app)] == [2]
@@ -0,0 +1,57 @@
+import os
+
+import pytest
+from conftest import add_peserta
+
+from app import thumbnails
+from app.models import db, ProofBlob
+from app.proof_store import blob_path, store_proof, thumbnail_path
+from app.upload_pipeline import UploadStage
+
+Image = pytest.importorskip('PIL.Image')
+
+
+def _store_image(app, image):
+    path = os.path.join(app.config['UPLOAD_FOLDER'], 'sumber.png')
+    image.save(path, 'PNG')
+    peserta = add_peserta()
+    stage = UploadStage(app.config['UPLOAD_FOLDER'])
+    with open(path, 'rb') as f:
+        key, _ = store_proof(stage, f, peserta)
+    db.session.commit()
+    stage.cleanup()
+    return key.split('.')[0]
+
+
+def test_thumbnail_is_rendered(app):
+    with app.app_context():
+        sha256 = _store_image(app, Image.new('RGB', (1200, 900), 'navy'))
+        assert thumbnails.run_worker(app, once=True) == 1
+        assert db.session.get(ProofBlob, sha256).status_thumbnail == 'siap'
+        path, _ = thumbnails.find_thumbnail(app.config['UPLOAD_FOLDER'], sha256)
+        with Image.open(path) as thumb:
+            assert max(thumb.size) == thumbnails.THUMBNAIL_SIZE
+
+
+def test_oversized_image_between_limit_and_double_is_rejected(app):
+    # 56 MP: di atas batas, di bawah 2x batas (Pillow bawaan hanya memberi warning)
+    with app.app_context():
+        sha256 = _store_image(app, Image.new('1', (8000, 7000)))
+        source = blob_path(app.config['UPLOAD_FOLDER'], f'{sha256}.png')
+        target = thumbnail_path(app.config['UPLOAD_FOLDER'], sha256, 'jpg')
+        with pytest.raises(Image.DecompressionBombError):
+            thumbnails.render_thumbnail(source, 'png', target)
+
+        assert thumbnails.run_worker(app, once=True) == 1
+        assert db.session.get(ProofBlob, sha256).status_thumbnail == 'gagal'
+        assert thumbnails.find_thumbnail(app.config['UPLOAD_FOLDER'], sha256) is None
+
+
+def test_worker_thread_starts_on_first_request_only(make_app, monkeypatch):
+    started = []
+    monkeypatch.setenv('THUMBNAIL_WORKER', 'thread')
+    monkeypatch.setattr(thumbnails, 'start_worker_thread', started.append)
+    app = make_app()
+    assert started == []  # create_app saja (CLI) tidak menjalankan worker
+    app.test_client().get('/')
+    assert started == [app]
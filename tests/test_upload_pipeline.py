@@ -0,0 +1,76 @@
+import io
+import os
+import re
+
+from conftest import add_peserta, login_as
+
+from app.models import db, Peserta, ProofBlob
+from app.proof_store import blob_path
+
+PNG = b'\x89PNG\r\n\x1a\n' + b'\x00' * 2048
+
+
+def _csrf_token(client):
+    html = client.get('/dashboard').get_data(as_text=True)
+    return re.search(r'name="csrf_token" value="([^"]+)"', html).group(1)
+
+
+def _tmp_files(app):
+    tmp_dir = os.path.join(app.config['UPLOAD_FOLDER'], '.tmp')
+    return os.listdir(tmp_dir) if os.path.isdir(tmp_dir) else []
+
+
+def test_upload_through_csrf_protected_route(make_app):
+    app = make_app(WTF_CSRF_ENABLED=True)
+    client = app.test_client()
+    with app.app_context():
+        peserta_id = add_peserta().id
+    login_as(client, peserta_id=peserta_id)
+
+    response = client.post('/dashboard/upload-payment', data={
+        'csrf_token': _csrf_token(client),
+        'proof': (io.BytesIO(PNG), 'bukti.png'),
+    }, content_type='multipart/form-data')
+    assert response.status_code == 302
+
+    with app.app_context():
+        peserta = db.session.get(Peserta, peserta_id)
+        assert peserta.status_pembayaran == 'Menunggu'
+        assert peserta.payment_proof.endswith('.png')
+        with open(blob_path(app.config['UPLOAD_FOLDER'], peserta.payment_proof), 'rb') as f:
+            assert f.read() == PNG
+        assert ProofBlob.query.count() == 1
+    assert _tmp_files(app) == []
+
+
+def test_upload_without_csrf_token_is_rejected_and_cleaned(make_app):
+    app = make_app(WTF_CSRF_ENABLED=True)
+    client = app.test_client()
+    with app.app_context():
+        peserta_id = add_peserta().id
+    login_as(client, peserta_id=peserta_id)
+
+    response = client.post('/dashboard/upload-payment', data={
+        'proof': (io.BytesIO(PNG), 'bukti.png'),
+    }, content_type='multipart/form-data')
+    assert response.status_code == 400
+    assert _tmp_files(app) == []
+    with app.app_context():
+        assert db.session.get(Peserta, peserta_id).payment_proof is None
+
+
+def test_upload_with_wrong_magic_bytes_is_rejected(make_app):
+    app = make_app(WTF_CSRF_ENABLED=True)
+    client = app.test_client()
+    with app.app_context():
+        peserta_id = add_peserta().id
+    login_as(client, peserta_id=peserta_id)
+
+    response = client.post('/dashboard/upload-payment', data={
+        'csrf_token': _csrf_token(client),
+        'proof': (io.BytesIO(b'<html>' + b'x' * 100), 'bukti.png'),
+    }, content_type='multipart/form-data')
+    assert response.status_code == 302
+    assert _tmp_files(app) == []
+    with app.app_context():
+        assert db.session.get(Peserta, peserta_id).payment_proof is None